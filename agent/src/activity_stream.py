@@ -120,6 +120,7 @@ class ActivityStream:
     def update_activity(self, activity_id: str, status: str = None, 
                        description: str = None, details: Dict = None, duration_ms: int = None):
         """Actualiza una actividad existente"""
+        updated = None
         with self.lock:
             for activity in self.activities:
                 if activity.id == activity_id:
@@ -131,10 +132,12 @@ class ActivityStream:
                         activity.details.update(details)
                     if duration_ms:
                         activity.duration_ms = duration_ms
-                    
-                    # Notificar actualización
-                    self._notify_subscribers(activity)
+                    updated = activity
                     break
+        
+        # Notificar actualización (fuera del lock: _notify_subscribers lo toma)
+        if updated:
+            self._notify_subscribers(updated)
     
     def get_recent_activities(self, limit: int = 50) -> List[Dict]:
         """Obtiene actividades recientes"""
@@ -212,6 +215,17 @@ def log_file_modify(file_path: str, changes_count: int = 0):
     )
 
 
+def log_edit_batch(label: str, files_count: int = 0):
+    """Registra un lote de ediciones aplicado como transacción"""
+    stream = get_activity_stream()
+    return stream.add_activity(
+        ActivityType.FILE_MODIFY,
+        f"✏️  Aplicando: {label}",
+        f"{files_count} archivos",
+        details={'label': label, 'files_count': files_count}
+    )
+
+
 def log_command_execute(command: str):
     """Registra ejecución de comando"""
     stream = get_activity_stream()
@@ -2,12 +2,14 @@
 Agent Rules System - Sistema de Reglas para el Agente
 
 Define qué hacer, dónde parar, dónde buscar y cómo implementar.
+Las reglas se cargan de agent/config/rules/*.yaml y se recargan en caliente.
 """
 
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
+import threading
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -34,6 +36,8 @@ class AgentRule:
     applies_to: List[str] = field(default_factory=list)  # Contextos donde aplica
     conditions: Dict = field(default_factory=dict)  # Condiciones para aplicar
     actions: List[str] = field(default_factory=list)  # Acciones a tomar
+    when: Optional[Dict] = None  # Expresión declarativa (reemplaza a conditions como predicado)
+    compiled: Optional[Callable[[Dict], bool]] = field(default=None, repr=False, compare=False)
 
 
 class AgentRulesSystem:
@@ -43,408 +47,135 @@ class AgentRulesSystem:
     Las reglas solo se aplican al proyecto F3-OS.
     """
     
-    def __init__(self, project_root: Optional[Path] = None):
+    def __init__(self, project_root: Optional[Path] = None, rules_dir: Optional[Path] = None):
         self.project_root = project_root or Path(__file__).parent.parent.parent
+        self.rules_dir = Path(rules_dir) if rules_dir else Path(self.project_root) / 'agent' / 'config' / 'rules'
         self.rules: Dict[str, AgentRule] = {}
+        # Reglas agregadas en tiempo de ejecución (sobreviven a las recargas de archivos)
+        self._runtime_rules: Dict[str, AgentRule] = {}
+        # Índice (categoría, contexto) -> reglas ordenadas por prioridad;
+        # se reemplaza entero en cada cambio (los lectores nunca ven un estado a medias)
+        self._index: Dict[Tuple[Optional[RuleCategory], Optional[str]], Tuple[AgentRule, ...]] = {}
+        self.version = 0  # Se incrementa con cada cambio de reglas
+        self._reload_listeners: List[Callable[[], None]] = []
+        self.lock = threading.Lock()
         self.freedom_enabled = True  # Libertad total habilitada
         self.project_scope_only = True  # Solo aplicar al proyecto F3-OS
-        self._load_default_rules()
+        if not self.reload_rules():
+            # Sin reglas todo estaría permitido (incluido el núcleo sagrado): no arrancar
+            from .rule_loader import RuleFileError
+            raise RuleFileError([f"No se pudieron cargar las reglas de {self.rules_dir}"])
         logger.info(f"✅ Sistema de reglas inicializado: {len(self.rules)} reglas")
         logger.info(f"✅ Libertad total habilitada (excepto reglas explícitas)")
         logger.info(f"✅ Alcance: Únicamente proyecto F3-OS")
     
-    def _load_default_rules(self):
-        """Carga reglas por defecto
+    def reload_rules(self) -> bool:
+        """Carga (o recarga) las reglas de agent/config/rules/*.yaml
         
         IMPORTANTE: Estas son las ÚNICAS restricciones.
         Todo lo demás está permitido con total libertad.
-        """
-        
-        # ========== REGLA DE LIBERTAD ==========
-        self.add_rule(AgentRule(
-            id="total_freedom",
-            category=RuleCategory.WHAT_TO_DO,
-            title="Libertad Total Excepto Reglas Explícitas",
-            description="El agente tiene total libertad para operar en el proyecto F3-OS, excepto las reglas explícitas definidas aquí",
-            priority=10,
-            applies_to=["all"],
-            actions=[
-                "Operar con total autonomía",
-                "Tomar decisiones proactivas",
-                "Implementar mejoras sin restricciones",
-                "Explorar soluciones creativas",
-                "Aplicar conocimiento aprendido libremente",
-                "Solo respetar reglas explícitas de este sistema"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="project_scope_only",
-            category=RuleCategory.WHAT_TO_DO,
-            title="Alcance: Únicamente Proyecto F3-OS",
-            description="Todas las operaciones y reglas se aplican únicamente al proyecto F3-OS",
-            priority=10,
-            applies_to=["all"],
-            actions=[
-                "Enfocarse exclusivamente en F3-OS",
-                "No aplicar restricciones fuera del proyecto",
-                "Operar libremente dentro del proyecto",
-                "Ignorar restricciones externas al proyecto"
-            ]
-        ))
-        
-        # ========== QUÉ HACER ==========
-        self.add_rule(AgentRule(
-            id="complete_project_purpose",
-            category=RuleCategory.WHAT_TO_DO,
-            title="Completar el Propósito del Proyecto",
-            description="El propósito principal es completar el desarrollo de F3-OS según el modelo F3",
-            priority=10,
-            applies_to=["all"],
-            actions=[
-                "Analizar estado actual del proyecto",
-                "Identificar tareas pendientes",
-                "Priorizar según modelo F3",
-                "Implementar features faltantes",
-                "Mantener coherencia con MANIFIESTO.md"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="maintain_f3_coherence",
-            category=RuleCategory.WHAT_TO_DO,
-            title="Mantener Coherencia con Modelo F3",
-            description="Todas las decisiones deben alinearse con el modelo F3 (3 hilos, embudo, ciclo de fases)",
-            priority=10,
-            applies_to=["code_review", "implementation", "architecture"],
-            actions=[
-                "Verificar alineación con modelo F3",
-                "Usar vocabulario F3 correcto (hilos, embudo, síntesis)",
-                "Respetar ciclo de 4 fases",
-                "Aplicar retroalimentación inversa"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="learn_from_internet",
-            category=RuleCategory.WHAT_TO_DO,
-            title="Aprender de Internet",
-            description="Aprender libremente de internet para completar el proyecto (hasta 50% de red, 25% CPU)",
-            priority=8,
-            applies_to=["knowledge_gap", "implementation_help", "technical_questions"],
-            actions=[
-                "Buscar en GitHub para ejemplos de código",
-                "Buscar en Stack Overflow para soluciones técnicas",
-                "Buscar en documentación oficial (rust-lang.org, osdev.org)",
-                "Integrar conocimiento aprendido en base de datos",
-                "Aplicar conocimiento para completar tareas"
-            ]
-        ))
-        
-        # ========== DÓNDE PARAR ==========
-        self.add_rule(AgentRule(
-            id="stop_at_sacred_core",
-            category=RuleCategory.WHERE_TO_STOP,
-            title="Parar en Núcleo Sagrado",
-            description="NUNCA modificar el núcleo sagrado sin aprobación humana explícita",
-            priority=10,
-            applies_to=["code_modification", "architecture_changes"],
-            conditions={
-                "sacred_files": [
-                    "kernel/src/f3/core.rs",
-                    "kernel/src/f3/cpu.rs",
-                    "kernel/src/f3/ram.rs",
-                    "kernel/src/f3/mem.rs",
-                    "MANIFIESTO.md",
-                    "GOVERNANCE.md"
-                ]
-            },
-            actions=[
-                "Detener modificación",
-                "Solicitar aprobación humana",
-                "Explicar por qué requiere aprobación",
-                "Proponer alternativa si es posible"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="stop_at_resource_limits",
-            category=RuleCategory.WHERE_TO_STOP,
-            title="Parar en Límites de Recursos",
-            description="Parar si se alcanzan límites de recursos (25% CPU, 8GB RAM, 50% red)",
-            priority=9,
-            applies_to=["all"],
-            conditions={
-                "max_cpu_percent": 25.0,
-                "max_ram_gb": 8.0,
-                "max_bandwidth_percent": 50.0
-            },
-            actions=[
-                "Aplicar throttling",
-                "Pausar operaciones no críticas",
-                "Esperar hasta que recursos estén disponibles",
-                "Registrar advertencia"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="stop_at_uncertainty",
-            category=RuleCategory.WHERE_TO_STOP,
-            title="Parar en Incertidumbre",
-            description="Parar y consultar si hay incertidumbre sobre una decisión importante",
-            priority=7,
-            applies_to=["decision_making", "implementation"],
-            conditions={
-                "confidence_threshold": 0.7  # Si confianza < 70%, parar
-            },
-            actions=[
-                "Evaluar nivel de confianza",
-                "Si < 70%, buscar más información",
-                "Si no hay más información, consultar con usuario",
-                "Documentar incertidumbre"
-            ]
-        ))
-        
-        # ========== DÓNDE BUSCAR ==========
-        self.add_rule(AgentRule(
-            id="search_local_knowledge_first",
-            category=RuleCategory.WHERE_TO_SEARCH,
-            title="Buscar Primero en Conocimiento Local",
-            description="Siempre buscar primero en la base de conocimiento local del proyecto",
-            priority=10,
-            applies_to=["all_queries"],
-            actions=[
-                "Buscar en ProjectKnowledgeBase",
-                "Buscar en documentación del proyecto",
-                "Buscar en código fuente",
-                "Buscar en historial de decisiones"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="search_internet_if_local_fails",
-            category=RuleCategory.WHERE_TO_SEARCH,
-            title="Buscar en Internet si Local Falla",
-            description="Si no se encuentra información local, buscar en internet",
-            priority=8,
-            applies_to=["knowledge_gap"],
-            conditions={
-                "local_search_failed": True
-            },
-            actions=[
-                "Buscar en GitHub (repositorios similares)",
-                "Buscar en Stack Overflow (soluciones técnicas)",
-                "Buscar en documentación oficial",
-                "Buscar en osdev.org (desarrollo de OS)",
-                "Integrar resultados en base de conocimiento"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="search_sacred_core_for_architecture",
-            category=RuleCategory.WHERE_TO_SEARCH,
-            title="Buscar en Núcleo Sagrado para Arquitectura",
-            description="Para decisiones arquitectónicas, consultar núcleo sagrado primero",
-            priority=9,
-            applies_to=["architecture_decisions"],
-            actions=[
-                "Leer MANIFIESTO.md",
-                "Leer GOVERNANCE.md",
-                "Leer REGLAS_LOGICA.md",
-                "Consultar AGENTE_GOBERNANTE.md",
-                "Verificar alineación con modelo F3"
-            ]
-        ))
-        
-        # ========== CÓMO IMPLEMENTAR ==========
-        self.add_rule(AgentRule(
-            id="implement_following_f3_cycle",
-            category=RuleCategory.HOW_TO_IMPLEMENT,
-            title="Implementar Siguiendo Ciclo F3",
-            description="Todas las implementaciones deben seguir el ciclo F3: Lógico → Ilógico → Síntesis → Perfecto",
-            priority=10,
-            applies_to=["implementation"],
-            actions=[
-                "Fase Lógica: Diseño ordenado y estructurado",
-                "Fase Ilógica: Explorar alternativas creativas",
-                "Fase Síntesis: Integrar mejores ideas",
-                "Fase Perfecto: Optimizar y refinar"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="implement_with_rust_no_std",
-            category=RuleCategory.HOW_TO_IMPLEMENT,
-            title="Implementar con Rust no_std",
-            description="El kernel debe implementarse en Rust con no_std, usando alloc solo cuando sea necesario",
-            priority=9,
-            applies_to=["kernel_implementation"],
-            actions=[
-                "Usar #![no_std]",
-                "Usar alloc solo cuando sea necesario",
-                "Seguir convenciones de Rust para kernels",
-                "Mantener código seguro con ownership"
-            ]
-        ))
         
-        self.add_rule(AgentRule(
-            id="implement_with_separation_of_concerns",
-            category=RuleCategory.HOW_TO_IMPLEMENT,
-            title="Implementar con Separación de Consultas",
-            description="La GUI debe basarse en separación de consultas de procesos, con drivers de AI",
-            priority=9,
-            applies_to=["gui_implementation"],
-            actions=[
-                "Separar QueryProcessor de Renderer",
-                "Implementar AI drivers para procesamiento",
-                "Mantener arquitectura modular",
-                "Usar tecnología civil (accesible)"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="implement_with_testing",
-            category=RuleCategory.HOW_TO_IMPLEMENT,
-            title="Implementar con Testing",
-            description="Todas las implementaciones deben incluir pruebas cuando sea posible",
-            priority=7,
-            applies_to=["implementation"],
-            actions=[
-                "Escribir tests unitarios",
-                "Escribir tests de integración",
-                "Verificar que tests pasen",
-                "Documentar casos de prueba"
-            ]
-        ))
-        
-        # ========== LÍMITES DE RECURSOS ==========
-        self.add_rule(AgentRule(
-            id="resource_limits_cpu",
-            category=RuleCategory.RESOURCE_LIMITS,
-            title="Límite de CPU: 25%",
-            description="El agente puede usar hasta 25% de CPU (6 núcleos, 12 hilos disponibles)",
-            priority=10,
-            applies_to=["all"],
-            conditions={
-                "max_cpu_percent": 25.0,
-                "available_cores": 6,
-                "available_threads": 12
-            },
-            actions=[
-                "Monitorear uso de CPU continuamente",
-                "Aplicar throttling si > 20%",
-                "Parar si > 25%",
-                "Distribuir carga entre hilos disponibles"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="resource_limits_ram",
-            category=RuleCategory.RESOURCE_LIMITS,
-            title="Límite de RAM: 8GB",
-            description="El agente puede usar hasta 8GB de RAM",
-            priority=10,
-            applies_to=["all"],
-            conditions={
-                "max_ram_gb": 8.0
-            },
-            actions=[
-                "Monitorear uso de RAM",
-                "Liberar memoria no utilizada",
-                "Parar si > 8GB",
-                "Optimizar estructuras de datos"
-            ]
-        ))
-        
-        self.add_rule(AgentRule(
-            id="resource_limits_network",
-            category=RuleCategory.RESOURCE_LIMITS,
-            title="Límite de Red: 50%",
-            description="El agente puede usar hasta 50% de la disponibilidad de conexión de internet",
-            priority=9,
-            applies_to=["internet_learning"],
-            conditions={
-                "max_bandwidth_percent": 50.0
-            },
-            actions=[
-                "Monitorear uso de red",
-                "Aplicar delay entre peticiones (0.5s)",
-                "Parar si > 50%",
-                "Priorizar peticiones importantes"
-            ]
-        ))
-        
-        # ========== PRIORIDADES ==========
-        self.add_rule(AgentRule(
-            id="priority_complete_project",
-            category=RuleCategory.PRIORITIES,
-            title="Prioridad: Completar Proyecto",
-            description="La máxima prioridad es completar el propósito del proyecto F3-OS",
-            priority=10,
-            applies_to=["all"],
-            actions=[
-                "Identificar tareas críticas",
-                "Priorizar según modelo F3",
-                "Asignar recursos a tareas prioritarias",
-                "Completar tareas en orden de prioridad"
-            ]
-        ))
+        Si algún archivo es inválido (o no queda ninguna regla) se conservan las
+        reglas actuales y devuelve False; en la carga inicial el constructor falla.
+        """
+        from .rule_loader import RuleFileError, load_rules_dir
         
-        self.add_rule(AgentRule(
-            id="priority_maintain_coherence",
-            category=RuleCategory.PRIORITIES,
-            title="Prioridad: Mantener Coherencia",
-            description="Mantener coherencia con modelo F3 es de alta prioridad",
-            priority=9,
-            applies_to=["all"],
-            actions=[
-                "Verificar coherencia en cada cambio",
-                "Rechazar cambios que rompan coherencia",
-                "Sugerir alternativas coherentes"
-            ]
-        ))
+        if not self.rules_dir.is_dir():
+            logger.error(f"❌ No existe el directorio de reglas: {self.rules_dir}")
+            return False
+        try:
+            file_rules = load_rules_dir(self.rules_dir)
+        except RuleFileError as e:
+            for error in e.errors:
+                logger.error(f"❌ Regla inválida: {error}")
+            logger.warning("⚠️  Reglas no recargadas: se mantienen las anteriores")
+            return False
+        if not file_rules:
+            logger.error(f"❌ No hay reglas en {self.rules_dir}: se mantienen las anteriores")
+            return False
         
-        self.add_rule(AgentRule(
-            id="priority_user_queries",
-            category=RuleCategory.PRIORITIES,
-            title="Prioridad: Consultas del Usuario",
-            description="Las consultas del usuario tienen alta prioridad",
-            priority=8,
-            applies_to=["user_interaction"],
-            actions=[
-                "Responder consultas del usuario rápidamente",
-                "Usar base de conocimiento local primero",
-                "Aprender de internet si es necesario",
-                "Proporcionar respuestas completas"
-            ]
-        ))
+        with self.lock:
+            rules: Dict[str, AgentRule] = {}
+            for rule in file_rules:
+                rule.compiled = self._compile_conditions(rule)
+                rules[rule.id] = rule
+            rules.update(self._runtime_rules)
+            self._apply(rules)
+        
+        logger.info(f"✅ Reglas cargadas desde {self.rules_dir.name}/: {len(file_rules)} reglas")
+        for callback in list(self._reload_listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error aplicando reglas recargadas: {e}")
+        return True
+    
+    def handle_file_event(self, event) -> None:
+        """Recarga las reglas cuando cambia un archivo de reglas"""
+        if self.reload_rules():
+            from .activity_stream import log_success
+            log_success(f"Reglas recargadas sin reinicio ({len(self.rules)} reglas)")
+    
+    def add_reload_listener(self, callback: Callable[[], None]) -> None:
+        """Registra un callback que se llama tras cada recarga correcta de las reglas"""
+        self._reload_listeners.append(callback)
+    
+    def attach_watcher(self, watcher) -> None:
+        """Recibe cambios de agent/config/rules/ desde un FileWatcher"""
+        watcher.subscribe(self.handle_file_event, categories=('agent_rules',))
     
     def add_rule(self, rule: AgentRule):
         """Agrega una regla al sistema"""
-        self.rules[rule.id] = rule
+        rule.compiled = self._compile_conditions(rule)
+        with self.lock:
+            self._runtime_rules[rule.id] = rule
+            self._apply({**self.rules, rule.id: rule})
+    
+    def _apply(self, rules: Dict[str, AgentRule]):
+        """Publica un conjunto de reglas nuevo (índice precalculado, llamar con el lock)"""
+        index = self._build_index(rules)
+        self.rules = rules
+        self._index = index
+        self.version += 1
+    
+    @staticmethod
+    def _build_index(rules: Dict[str, AgentRule]) -> Dict[Tuple[Optional[RuleCategory], Optional[str]], Tuple[AgentRule, ...]]:
+        """Precalcula las reglas de cada (categoría, contexto), ordenadas por prioridad
+        
+        Claves:
+            (categoría, None): todas las reglas de la categoría
+            (categoría, contexto): reglas con ese contexto o con "all"
+            (categoría, "*"): reglas con "all" (para contextos sin reglas propias)
+        La categoría None agrupa todas las categorías.
+        """
+        # Orden estable: a igual prioridad se conserva el orden de inserción
+        ordered = sorted(rules.values(), key=lambda r: r.priority, reverse=True)
+        contexts = {ctx for rule in ordered for ctx in rule.applies_to if ctx != "all"}
+        
+        index: Dict[Tuple[Optional[RuleCategory], Optional[str]], Tuple[AgentRule, ...]] = {}
+        for category in [None, *RuleCategory]:
+            in_category = [r for r in ordered if category is None or r.category == category]
+            index[(category, None)] = tuple(in_category)
+            index[(category, "*")] = tuple(r for r in in_category if "all" in r.applies_to)
+            for ctx in contexts:
+                index[(category, ctx)] = tuple(
+                    r for r in in_category if "all" in r.applies_to or ctx in r.applies_to
+                )
+        return index
+    
+    def _lookup(self, category: Optional[RuleCategory], context: Optional[str]) -> Tuple[AgentRule, ...]:
+        """Reglas de una categoría y contexto (acceso directo al índice)"""
+        rules = self._index.get((category, context or None))
+        if rules is None:
+            rules = self._index.get((category, "*"), ())
+        return rules
     
     def get_rules(self, category: Optional[RuleCategory] = None, context: Optional[str] = None) -> List[AgentRule]:
-        """Obtiene reglas filtradas por categoría y contexto
+        """Obtiene reglas filtradas por categoría y contexto (ordenadas por prioridad, mayor primero)
         
         PRINCIPIO: Solo devolver reglas explícitas. Todo lo demás está permitido.
         """
-        filtered = []
-        
-        for rule in self.rules.values():
-            # Filtrar por categoría
-            if category and rule.category != category:
-                continue
-            
-            # Filtrar por contexto
-            if context and "all" not in rule.applies_to and context not in rule.applies_to:
-                continue
-            
-            filtered.append(rule)
-        
-        # Ordenar por prioridad (mayor primero)
-        filtered.sort(key=lambda r: r.priority, reverse=True)
-        
-        return filtered
+        return list(self._lookup(category, context))
     
     def is_allowed(self, action: str, context: Dict) -> tuple[bool, Optional[AgentRule]]:
         """Verifica si una acción está permitida
@@ -460,10 +191,9 @@ class AgentRulesSystem:
                 return True, None
         
         # Buscar reglas que prohíban esta acción
-        stop_rules = self.get_where_to_stop(context.get("type", "all"))
-        
+        stop_rules = self._lookup(RuleCategory.WHERE_TO_STOP, context.get("type", "all"))
         for rule in stop_rules:
-            if self._check_conditions(rule, context):
+            if rule.compiled(context):
                 # Regla explícita prohíbe la acción
                 return False, rule
         
@@ -497,6 +227,16 @@ class AgentRulesSystem:
         
         return limits
     
+    def get_priority(self, context: Optional[str], default: int = 5) -> int:
+        """Prioridad de un contexto de trabajo según las reglas PRIORITIES
+        
+        Cuenta solo las reglas que nombran el contexto explícitamente (las de
+        "all" valen para todo y no distinguen entre tareas).
+        """
+        rules = self._index.get((RuleCategory.PRIORITIES, context or None), ())
+        specific = [rule.priority for rule in rules if context in rule.applies_to]
+        return max(specific, default=default)
+    
     def should_stop(self, context: Dict) -> tuple[bool, Optional[AgentRule]]:
         """Determina si debe parar según el contexto
         
@@ -510,11 +250,10 @@ class AgentRulesSystem:
                 # Fuera del proyecto = libertad total, no parar
                 return False, None
         
-        stop_rules = self.get_where_to_stop(context.get("type", "all"))
-        
+        stop_rules = self._lookup(RuleCategory.WHERE_TO_STOP, context.get("type", "all"))
         for rule in stop_rules:
             # Verificar condiciones
-            if self._check_conditions(rule, context):
+            if rule.compiled(context):
                 return True, rule
         
         # Si no hay regla que prohíba, continuar con libertad
@@ -537,22 +276,45 @@ class AgentRulesSystem:
         except ValueError:
             return False
     
-    def _check_conditions(self, rule: AgentRule, context: Dict) -> bool:
-        """Verifica si se cumplen las condiciones de una regla"""
+    @staticmethod
+    def _compile_conditions(rule: AgentRule) -> Callable[[Dict], bool]:
+        """Compila las condiciones de una regla en un predicado sobre el contexto
+        
+        Con `when` se compila la expresión declarativa. Si no, sin condiciones la
+        regla siempre aplica; con condiciones basta que se cumpla una (archivo
+        sagrado modificado o límite numérico alcanzado).
+        """
+        if rule.when:
+            from .rule_loader import compile_expression
+            return compile_expression(rule.when)
         if not rule.conditions:
-            return True
+            return lambda context: True
         
+        checks: List[Callable[[Dict], bool]] = []
         for key, value in rule.conditions.items():
             if key == "sacred_files":
-                # Verificar si algún archivo sagrado está siendo modificado
-                modified_files = context.get("modified_files", [])
-                if any(f in modified_files for f in value):
-                    return True
-            elif key in context:
-                if context[key] >= value:  # Para límites numéricos
-                    return True
-        
-        return False
+                # Algún archivo sagrado está siendo modificado
+                sacred = frozenset(value)
+                
+                def touches_sacred(context: Dict, sacred=sacred) -> bool:
+                    modified_files = context.get("modified_files", ())
+                    if isinstance(modified_files, str):
+                        return any(f in modified_files for f in sacred)
+                    return not sacred.isdisjoint(modified_files)
+                checks.append(touches_sacred)
+            else:
+                # Límite numérico
+                checks.append(lambda context, key=key, value=value:
+                              key in context and context[key] >= value)
+        
+        if len(checks) == 1:
+            return checks[0]
+        return lambda context: any(check(context) for check in checks)
+    
+    def _check_conditions(self, rule: AgentRule, context: Dict) -> bool:
+        """Verifica si se cumplen las condiciones de una regla"""
+        predicate = rule.compiled or self._compile_conditions(rule)
+        return predicate(context)
     
     def get_search_strategy(self, query: str, context: Dict) -> List[str]:
         """Obtiene estrategia de búsqueda para una query"""
@@ -576,4 +338,19 @@ class AgentRulesSystem:
             guide.extend(rule.actions)
         
         return guide
-
+    
+    def search_code(self, symbol: str) -> Dict:
+        """Busca dónde está definido un símbolo del kernel y quién lo usa"""
+        from .code_index import get_code_index
+        code_index = get_code_index(self.project_root)
+        return {
+            "symbol": symbol,
+            "definitions": [
+                {"path": s.path, "line": s.line, "kind": s.kind, "container": s.container, "signature": s.signature}
+                for s in code_index.find_definitions(symbol)
+            ],
+            "references": [
+                {"path": path, "line": line}
+                for path, line in code_index.find_references(symbol)
+            ],
+        }
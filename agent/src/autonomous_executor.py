@@ -6,13 +6,20 @@ y completar tareas del proyecto de forma 100% autónoma.
 """
 
 import os
-import subprocess
 import logging
 import time
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 import json
+from collections import deque
+
+from .job_engine import Job, JobEngine, SUCCESS
+from .test_orchestrator import TestOrchestrator
+from .build_cache import BuildCache
+from .edit_transaction import EditError, EditTransaction, apply_modifications, atomic_write
+from .execution_log import ExecutionLog
+from .permission_cache import PermissionCache, fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -20,23 +27,56 @@ logger = logging.getLogger(__name__)
 class AutonomousExecutor:
     """Ejecutor autónomo que permite al agente implementar código automáticamente"""
     
-    def __init__(self, project_root: Path, agent_rules, resource_manager):
+    def __init__(self, project_root: Path, agent_rules, resource_manager, config: Dict = None):
         self.project_root = Path(project_root)
         self.agent_rules = agent_rules
         self.resource_manager = resource_manager
-        self.execution_history: List[Dict] = []
+        
+        # Historial: log JSON Lines rotado en disco + últimas ejecuciones en memoria
+        executor_config = (config or {}).get('executor', {})
+        self.execution_history = deque(maxlen=executor_config.get('history_in_memory', 100))
+        self.execution_log = ExecutionLog(
+            self.project_root / 'agent' / 'data' / 'execution_log',
+            max_segment_bytes=int(executor_config.get('log_max_mb', 5) * 1024 * 1024),
+            max_segments=executor_config.get('log_max_segments', 10),
+            compress=executor_config.get('log_compress', True),
+        )
+        self._migrate_legacy_log()
+        
+        # Motor de trabajos: comandos en segundo plano con salida en streaming
+        self.job_engine = JobEngine(
+            max_concurrent=executor_config.get('max_concurrent_jobs', 2),
+            output_max_bytes=int(executor_config.get('output_max_kb', 256) * 1024),
+            default_timeout=executor_config.get('command_timeout', 300),
+            idle_timeout=executor_config.get('idle_timeout', 180),
+        )
+        self.test_orchestrator = TestOrchestrator(self)
+        self.build_cache = BuildCache(self.project_root)
+        
+        # Decisiones de las reglas memorizadas (se invalidan al cambiar reglas o configuración)
+        self.permission_cache = PermissionCache(executor_config.get('permission_cache_size', 1024))
         
         logger.info("✅ Ejecutor autónomo inicializado - El agente puede implementar código automáticamente")
     
     def can_execute(self, action: str, context: Dict) -> Tuple[bool, Optional[str]]:
         """Verifica si puede ejecutar una acción"""
-        # Verificar reglas
-        is_allowed, blocking_rule = self.agent_rules.is_allowed(action, context)
+        # Verificar reglas (decisión memorizada mientras no cambien las reglas)
+        rules_version = self.agent_rules.version
+        key = fingerprint(action, context)
+        decision = self.permission_cache.get(key, rules_version) if key is not None else None
+        if decision is None:
+            is_allowed, blocking_rule = self.agent_rules.is_allowed(action, context)
+            if is_allowed:
+                decision = (True, None)
+            else:
+                decision = (False, f"Bloqueado por regla: {blocking_rule.title if blocking_rule else 'desconocida'}")
+            if key is not None:
+                self.permission_cache.put(key, rules_version, decision)
         
-        if not is_allowed:
-            return False, f"Bloqueado por regla: {blocking_rule.title if blocking_rule else 'desconocida'}"
+        if not decision[0]:
+            return decision
         
-        # Verificar recursos
+        # Verificar recursos (siempre en vivo, no se memorizan)
         stats = self.resource_manager.get_resource_stats()
         if not stats.get('within_limits', True):
             return False, "Recursos fuera de límites"
@@ -67,12 +107,8 @@ class AutonomousExecutor:
             activity = log_file_create(file_path)
             start_time = time.time()
             
-            # Crear directorio si no existe
-            full_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Escribir archivo
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Escribir archivo (temporal + rename, crea el directorio si no existe)
+            atomic_write(full_path, content)
             
             duration_ms = int((time.time() - start_time) * 1000)
             
@@ -90,7 +126,7 @@ class AutonomousExecutor:
                 'file_path': file_path,
                 'success': True
             }
-            self.execution_history.append(execution)
+            self._record_execution(execution)
             
             logger.info(f"✅ Archivo creado: {file_path}")
             
@@ -156,22 +192,9 @@ class AutonomousExecutor:
             with open(full_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            # Aplicar modificaciones
-            for mod in modifications:
-                if mod['type'] == 'replace':
-                    content = content.replace(mod['old'], mod['new'])
-                elif mod['type'] == 'insert':
-                    marker = mod.get('after', '')
-                    if marker in content:
-                        content = content.replace(marker, marker + '\n' + mod['content'])
-                    else:
-                        content += '\n' + mod['content']
-                elif mod['type'] == 'delete':
-                    content = content.replace(mod['text'], '')
-            
-            # Escribir archivo modificado
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Aplicar modificaciones y escribir (temporal + rename)
+            content = apply_modifications(content, modifications)
+            atomic_write(full_path, content)
             
             duration_ms = int((time.time() - start_time) * 1000)
             
@@ -190,7 +213,7 @@ class AutonomousExecutor:
                 'modifications_count': len(modifications),
                 'success': True
             }
-            self.execution_history.append(execution)
+            self._record_execution(execution)
             
             logger.info(f"✅ Archivo modificado: {file_path} ({len(modifications)} cambios)")
             
@@ -208,124 +231,356 @@ class AutonomousExecutor:
                 'file_path': file_path
             }
     
-    def execute_command(self, command: List[str], cwd: Optional[str] = None, context: Dict = None) -> Dict:
-        """Ejecuta un comando del sistema"""
-        # Verificar permisos
+    def _start_job(self, command: List[str], cwd: Optional[str] = None, context: Dict = None,
+                   timeout: Optional[float] = None,
+                   progress_activity_ids: Optional[List[str]] = None,
+                   engine: Optional[JobEngine] = None,
+                   env: Optional[Dict[str, str]] = None) -> Tuple[Optional[Job], Optional[Dict]]:
+        """Verifica permisos y lanza un comando en el motor de trabajos
+        
+        Args:
+            engine: Motor alternativo (p. ej. el de tests, con su propio límite de concurrencia)
+        
+        Returns:
+            (trabajo, None) si se lanzó, (None, resultado de error) si no
+        """
+        command_line = ' '.join(command)
         can_exec, reason = self.can_execute("execute_command", {
-            'command': ' '.join(command),
+            'command': command_line,
             'type': 'system_command',
             **(context or {})
         })
         
         if not can_exec:
-            return {
+            return None, {
                 'success': False,
                 'error': reason,
-                'command': ' '.join(command)
+                'command': command_line
             }
         
         try:
-            # Registrar actividad
+            # Registrar actividad (la primera actividad del trabajo es la del comando)
             from .activity_stream import log_command_execute
-            activity = log_command_execute(' '.join(command))
-            start_time = time.time()
+            activity = log_command_execute(command_line)
             
-            # Ejecutar comando
-            work_dir = self.project_root / (cwd or '')
-            result = subprocess.run(
+            job = (engine or self.job_engine).submit(
                 command,
-                cwd=work_dir,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutos máximo
+                cwd=self.project_root / (cwd or ''),
+                timeout=timeout,
+                env=env,
+                activity_ids=[activity.id] + list(progress_activity_ids or []),
+                on_complete=self._on_job_complete
             )
+            return job, None
             
-            duration_ms = int((time.time() - start_time) * 1000)
-            
-            # Actualizar actividad
-            from .activity_stream import get_activity_stream
-            stream = get_activity_stream()
-            status = "success" if result.returncode == 0 else "error"
-            stream.update_activity(activity.id, status=status,
-                                 description=f"Código: {result.returncode}",
-                                 duration_ms=duration_ms)
-            
-            # Registrar ejecución
-            execution = {
-                'timestamp': datetime.now().isoformat(),
-                'action': 'execute_command',
-                'command': ' '.join(command),
-                'return_code': result.returncode,
-                'success': result.returncode == 0
-            }
-            self.execution_history.append(execution)
-            
-            if result.returncode == 0:
-                logger.info(f"✅ Comando ejecutado: {' '.join(command)}")
-            else:
-                logger.warning(f"⚠️  Comando falló: {' '.join(command)} (código: {result.returncode})")
-            
-            return {
-                'success': result.returncode == 0,
-                'return_code': result.returncode,
-                'stdout': result.stdout,
-                'stderr': result.stderr,
-                'command': ' '.join(command)
-            }
-            
-        except subprocess.TimeoutExpired:
-            return {
-                'success': False,
-                'error': 'Timeout (5 minutos)',
-                'command': ' '.join(command)
-            }
         except Exception as e:
-            logger.error(f"❌ Error ejecutando comando {' '.join(command)}: {e}")
-            return {
+            logger.error(f"❌ Error ejecutando comando {command_line}: {e}")
+            return None, {
                 'success': False,
                 'error': str(e),
-                'command': ' '.join(command)
+                'command': command_line
             }
     
-    def build_project(self, context: Dict = None) -> Dict:
-        """Compila el proyecto F3-OS"""
+    def _on_job_complete(self, job: Job):
+        """Cierra la actividad del comando y registra la ejecución"""
+        success = job.status == SUCCESS
+        
+        from .activity_stream import get_activity_stream
+        stream = get_activity_stream()
+        stream.update_activity(job.activity_ids[0],
+                             status="success" if success else "error",
+                             description=job.error or f"Código: {job.return_code}",
+                             details={'job_status': job.status},
+                             duration_ms=job.duration_ms)
+        
+        # Registrar ejecución
+        execution = {
+            'timestamp': datetime.now().isoformat(),
+            'action': 'execute_command',
+            'command': job.command_line,
+            'job_id': job.id,
+            'return_code': job.return_code,
+            'status': job.status,
+            'success': success
+        }
+        self._record_execution(execution)
+        
+        if success:
+            logger.info(f"✅ Comando ejecutado: {job.command_line}")
+        elif job.error:
+            logger.warning(f"⚠️  Comando falló: {job.command_line} ({job.error})")
+        else:
+            logger.warning(f"⚠️  Comando falló: {job.command_line} (código: {job.return_code})")
+    
+    def _job_result(self, job: Job) -> Dict:
+        """Resultado de un trabajo terminado (mismo formato que execute_command)"""
+        result = {
+            'success': job.status == SUCCESS,
+            'return_code': job.return_code,
+            'stdout': job.stdout.text(),
+            'stderr': job.stderr.text(),
+            'command': job.command_line,
+            'job_id': job.id,
+            'status': job.status,
+            'duration_ms': job.duration_ms
+        }
+        if job.error:
+            result['error'] = job.error
+        if job.stdout.truncated or job.stderr.truncated:
+            result['output_truncated'] = True
+        return result
+    
+    def execute_command(self, command: List[str], cwd: Optional[str] = None, context: Dict = None,
+                        timeout: Optional[float] = None,
+                        progress_activity_ids: Optional[List[str]] = None,
+                        env: Optional[Dict[str, str]] = None) -> Dict:
+        """Ejecuta un comando del sistema y espera el resultado
+        
+        La salida se publica línea a línea en el ActivityStream mientras corre;
+        el comando se mata si supera el timeout o deja de producir salida.
+        """
+        job, error = self._start_job(command, cwd, context, timeout, progress_activity_ids, env=env)
+        if job is None:
+            return error
+        job.wait()
+        return self._job_result(job)
+    
+    def start_command(self, command: List[str], cwd: Optional[str] = None, context: Dict = None,
+                      timeout: Optional[float] = None) -> Dict:
+        """Lanza un comando en segundo plano (consultar con get_job, detener con cancel_job)"""
+        job, error = self._start_job(command, cwd, context, timeout)
+        if job is None:
+            return error
+        return {
+            'success': True,
+            'job_id': job.id,
+            'command': job.command_line
+        }
+    
+    def get_job(self, job_id: str, include_output: bool = False) -> Optional[Dict]:
+        """Estado de un trabajo (con la salida retenida si include_output)"""
+        job = self.job_engine.get(job_id)
+        if job is None:
+            return None
+        return job.to_dict(include_output=include_output)
+    
+    def list_jobs(self, include_finished: bool = True) -> List[Dict]:
+        """Trabajos en cola, en ejecución y terminados recientemente"""
+        return self.job_engine.list_jobs(include_finished)
+    
+    def cancel_job(self, job_id: str) -> Dict:
+        """Cancela un trabajo en cola o en ejecución"""
+        cancelled = self.job_engine.cancel(job_id)
+        return {
+            'success': cancelled,
+            'job_id': job_id,
+            'error': None if cancelled else 'Trabajo inexistente o ya terminado'
+        }
+    
+    def build_project(self, context: Dict = None, force: bool = False) -> Dict:
+        """Compila el proyecto F3-OS
+        
+        Si la huella de las entradas (kernel/src/**, Cargo.toml, linker.ld,
+        x86_64-unknown-none.json...) coincide con una compilación exitosa cuyos
+        artefactos siguen intactos, responde desde la caché sin invocar build.sh.
+        """
         from .activity_stream import log_build
         activity = log_build()
         start_time = time.time()
         
-        result = self.execute_command(['./build.sh'], context=context)
-        
-        duration_ms = int((time.time() - start_time) * 1000)
         from .activity_stream import get_activity_stream
         stream = get_activity_stream()
+        
+        fingerprint, cached = self.build_cache.check()
+        if cached and not force:
+            duration_ms = int((time.time() - start_time) * 1000)
+            stream.update_activity(activity.id, status="success",
+                                 description="Sin cambios desde la última compilación (caché)",
+                                 details={'fingerprint': fingerprint[:12], 'cached': True},
+                                 duration_ms=duration_ms)
+            logger.info(f"✅ Compilación en caché ({fingerprint[:12]}), build.sh omitido")
+            return {
+                'success': True,
+                'cached': True,
+                'fingerprint': fingerprint,
+                'artifacts': [a['path'] for a in cached['artifacts']],
+                'return_code': 0,
+                'stdout': '',
+                'stderr': '',
+                'command': './build.sh'
+            }
+        
+        # Con una compilación exitosa previa la toolchain nightly ya está instalada
+        skip_toolchain = self.build_cache.toolchain_ready
+        env = {'F3_SKIP_TOOLCHAIN_SETUP': '1'} if skip_toolchain else None
+        result = self.execute_command(['./build.sh'], context=context,
+                                      progress_activity_ids=[activity.id], env=env)
+        
+        duration_ms = int((time.time() - start_time) * 1000)
+        if result['success']:
+            build = self.build_cache.record(fingerprint, duration_ms)
+            result['artifacts'] = [a['path'] for a in build['artifacts']]
+        elif skip_toolchain:
+            # Puede faltar la toolchain: la próxima compilación la vuelve a preparar
+            self.build_cache.reset_toolchain()
+        result['cached'] = False
+        result['fingerprint'] = fingerprint
+        
         stream.update_activity(activity.id, 
                              status="success" if result['success'] else "error",
                              description=f"Compilación {'exitosa' if result['success'] else 'fallida'}",
+                             details={'fingerprint': fingerprint[:12], 'cached': False},
                              duration_ms=duration_ms)
         
         return result
     
     def run_tests(self, context: Dict = None) -> Dict:
-        """Ejecuta tests del proyecto"""
-        # Buscar y ejecutar tests
-        test_commands = [
-            ['cargo', 'test', '--manifest-path', 'kernel/Cargo.toml'],
-            ['python3', '-m', 'pytest', 'agent/tests/'] if (self.project_root / 'agent/tests').exists() else None
+        """Ejecuta tests del proyecto
+        
+        Las suites (cargo test y shards de pytest) corren en paralelo dentro del
+        presupuesto de núcleos; el informe estilo JUnit queda en agent/data/test_results/.
+        """
+        from .activity_stream import log_test, get_activity_stream
+        activity = log_test()
+        
+        outcome = self.test_orchestrator.run(context=context, progress_activity_ids=[activity.id])
+        report = outcome['report']
+        
+        stream = get_activity_stream()
+        stream.update_activity(activity.id,
+                             status="success" if outcome['success'] else "error",
+                             description=(f"Tests {'exitosos' if outcome['success'] else 'fallidos'}: "
+                                          f"{report['tests']} tests, {report['failures']} fallos, "
+                                          f"{len(report['suites'])} suites en paralelo"),
+                             details={'tests': report['tests'], 'failures': report['failures'],
+                                      'errors': report['errors'], 'skipped': report['skipped']},
+                             duration_ms=report['duration_ms'])
+        
+        return outcome
+    
+    def get_test_history(self, limit: int = 20) -> List[Dict]:
+        """Resúmenes de las últimas ejecuciones de tests (tendencias)"""
+        return self.test_orchestrator.get_history(limit)
+    
+    def apply_edit_batch(self, edits: List[Dict], context: Dict = None, label: str = "") -> Dict:
+        """Aplica un lote de ediciones como una transacción
+        
+        edits: Lista de ediciones (se aplican en orden; varias sobre el mismo archivo se componen)
+        [
+            {'op': 'create', 'path': 'path/to/file.rs', 'content': '...'},
+            {'op': 'modify', 'path': 'existing.rs', 'modifications': [...]},
+            {'op': 'create', 'path': '...', 'content': '...', 'type': 'test'}
         ]
         
-        results = []
-        for cmd in test_commands:
-            if cmd:
-                result = self.execute_command(cmd, context=context)
-                results.append(result)
+        Todo se calcula en memoria, las reglas se verifican una vez por tipo de
+        cambio para el conjunto completo y la escritura es temporal + rename con
+        rollback: o se aplica todo el lote o nada.
+        """
+        label = label or f"{len(edits)} ediciones"
+        transaction = EditTransaction(self.project_root)
+        
+        # Preparar en memoria (sin tocar el disco)
+        try:
+            for edit in edits:
+                if edit['op'] == 'create':
+                    transaction.create(edit['path'], edit['content'])
+                elif edit['op'] == 'modify':
+                    transaction.modify(edit['path'], edit['modifications'])
+                else:
+                    raise EditError(f"Operación desconocida: {edit['op']}")
+        except (EditError, OSError, UnicodeDecodeError) as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'files': []
+            }
+        
+        # Verificar permisos una vez por tipo de cambio (mismos tipos que create_file/modify_file)
+        groups: Dict[str, List[str]] = {}
+        for edit in edits:
+            default_type = 'file_creation' if edit['op'] == 'create' else 'code_modification'
+            change_type = edit.get('type') or (context or {}).get('type') or default_type
+            paths = groups.setdefault(change_type, [])
+            if edit['path'] not in paths:
+                paths.append(edit['path'])
+        
+        for change_type, paths in groups.items():
+            can_exec, reason = self.can_execute("apply_edit_batch", {
+                **(context or {}),
+                'type': change_type,
+                'modified_files': paths,
+                'file_paths': [str(self.project_root / p) for p in paths]
+            })
+            if not can_exec:
+                return {
+                    'success': False,
+                    'error': reason,
+                    'files': paths
+                }
+        
+        from .activity_stream import log_edit_batch, get_activity_stream
+        activity = log_edit_batch(label, len(transaction.staged))
+        start_time = time.time()
+        stream = get_activity_stream()
+        
+        created = [f.path for f in transaction.staged.values() if f.created]
+        modified = [f.path for f in transaction.staged.values() if not f.created]
+        
+        try:
+            transaction.commit()
+        except Exception as e:
+            logger.error(f"❌ Error aplicando lote de ediciones ({label}), revertido: {e}")
+            stream.update_activity(activity.id, status="error",
+                                 description=f"Revertido: {e}",
+                                 duration_ms=int((time.time() - start_time) * 1000))
+            self._record_execution({
+                'timestamp': datetime.now().isoformat(),
+                'action': 'edit_batch',
+                'label': label,
+                'files': transaction.paths,
+                'success': False,
+                'error': str(e)
+            })
+            return {
+                'success': False,
+                'error': str(e),
+                'files': transaction.paths,
+                'rolled_back': True
+            }
+        
+        duration_ms = int((time.time() - start_time) * 1000)
+        stream.update_activity(activity.id, status="success",
+                             description=f"{len(created)} archivos creados, {len(modified)} modificados",
+                             details={'created': created, 'modified': modified},
+                             duration_ms=duration_ms)
+        
+        # Registrar ejecución (un único registro para todo el lote)
+        self._record_execution({
+            'timestamp': datetime.now().isoformat(),
+            'action': 'edit_batch',
+            'label': label,
+            'created': created,
+            'modified': modified,
+            'edits_count': len(edits),
+            'success': True
+        })
+        
+        logger.info(f"✅ Lote de ediciones aplicado ({label}): "
+                    f"{len(created)} creados, {len(modified)} modificados")
         
         return {
-            'success': all(r['success'] for r in results),
-            'results': results
+            'success': True,
+            'created': created,
+            'modified': modified,
+            'files': [
+                {'success': True, 'file_path': f.path, 'created': f.created,
+                 'size': len(f.content), 'operations': f.operations}
+                for f in transaction.staged.values()
+            ]
         }
     
     def create_feature(self, feature_name: str, description: str, implementation: Dict, context: Dict = None) -> Dict:
-        """Crea una nueva feature completa
+        """Crea una nueva feature completa (todos los archivos en una sola transacción)
         
         implementation: {
             'files': [
@@ -339,61 +594,67 @@ class AutonomousExecutor:
             'tests': [...]
         }
         """
-        results = []
-        
-        # Crear archivos nuevos
+        edits = []
         for file_info in implementation.get('files', []):
-            result = self.create_file(
-                file_info['path'],
-                file_info['content'],
-                context={**(context or {}), 'feature': feature_name}
-            )
-            results.append(result)
-        
-        # Modificar archivos existentes
+            edits.append({'op': 'create', 'path': file_info['path'], 'content': file_info['content']})
         for mod_info in implementation.get('modifications', []):
-            result = self.modify_file(
-                mod_info['file'],
-                mod_info['modifications'],
-                context={**(context or {}), 'feature': feature_name}
-            )
-            results.append(result)
-        
-        # Crear tests
+            edits.append({'op': 'modify', 'path': mod_info['file'], 'modifications': mod_info['modifications']})
         for test_info in implementation.get('tests', []):
-            result = self.create_file(
-                test_info['path'],
-                test_info['content'],
-                context={**(context or {}), 'feature': feature_name, 'type': 'test'}
-            )
-            results.append(result)
+            edits.append({'op': 'create', 'path': test_info['path'], 'content': test_info['content'],
+                          'type': 'test'})
         
-        success = all(r.get('success', False) for r in results)
+        result = self.apply_edit_batch(
+            edits,
+            context={**(context or {}), 'feature': feature_name},
+            label=f"Feature '{feature_name}'"
+        )
         
-        if success:
+        if result['success']:
             logger.info(f"✅ Feature '{feature_name}' creada exitosamente")
         else:
-            logger.warning(f"⚠️  Feature '{feature_name}' creada con errores")
+            logger.warning(f"⚠️  Feature '{feature_name}' no aplicada: {result.get('error')}")
         
         return {
-            'success': success,
+            'success': result['success'],
             'feature_name': feature_name,
-            'results': results
+            'description': description,
+            'results': result['files'] if result['success'] else [],
+            'error': result.get('error')
         }
     
+    def _record_execution(self, execution: Dict):
+        """Registra una ejecución (memoria acotada + log en disco)"""
+        self.execution_history.append(execution)
+        self.execution_log.append(execution)
+    
+    def _migrate_legacy_log(self):
+        """Importa el antiguo agent/data/execution_log.json al log JSON Lines (una vez)"""
+        legacy_path = self.project_root / 'agent' / 'data' / 'execution_log.json'
+        if not legacy_path.exists():
+            return
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            for record in records:
+                self.execution_log.append(record)
+            legacy_path.replace(legacy_path.with_suffix('.json.migrated'))
+            logger.info(f"✅ Log de ejecuciones migrado a JSON Lines ({len(records)} registros)")
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"No se pudo migrar {legacy_path}: {e}")
+    
     def get_execution_history(self, limit: Optional[int] = None) -> List[Dict]:
-        """Obtiene historial de ejecuciones"""
-        if limit:
-            return self.execution_history[-limit:]
-        return self.execution_history
+        """Obtiene historial de ejecuciones (leído desde el final del log)"""
+        return self.execution_log.tail(limit)
     
-    def save_execution_log(self, file_path: str = "agent/data/execution_log.json"):
-        """Guarda el historial de ejecuciones"""
-        log_path = self.project_root / file_path
-        log_path.parent.mkdir(parents=True, exist_ok=True)
+    def save_execution_log(self, file_path: Optional[str] = None):
+        """Asegura el historial en disco
         
-        with open(log_path, 'w', encoding='utf-8') as f:
-            json.dump(self.execution_history, f, indent=2, ensure_ascii=False)
+        El log JSON Lines se escribe al registrar cada ejecución; aquí solo se
+        fuerza a disco. Con file_path se exporta además el historial completo a JSON.
+        """
+        self.execution_log.flush()
         
-        logger.info(f"✅ Log de ejecuciones guardado: {file_path}")
-
+        if file_path:
+            log_path = self.project_root / file_path
+            atomic_write(log_path, json.dumps(self.execution_log.tail(), indent=2, ensure_ascii=False))
+            logger.info(f"✅ Log de ejecuciones exportado: {file_path}")
@@ -2,92 +2,298 @@
 Autonomous Worker - Trabajador Autónomo del Agente
 
 Ejecuta tareas automáticamente en segundo plano para completar el proyecto.
+Las tareas se planifican por tiempo y por eventos (Scheduler): PR nuevo,
+archivo cambiado, presión de recursos despejada y temas pendientes de aprender.
+Sin eventos el hilo duerme; un evento lo despierta en milisegundos.
+
+El trabajo (evaluar PRs, aprender, compilar, probar) pasa por una cola de tareas
+persistente (TaskQueue): sobrevive a reinicios, se ordena por las reglas
+PRIORITIES y se ejecuta en paralelo dentro del presupuesto del ResourceManager.
 """
 
-import time
+import os
+import socket
 import threading
 import logging
-from typing import Dict, Optional
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from .scheduler import Scheduler
+from .task_queue import Task, TaskQueue
 
 logger = logging.getLogger(__name__)
 
 
+# Eventos del trabajador
+EVENT_PR_DETECTED = 'pr_detected'  # payload: pr_data (dict de GitHubIntegration.get_pr)
+EVENT_FILE_CHANGED = 'file_changed'  # payload: FileChangeEvent
+EVENT_RESOURCES_OK = 'resources_ok'  # La presión de recursos se despejó
+EVENT_LEARNING_PENDING = 'learning_pending'  # Hay temas en la cola de aprendizaje
+EVENT_TASKS_PENDING = 'tasks_pending'  # Tareas nuevas o huecos libres en el presupuesto
+
+# Tipos de tarea: contexto de prioridad (reglas PRIORITIES), evento que las anuncia e intentos
+TASK_KINDS = {
+    'evaluate_pr': {'context': 'pr_evaluation', 'event': EVENT_PR_DETECTED, 'max_attempts': 3},
+    'learn': {'context': 'learning', 'event': EVENT_LEARNING_PENDING, 'max_attempts': 3},
+    'build': {'context': 'build', 'event': EVENT_TASKS_PENDING, 'max_attempts': 1},
+    'test': {'context': 'test', 'event': EVENT_TASKS_PENDING, 'max_attempts': 1},
+}
+
+
 class AutonomousWorker:
-    """Trabajador autónomo que ejecuta tareas periódicamente"""
-    
+    """Trabajador autónomo que ejecuta tareas por tiempo y por eventos"""
+
     def __init__(self, governance_core, config: Dict):
         self.governance_core = governance_core
         self.config = config
         self.running = False
-        self.worker_thread: Optional[threading.Thread] = None
-        self.work_interval = config.get('autonomous_worker', {}).get('work_interval', 30)  # 30 segundos
-        
+        worker_config = config.get('autonomous_worker', {})
+        self.work_interval = worker_config.get('work_interval', 30)  # 30 segundos
+        self.pr_poll_interval = worker_config.get('pr_poll_interval', 0)  # 0 = sin sondeo de GitHub
+
+        self.scheduler = Scheduler(name='autonomous-worker')
+        self.seen_prs: Set[int] = set()
+        self.github = None
+        self.last_state: Optional[tuple] = None
+        self._subscribed = False
+
+        jitter = worker_config.get('jitter', 0.1)
+        backoff = {
+            'backoff_base': worker_config.get('backoff_base', 5.0),
+            'backoff_max': worker_config.get('backoff_max', 300.0),
+        }
+        # Cola de tareas persistente (agent/data/task_queue.db)
+        agent_rules = governance_core.agent_rules
+        self.task_queue = TaskQueue(
+            governance_core.autonomous_executor.project_root / 'agent' / 'data' / 'task_queue.db',
+            priority_for=agent_rules.get_priority,
+            retry_delay=worker_config.get('task_retry_delay', 30.0),
+        )
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.max_task_workers = worker_config.get('max_task_workers', 2)
+        self.lease_seconds = worker_config.get('task_lease_seconds', 120.0)
+        self.task_pool: Optional[ThreadPoolExecutor] = None
+        self.in_flight: Dict[int, Task] = {}
+        self.in_flight_lock = threading.Lock()
+        self.rules_version = agent_rules.version
+        self.handlers = {
+            'evaluate_pr': self._evaluate_pr,
+            'learn': self._learn,
+            'build': self._build,
+            'test': self._test,
+        }
+
+        # Prioridad: menor = antes (tareas > sondeo de PRs > ciclo de trabajo)
+        # El reparto también corre cada lease/3 para renovar los leases en curso
+        self.scheduler.add_job('dispatch_tasks', self._dispatch_tasks, interval=self.lease_seconds / 3,
+                               events=(EVENT_PR_DETECTED, EVENT_LEARNING_PENDING, EVENT_TASKS_PENDING,
+                                       EVENT_RESOURCES_OK),
+                               priority=1, jitter=0, run_immediately=True, **backoff)
+        self.scheduler.add_job('work_cycle', self._execute_work_cycle, interval=self.work_interval,
+                               events=(EVENT_FILE_CHANGED, EVENT_RESOURCES_OK), priority=5,
+                               jitter=jitter, run_immediately=True, **backoff)
+        if self.pr_poll_interval:
+            self.scheduler.add_job('poll_prs', self._poll_prs, interval=self.pr_poll_interval,
+                                   priority=2, jitter=jitter, run_immediately=True, **backoff)
+
         logger.info("✅ Trabajador autónomo inicializado")
-    
+
     def start(self):
         """Inicia el trabajador autónomo"""
         if self.running:
             return
-        
+
         self.running = True
-        self.worker_thread = threading.Thread(target=self._work_loop, daemon=True)
-        self.worker_thread.start()
-        
+        self._subscribe()
+        self.task_queue.purge()
+        self.task_pool = ThreadPoolExecutor(max_workers=self.max_task_workers,
+                                            thread_name_prefix='autonomous-task')
+        self.scheduler.start()
+
         from .activity_stream import log_success
-        log_success("Trabajador autónomo iniciado - Ejecutando tareas periódicamente")
-        
+        log_success("Trabajador autónomo iniciado - Ejecutando tareas por tiempo y por eventos")
+
         logger.info("✅ Trabajador autónomo iniciado")
-    
+
     def stop(self):
-        """Detiene el trabajador autónomo"""
+        """Detiene el trabajador autónomo (despierta al planificador al instante)
+
+        Las tareas en curso terminan en segundo plano; si el proceso sale antes,
+        su lease vence y se reintentan en el próximo arranque.
+        """
         self.running = False
-        if self.worker_thread:
-            self.worker_thread.join(timeout=5.0)
+        self.scheduler.stop()
+        if self.task_pool is not None:
+            self.task_pool.shutdown(wait=False)
+            self.task_pool = None
         logger.info("🛑 Trabajador autónomo detenido")
-    
-    def _work_loop(self):
-        """Loop principal del trabajador"""
-        while self.running:
-            try:
-                # Ejecutar ciclo de trabajo
-                self._execute_work_cycle()
-                
-                # Esperar antes del siguiente ciclo
-                time.sleep(self.work_interval)
-                
-            except Exception as e:
-                logger.error(f"Error en ciclo de trabajo: {e}")
-                from .activity_stream import log_error
-                log_error(f"Error en ciclo de trabajo: {e}")
-                time.sleep(self.work_interval)
-    
-    def _execute_work_cycle(self):
-        """Ejecuta un ciclo de trabajo"""
-        from .activity_stream import log_thinking, log_decision
-        
-        # 1. Analizar estado del proyecto
-        log_thinking("Analizando estado del proyecto F3-OS...")
-        
-        # 2. Verificar si hay tareas pendientes
-        # (Por ahora, solo registramos que está trabajando)
-        
-        # 3. Monitorear recursos
-        stats = self.governance_core.resource_manager.get_resource_stats()
-        if stats.get('within_limits', True):
-            # El agente está operando correctamente
-            pass
+
+    def _subscribe(self):
+        """Conecta las fuentes de eventos (vigilancia de archivos y recursos)"""
+        if self._subscribed:
+            return
+        self._subscribed = True
+        self.governance_core.file_watcher.subscribe(lambda event: self.notify(EVENT_FILE_CHANGED, event))
+        self.governance_core.resource_manager.add_listener(self._on_resources_changed)
+
+    # ---------- Eventos ----------
+
+    def notify(self, event: str, payload: Any = None) -> int:
+        """Dispara un evento del trabajador (devuelve cuántos trabajos despertó)"""
+        return self.scheduler.notify(event, payload)
+
+    def submit_task(self, kind: str, payload: Any = None, priority: Optional[int] = None,
+                    dedupe_key: Optional[str] = None, delay: float = 0.0) -> int:
+        """Encola una tarea persistente (prioridad según las reglas si no se indica)"""
+        spec = TASK_KINDS[kind]
+        task_id = self.task_queue.enqueue(kind, payload, context=spec['context'], priority=priority,
+                                          max_attempts=spec['max_attempts'], delay=delay,
+                                          dedupe_key=dedupe_key)
+        self.notify(spec['event'], task_id)
+        return task_id
+
+    def notify_pr(self, pr_data: Dict) -> int:
+        """Encola la evaluación de un PR detectado"""
+        return self.submit_task('evaluate_pr', pr_data,
+                                dedupe_key=f"pr:{pr_data.get('number')}:{pr_data.get('updated_at')}")
+
+    def request_learning(self, query: str) -> int:
+        """Agrega un tema a la cola de aprendizaje"""
+        return self.submit_task('learn', {'query': query}, dedupe_key=f"learn:{query}")
+
+    def _on_resources_changed(self, within_limits: bool) -> None:
+        """Pausa el trabajo bajo presión de recursos y lo reanuda al despejarse"""
+        if within_limits:
+            self.scheduler.resume()
+            self.notify(EVENT_RESOURCES_OK)
         else:
-            log_error("Recursos fuera de límites")
-        
-        # 4. Verificar estado del ciclo de desarrollo
+            self.scheduler.pause()
+            from .activity_stream import log_error
+            log_error("Recursos fuera de límites - Trabajo autónomo en pausa")
+
+    # ---------- Trabajos ----------
+
+    def _execute_work_cycle(self, events: List[Any]):
+        """Revisa el estado del proyecto (solo registra actividad si algo cambió)"""
+        from .activity_stream import log_thinking, log_decision
+
+        # 1. Cambios en archivos desde el último ciclo
+        changes = [e for e in events if e is not None]
+        if changes:
+            log_thinking(f"Analizando estado del proyecto F3-OS ({len(changes)} cambios en archivos)...")
+
+        # 2. Verificar estado del ciclo de desarrollo
         phase_state = self.governance_core.development_cycle.get_state()
-        log_decision(f"Fase actual: {phase_state.phase.value.upper()}", 
-                    f"Entropía: {phase_state.entropy}/255, Perfección: {phase_state.perfection_score}")
-        
-        # 5. Verificar si hay conocimiento nuevo para aprender
-        # (Esto se puede expandir más adelante)
+        state = (phase_state.phase.value, phase_state.entropy, phase_state.perfection_score)
+        if state != self.last_state:
+            self.last_state = state
+            log_decision(f"Fase actual: {phase_state.phase.value.upper()}",
+                        f"Entropía: {phase_state.entropy}/255, Perfección: {phase_state.perfection_score}")
+
+    def _poll_prs(self, events: List[Any]):
+        """Detecta PRs abiertos nuevos en GitHub"""
+        if self.github is None:
+            from .github_integration import GitHubIntegration
+            try:
+                self.github = GitHubIntegration(self.config)
+            except ValueError:
+                logger.warning("⚠️  GitHub no configurado - Sondeo de PRs desactivado")
+                self.scheduler.remove_job('poll_prs')
+                return
 
+        for pr_number in self.github.get_open_prs():
+            if pr_number in self.seen_prs:
+                continue
+            pr_data = self.github.get_pr(pr_number, self.governance_core.resource_manager)
+            self.seen_prs.add(pr_number)
+            self.notify_pr(pr_data)
+
+    # ---------- Cola de tareas ----------
+
+    def _task_budget(self) -> int:
+        """Tareas simultáneas permitidas por el presupuesto de recursos"""
+        resource_manager = self.governance_core.resource_manager
+        if not resource_manager.within_limits:
+            return 0
+        return max(1, min(self.max_task_workers, resource_manager.limits.available_cores))
+
+    def _dispatch_tasks(self, events: List[Any]):
+        """Reparte tareas de la cola entre los huecos libres del presupuesto"""
+        rules_version = self.governance_core.agent_rules.version
+        if rules_version != self.rules_version:
+            self.rules_version = rules_version
+            changed = self.task_queue.reprioritize()
+            if changed:
+                logger.info(f"✅ {changed} tareas repriorizadas tras cambiar las reglas")
+
+        with self.in_flight_lock:
+            in_flight = list(self.in_flight)
+        self.task_queue.extend(in_flight, self.owner, self.lease_seconds)
+
+        budget = self._task_budget()
+        while self.running and self.task_pool is not None:
+            with self.in_flight_lock:
+                if len(self.in_flight) >= budget:
+                    break
+                task = self.task_queue.lease(self.owner, self.lease_seconds, kinds=self.handlers)
+                if task is None:
+                    break
+                self.in_flight[task.id] = task
+            self.task_pool.submit(self._run_task, task)
+
+        # Despertar cuando venza el próximo reintento diferido
+        wait = self.task_queue.next_available_in()
+        if wait:
+            self.scheduler.run_later('dispatch_tasks', wait)
+
+    def _run_task(self, task: Task):
+        from .activity_stream import log_error
+        try:
+            self.handlers[task.kind](task.payload)
+        except Exception as e:
+            status = self.task_queue.fail(task.id, self.owner, str(e) or e.__class__.__name__)
+            retry = " (se reintentará)" if status == 'pending' else ""
+            log_error(f"Tarea {task.kind} #{task.id} falló, intento {task.attempts}/{task.max_attempts}{retry}: {e}")
+        else:
+            self.task_queue.complete(task.id, self.owner)
+        finally:
+            with self.in_flight_lock:
+                self.in_flight.pop(task.id, None)
+            self.notify(EVENT_TASKS_PENDING)  # Hueco libre
+
+    def _evaluate_pr(self, pr_data: Dict):
+        """Evalúa un PR detectado (sin publicar en GitHub)"""
+        from .activity_stream import log_decision
+        evaluation = self.governance_core.evaluate_pr(pr_data)
+        decision = evaluation['decision']
+        log_decision(f"PR #{pr_data.get('number', '?')}: {decision['action'].upper()}",
+                     decision['reason'][:200])
+
+    def _learn(self, payload: Dict):
+        """Aprende un tema pendiente"""
+        from .activity_stream import log_success
+        sources = self.governance_core.internet_learner.search_and_learn(payload['query'])
+        log_success(f"Aprendido '{payload['query']}': {len(sources)} fuentes")
 
+    def _build(self, payload: Optional[Dict]):
+        result = self.governance_core.autonomous_executor.build_project(
+            (payload or {}).get('context'), force=(payload or {}).get('force', False))
+        if not result.get('success'):
+            raise RuntimeError(result.get('error') or 'Compilación fallida')
 
+    def _test(self, payload: Optional[Dict]):
+        result = self.governance_core.autonomous_executor.run_tests((payload or {}).get('context'))
+        if not result.get('success'):
+            raise RuntimeError(result.get('error') or 'Tests fallidos')
 
+    def get_stats(self) -> Dict:
+        with self.in_flight_lock:
+            in_flight = [task.to_dict() for task in self.in_flight.values()]
+        return {
+            'running': self.running,
+            'task_budget': self._task_budget(),
+            'tasks': self.task_queue.get_stats(),
+            'in_flight': in_flight,
+            'seen_prs': len(self.seen_prs),
+            **self.scheduler.get_stats(),
+        }
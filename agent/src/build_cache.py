@@ -0,0 +1,230 @@
+"""
+Build Cache - Caché incremental de compilaciones del kernel
+
+Calcula una huella (fingerprint) de las entradas de la compilación:
+- kernel/src/**, kernel/Cargo.toml, kernel/linker.ld
+- Cargo.toml y Cargo.lock de la raíz, x86_64-unknown-none.json y build.sh
+
+La huella se guarda junto a los artefactos producidos (kernel.bin) en
+agent/data/build_cache.json. Si las entradas no cambiaron y los artefactos
+siguen intactos, build_project responde al instante sin invocar cargo.
+Los archivos se rehashean solo cuando cambia su mtime/tamaño.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_VERSION = 1
+
+# Entradas de la compilación (relativas a la raíz del proyecto)
+BUILD_INPUT_DIRS = ('kernel/src',)
+BUILD_INPUT_FILES = (
+    'kernel/Cargo.toml',
+    'kernel/linker.ld',
+    'Cargo.toml',
+    'Cargo.lock',
+    'x86_64-unknown-none.json',
+    'build.sh',
+)
+
+# Artefactos que deja build.sh
+BUILD_ARTIFACTS = ('kernel.bin',)
+
+# Huellas recordadas (permite volver a una versión anterior sin recompilar)
+MAX_BUILDS = 5
+
+
+@dataclass
+class FileStamp:
+    """Hash de un archivo validado por mtime/tamaño"""
+    mtime: float
+    size: int
+    hash: str
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Huella de las entradas de compilación y artefactos de la última compilación exitosa"""
+
+    def __init__(self, project_root: Path, cache_path: Optional[Path] = None):
+        self.project_root = Path(project_root)
+        self.cache_path = cache_path or self.project_root / 'agent' / 'data' / 'build_cache.json'
+        self.stamps: Dict[str, FileStamp] = {}
+        self.builds: Dict[str, Dict] = {}  # huella -> {artifacts, built_at, duration_ms}
+        self.toolchain_ready_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+        self._load()
+
+    # ---------- Persistencia ----------
+
+    def _load(self) -> None:
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_VERSION:
+                return
+            self.stamps = {path: FileStamp(*stamp) for path, stamp in data.get('stamps', {}).items()}
+            self.builds = data.get('builds', {})
+            self.toolchain_ready_at = data.get('toolchain_ready_at')
+        except Exception as e:
+            logger.warning(f"Caché de compilación inválida, se reinicia: {e}")
+            self.stamps.clear()
+            self.builds.clear()
+
+    def save(self) -> None:
+        """Persiste la caché (escritura atómica)"""
+        with self.lock:
+            data = {
+                'version': CACHE_VERSION,
+                'stamps': {path: [s.mtime, s.size, s.hash] for path, s in self.stamps.items()},
+                'builds': self.builds,
+                'toolchain_ready_at': self.toolchain_ready_at,
+            }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            tmp_path.replace(self.cache_path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la caché de compilación: {e}")
+
+    # ---------- Huella ----------
+
+    def _input_files(self) -> List[str]:
+        files = []
+        for rel_dir in BUILD_INPUT_DIRS:
+            base = self.project_root / rel_dir
+            if base.is_dir():
+                files.extend(str(path.relative_to(self.project_root))
+                             for path in base.rglob('*') if path.is_file())
+        files.extend(rel_path for rel_path in BUILD_INPUT_FILES
+                     if (self.project_root / rel_path).is_file())
+        return sorted(files)
+
+    def _stamp(self, rel_path: str) -> Optional[FileStamp]:
+        """Hash de un archivo, reutilizado si no cambió su mtime/tamaño"""
+        path = self.project_root / rel_path
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        stamp = self.stamps.get(rel_path)
+        if stamp and stamp.mtime == stat.st_mtime and stamp.size == stat.st_size:
+            return stamp
+        try:
+            stamp = FileStamp(mtime=stat.st_mtime, size=stat.st_size, hash=_hash_file(path))
+        except OSError:
+            return None
+        self.stamps[rel_path] = stamp
+        return stamp
+
+    def compute_fingerprint(self) -> str:
+        """Huella de todas las entradas de la compilación"""
+        digest = hashlib.sha256()
+        with self.lock:
+            files = self._input_files()
+            for rel_path in files:
+                stamp = self._stamp(rel_path)
+                if stamp is not None:
+                    digest.update(f"{rel_path}\0{stamp.hash}\n".encode('utf-8'))
+            # Olvidar archivos que ya no forman parte de las entradas ni de los artefactos
+            current = set(files) | set(BUILD_ARTIFACTS)
+            for rel_path in [p for p in self.stamps if p not in current]:
+                del self.stamps[rel_path]
+        return digest.hexdigest()
+
+    # ---------- Consulta ----------
+
+    def _artifacts_intact(self, artifacts: List[Dict]) -> bool:
+        for artifact in artifacts:
+            stamp = self._stamp(artifact['path'])
+            if stamp is None or stamp.hash != artifact['hash']:
+                return False
+        return True
+
+    def lookup(self, fingerprint: str) -> Optional[Dict]:
+        """Compilación registrada para una huella (None si falta o sus artefactos cambiaron)"""
+        with self.lock:
+            build = self.builds.get(fingerprint)
+            if build and build['artifacts'] and self._artifacts_intact(build['artifacts']):
+                self.hits += 1
+                build['last_used'] = time.time()
+                return build
+            self.misses += 1
+            return None
+
+    def record(self, fingerprint: str, duration_ms: int) -> Dict:
+        """Registra una compilación exitosa con los artefactos que produjo"""
+        with self.lock:
+            artifacts = []
+            for rel_path in BUILD_ARTIFACTS:
+                stamp = self._stamp(rel_path)
+                if stamp is not None:
+                    artifacts.append({'path': rel_path, 'hash': stamp.hash, 'size': stamp.size})
+            now = time.time()
+            build = {
+                'fingerprint': fingerprint,
+                'artifacts': artifacts,
+                'built_at': now,
+                'last_used': now,
+                'duration_ms': duration_ms,
+            }
+            self.builds[fingerprint] = build
+            self.toolchain_ready_at = now
+            for old in sorted(self.builds.values(), key=lambda b: b['last_used'])[:-MAX_BUILDS]:
+                del self.builds[old['fingerprint']]
+        self.save()
+        return build
+
+    def check(self) -> Tuple[str, Optional[Dict]]:
+        """Calcula la huella actual y busca su compilación"""
+        fingerprint = self.compute_fingerprint()
+        return fingerprint, self.lookup(fingerprint)
+
+    @property
+    def toolchain_ready(self) -> bool:
+        """¿Hubo alguna compilación exitosa? (toolchain nightly ya instalada)"""
+        return self.toolchain_ready_at is not None
+
+    def reset_toolchain(self) -> None:
+        """La toolchain dejó de estar lista: la próxima compilación la reinstala"""
+        with self.lock:
+            self.toolchain_ready_at = None
+        self.save()
+
+    def invalidate(self) -> None:
+        """Olvida todas las compilaciones registradas"""
+        with self.lock:
+            self.builds.clear()
+        self.save()
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {
+                'builds': len(self.builds),
+                'tracked_files': len(self.stamps),
+                'hits': self.hits,
+                'misses': self.misses,
+                'toolchain_ready': self.toolchain_ready,
+            }
@@ -0,0 +1,444 @@
+"""
+Code Index - Índice de símbolos del código Rust del kernel F3-OS
+
+Escanea kernel/src/** con un scanner ligero basado en regex (sin compilar):
+- Definiciones: fn, struct, enum, impl, mod y static (con archivo y línea)
+- Referencias: cada identificador usado y dónde aparece
+- Persistido en agent/data/code_index.json
+- Actualización incremental por hash de contenido (solo se reescanea lo que cambió)
+
+Permite responder "¿dónde está definido X?" y "¿quién usa X?" en milisegundos
+sin recorrer el árbol en cada consulta.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_VERSION = 1
+
+# Directorio de código indexado (relativo a la raíz del proyecto)
+DEFAULT_SOURCE_DIR = 'kernel/src'
+
+_VISIBILITY = r'(?:pub(?:\s*\([^)]*\))?\s+)?'
+_FN_RE = re.compile(
+    r'^\s*' + _VISIBILITY +
+    r'(?:(?:const|async|unsafe|extern\s+"[^"]*"|extern)\s+)*fn\s+([A-Za-z_]\w*)'
+)
+_ITEM_RE = re.compile(r'^\s*' + _VISIBILITY + r'(struct|enum|mod|static)\s+(?:mut\s+)?([A-Za-z_]\w*)')
+_IMPL_RE = re.compile(
+    r'^\s*(?:unsafe\s+)?impl(?:\s*<[^{]*?>)?\s+'
+    r'(?:([A-Za-z_][\w:]*)(?:<[^{]*?>)?\s+for\s+)?([A-Za-z_][\w:]*)'
+)
+_IDENT_RE = re.compile(r'\b[A-Za-z_]\w*\b')
+_STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"')
+_CHAR_RE = re.compile(r"'(?:\\.|[^'\\])'")
+
+# Palabras clave de Rust (no se indexan como referencias)
+RUST_KEYWORDS = {
+    'as', 'async', 'await', 'break', 'const', 'continue', 'crate', 'dyn', 'else', 'enum',
+    'extern', 'false', 'fn', 'for', 'if', 'impl', 'in', 'let', 'loop', 'match', 'mod',
+    'move', 'mut', 'pub', 'ref', 'return', 'self', 'Self', 'static', 'struct', 'super',
+    'trait', 'true', 'type', 'unsafe', 'use', 'where', 'while',
+}
+
+
+@dataclass
+class Symbol:
+    """Símbolo definido en el código"""
+    name: str
+    kind: str  # 'fn', 'struct', 'enum', 'impl', 'mod', 'static'
+    path: str  # Relativo a la raíz del proyecto
+    line: int
+    signature: str
+    container: str = ""  # Tipo del impl que contiene la función (si aplica)
+
+
+@dataclass
+class FileEntry:
+    """Resultado del escaneo de un archivo"""
+    path: str
+    hash: str
+    mtime: float
+    size: int
+    symbols: List[Symbol] = field(default_factory=list)
+    references: Dict[str, List[int]] = field(default_factory=dict)  # identificador -> líneas
+
+
+def _strip_code(line: str, in_block_comment: bool) -> Tuple[str, bool]:
+    """Elimina comentarios y literales de una línea (manteniendo estado de /* */)"""
+    result = []
+    i = 0
+    while i < len(line):
+        if in_block_comment:
+            end = line.find('*/', i)
+            if end == -1:
+                return ''.join(result), True
+            i = end + 2
+            in_block_comment = False
+            continue
+        start = line.find('/*', i)
+        comment = line.find('//', i)
+        if comment != -1 and (start == -1 or comment < start):
+            result.append(line[i:comment])
+            break
+        if start == -1:
+            result.append(line[i:])
+            break
+        result.append(line[i:start])
+        i = start + 2
+        in_block_comment = True
+
+    code = ''.join(result)
+    code = _STRING_RE.sub('""', code)
+    code = _CHAR_RE.sub("''", code)
+    return code, in_block_comment
+
+
+def scan_rust(content: str, rel_path: str) -> Tuple[List[Symbol], Dict[str, List[int]]]:
+    """Escanea código Rust devolviendo (definiciones, referencias)"""
+    symbols: List[Symbol] = []
+    references: Dict[str, List[int]] = defaultdict(list)
+
+    in_block_comment = False
+    depth = 0
+    impl_stack: List[Tuple[str, int]] = []  # (tipo, profundidad de apertura)
+    pending_impl: Optional[str] = None
+
+    for line_number, raw_line in enumerate(content.splitlines(), 1):
+        code, in_block_comment = _strip_code(raw_line, in_block_comment)
+        if not code.strip():
+            continue
+
+        defined: Optional[str] = None
+        container = impl_stack[-1][0] if impl_stack else ""
+
+        match = _FN_RE.match(code)
+        if match:
+            defined = match.group(1)
+            symbols.append(Symbol(defined, 'fn', rel_path, line_number, raw_line.strip(), container))
+        else:
+            match = _ITEM_RE.match(code)
+            if match:
+                defined = match.group(2)
+                symbols.append(Symbol(defined, match.group(1), rel_path, line_number, raw_line.strip()))
+            else:
+                match = _IMPL_RE.match(code)
+                if match:
+                    target = match.group(2).split('::')[-1]
+                    symbols.append(Symbol(target, 'impl', rel_path, line_number, raw_line.strip()))
+                    pending_impl = target
+
+        for ident in _IDENT_RE.findall(code):
+            if ident in RUST_KEYWORDS or ident == defined:
+                continue
+            lines = references[ident]
+            if not lines or lines[-1] != line_number:
+                lines.append(line_number)
+
+        # Seguimiento de llaves para asociar funciones a su impl
+        for char in code:
+            if char == '{':
+                depth += 1
+                if pending_impl is not None:
+                    impl_stack.append((pending_impl, depth))
+                    pending_impl = None
+            elif char == '}':
+                if impl_stack and impl_stack[-1][1] == depth:
+                    impl_stack.pop()
+                depth = max(0, depth - 1)
+
+    return symbols, dict(references)
+
+
+class CodeIndex:
+    """Índice de símbolos y referencias del código Rust del kernel"""
+
+    def __init__(self, project_root: Path, source_dir: str = DEFAULT_SOURCE_DIR,
+                 index_path: Optional[Path] = None):
+        self.project_root = Path(project_root)
+        self.source_dir = source_dir
+        self.index_path = index_path or self.project_root / 'agent' / 'data' / 'code_index.json'
+        self.files: Dict[str, FileEntry] = {}
+        self.definitions: Dict[str, List[Symbol]] = defaultdict(list)
+        self.references: Dict[str, Dict[str, List[int]]] = defaultdict(dict)  # ident -> {archivo -> líneas}
+        self.lock = threading.RLock()
+        self._built = False
+
+    # ---------- Persistencia ----------
+
+    def _load(self) -> None:
+        """Carga el índice persistido"""
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return
+            for rel_path, entry in data.get('files', {}).items():
+                self.files[rel_path] = FileEntry(
+                    path=rel_path,
+                    hash=entry['hash'],
+                    mtime=entry['mtime'],
+                    size=entry['size'],
+                    symbols=[Symbol(**symbol) for symbol in entry['symbols']],
+                    references=entry['references'],
+                )
+        except Exception as e:
+            logger.warning(f"Índice de código inválido, se reconstruirá: {e}")
+            self.files.clear()
+
+    def save(self) -> None:
+        """Persiste el índice en disco"""
+        with self.lock:
+            data = {
+                'version': INDEX_VERSION,
+                'files': {
+                    rel_path: {
+                        'hash': entry.hash,
+                        'mtime': entry.mtime,
+                        'size': entry.size,
+                        'symbols': [asdict(symbol) for symbol in entry.symbols],
+                        'references': entry.references,
+                    }
+                    for rel_path, entry in self.files.items()
+                },
+            }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            tmp_path.replace(self.index_path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el índice de código: {e}")
+
+    # ---------- Construcción ----------
+
+    def ensure_built(self) -> None:
+        """Carga el índice persistido y lo sincroniza con el árbol actual (una vez)"""
+        if self._built:
+            return
+        with self.lock:
+            if self._built:
+                return
+            start = time.perf_counter()
+            self._load()
+            changed = self._sync()
+            self._rebuild_lookups()
+            self._built = True
+            if changed:
+                self.save()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.info(f"Índice de código listo: {len(self.files)} archivos, "
+                        f"{len(self.definitions)} símbolos, {changed} reescaneados ({elapsed_ms:.1f} ms)")
+
+    def refresh(self) -> int:
+        """Sincroniza el índice con el árbol (reescanea solo archivos con hash distinto)"""
+        with self.lock:
+            if not self._built:
+                self.ensure_built()
+                return 0
+            changed = self._sync()
+            if changed:
+                self._rebuild_lookups()
+                self.save()
+            return changed
+
+    def _discover_files(self) -> List[str]:
+        """Archivos .rs bajo el directorio de código"""
+        base = self.project_root / self.source_dir
+        found = []
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                if filename.endswith('.rs'):
+                    full_path = Path(dirpath) / filename
+                    found.append(full_path.relative_to(self.project_root).as_posix())
+        return sorted(found)
+
+    def _sync(self) -> int:
+        """Actualiza entradas de archivos nuevos, modificados o eliminados"""
+        current = set(self._discover_files())
+        changed = 0
+        for rel_path in list(self.files):
+            if rel_path not in current:
+                del self.files[rel_path]
+                changed += 1
+        for rel_path in current:
+            if self._update_entry(rel_path):
+                changed += 1
+        return changed
+
+    def _update_entry(self, rel_path: str) -> bool:
+        """Reescanea un archivo si cambió su contenido (mtime/tamaño y luego hash)"""
+        filepath = self.project_root / rel_path
+        try:
+            stat = filepath.stat()
+        except OSError:
+            return self.files.pop(rel_path, None) is not None
+
+        entry = self.files.get(rel_path)
+        if entry and entry.mtime == stat.st_mtime and entry.size == stat.st_size:
+            return False
+
+        try:
+            raw = filepath.read_bytes()
+        except OSError as e:
+            logger.warning(f"Error leyendo {rel_path}: {e}")
+            return False
+
+        digest = hashlib.sha1(raw).hexdigest()
+        if entry and entry.hash == digest:
+            # Solo cambió el mtime (touch, checkout): no reescanear
+            entry.mtime = stat.st_mtime
+            entry.size = stat.st_size
+            return False
+
+        symbols, references = scan_rust(raw.decode('utf-8', errors='replace'), rel_path)
+        self.files[rel_path] = FileEntry(
+            path=rel_path,
+            hash=digest,
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            symbols=symbols,
+            references=references,
+        )
+        return True
+
+    def _rebuild_lookups(self) -> None:
+        """Reconstruye los diccionarios de definiciones y referencias"""
+        self.definitions = defaultdict(list)
+        self.references = defaultdict(dict)
+        for rel_path, entry in self.files.items():
+            for symbol in entry.symbols:
+                self.definitions[symbol.name].append(symbol)
+            for ident, lines in entry.references.items():
+                self.references[ident][rel_path] = lines
+
+    def update_file(self, rel_path: str) -> bool:
+        """Actualiza un único archivo (p. ej. desde el FileWatcher)"""
+        if not rel_path.endswith('.rs'):
+            return False
+        with self.lock:
+            if not self._built:
+                return False
+            old_entry = self.files.get(rel_path)
+            if not self._update_entry(rel_path):
+                return False
+
+            # Quitar contribuciones antiguas y agregar las nuevas (sin reconstruir todo)
+            if old_entry:
+                for symbol in old_entry.symbols:
+                    remaining = [s for s in self.definitions.get(symbol.name, []) if s.path != rel_path]
+                    if remaining:
+                        self.definitions[symbol.name] = remaining
+                    else:
+                        self.definitions.pop(symbol.name, None)
+                for ident in old_entry.references:
+                    file_refs = self.references.get(ident)
+                    if file_refs is not None:
+                        file_refs.pop(rel_path, None)
+                        if not file_refs:
+                            del self.references[ident]
+
+            new_entry = self.files.get(rel_path)
+            if new_entry:
+                for symbol in new_entry.symbols:
+                    self.definitions[symbol.name].append(symbol)
+                for ident, lines in new_entry.references.items():
+                    self.references[ident][rel_path] = lines
+
+        self.save()
+        return True
+
+    def handle_file_event(self, event) -> None:
+        """Actualiza solo el archivo afectado por un evento del FileWatcher"""
+        self.update_file(event.path)
+
+    def attach_watcher(self, watcher) -> None:
+        """Recibe cambios de kernel/src desde un FileWatcher"""
+        watcher.subscribe(self.handle_file_event, categories=('kernel_src',))
+
+    # ---------- Consulta ----------
+
+    @traced('knowledge.code_index.find_definitions')
+    def find_definitions(self, name: str, kind: Optional[str] = None) -> List[Symbol]:
+        """¿Dónde está definido X?"""
+        self.ensure_built()
+        with self.lock:
+            symbols = list(self.definitions.get(name, ()))
+        if kind:
+            symbols = [s for s in symbols if s.kind == kind]
+        return symbols
+
+    @traced('knowledge.code_index.find_references')
+    def find_references(self, name: str) -> List[Tuple[str, int]]:
+        """¿Quién usa X? Lista de (archivo, línea)"""
+        self.ensure_built()
+        with self.lock:
+            file_refs = self.references.get(name, {})
+            return [(rel_path, line) for rel_path in sorted(file_refs) for line in file_refs[rel_path]]
+
+    def known_symbols(self, candidates: List[str]) -> List[str]:
+        """Filtra los candidatos que son símbolos definidos en el código"""
+        self.ensure_built()
+        with self.lock:
+            return [name for name in candidates if name in self.definitions]
+
+    def describe_symbol(self, name: str, max_references: int = 10) -> str:
+        """Resumen legible de definiciones y usos de un símbolo"""
+        definitions = self.find_definitions(name)
+        references = self.find_references(name)
+        if not definitions and not references:
+            return f"No se encontró `{name}` en {self.source_dir}."
+
+        lines = [f"### `{name}`"]
+        if definitions:
+            lines.append("**Definido en:**")
+            for symbol in definitions:
+                container = f" (impl {symbol.container})" if symbol.container else ""
+                lines.append(f"- {symbol.path}:{symbol.line} [{symbol.kind}]{container} `{symbol.signature}`")
+        if references:
+            lines.append(f"**Usado en ({len(references)} referencias):**")
+            for rel_path, line in references[:max_references]:
+                lines.append(f"- {rel_path}:{line}")
+            if len(references) > max_references:
+                lines.append(f"- ... y {len(references) - max_references} más")
+        return "\n".join(lines)
+
+    def get_stats(self) -> Dict:
+        """Estadísticas del índice"""
+        with self.lock:
+            return {
+                'files': len(self.files),
+                'symbols': sum(len(symbols) for symbols in self.definitions.values()),
+                'identifiers': len(self.references),
+            }
+
+
+# Índices compartidos por raíz de proyecto
+_indexes: Dict[str, CodeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(project_root: Path) -> CodeIndex:
+    """Obtiene el índice de código compartido para una raíz de proyecto"""
+    key = str(Path(project_root).resolve())
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = CodeIndex(Path(key))
+        return _indexes[key]
@@ -125,11 +125,11 @@ class ContextManager:
             size_sim = 1.0 - abs(size1 - size2) / max(size1, size2)
             similarities.append(size_sim)
         
-        # Mismo tipo de archivos
-        files1 = set(metrics1.get('files_affected', []))
-        files2 = set(metrics2.get('files_affected', []))
-        if files1 or files2:
-            file_sim = len(files1 & files2) / max(len(files1 | files2), 1)
+        # Cantidad de archivos similar (el Code Analyzer guarda un conteo)
+        files1 = metrics1.get('files_affected', 0)
+        files2 = metrics2.get('files_affected', 0)
+        if files1 > 0 and files2 > 0:
+            file_sim = 1.0 - abs(files1 - files2) / max(files1, files2)
             similarities.append(file_sim)
         
         # Mismo tipo de cambio (núcleo sagrado)
@@ -0,0 +1,86 @@
+"""
+Decision Policy - Reglas de decisión final sobre un PR
+
+Funciones puras sobre (configuración, síntesis, métricas): las usa GovernanceCore
+al evaluar un PR y el ReplayEngine al re-decidir el historial sin efectos secundarios.
+"""
+
+from typing import Dict
+
+
+def make_decision(config: Dict, synthesis: Dict, code_metrics: Dict, pr_data: Dict) -> Dict:
+    """Toma decisión final basada en síntesis"""
+    evaluation = config.get('evaluation', {})
+    recommendation = synthesis['recommendation']
+    score = synthesis['overall_score']
+    issues = synthesis['key_issues']
+
+    # Verificar límites duros (nunca se violan)
+    if violates_hard_limits(config, code_metrics, pr_data):
+        return {
+            'action': 'reject',
+            'reason': 'Violación de límites duros del modelo F3',
+            'auto': False,  # Requiere revisión humana
+        }
+
+    # Auto-aprobar si cumple criterios y está en fase apropiada
+    auto_approve = evaluation.get('auto_approve_small', False)
+    auto_threshold = evaluation.get('auto_approve_threshold', 50)
+
+    if (auto_approve and
+        code_metrics.get('total_lines', 0) < auto_threshold and
+        score >= 80 and
+        not issues and
+        not code_metrics.get('touches_sacred_core', False)):
+        return {
+            'action': 'approve',
+            'reason': 'PR pequeño, bien alineado con modelo F3',
+            'auto': True,
+        }
+
+    # Decisión basada en recomendación
+    if recommendation == 'approve':
+        return {
+            'action': 'approve',
+            'reason': synthesis['feedback'],
+            'auto': False,
+        }
+    elif recommendation == 'approve_with_caution':
+        return {
+            'action': 'approve',
+            'reason': f"Aprobado con precaución. {synthesis['feedback']}",
+            'auto': False,
+        }
+    elif recommendation == 'request_changes':
+        return {
+            'action': 'request_changes',
+            'reason': synthesis['feedback'],
+            'auto': False,
+        }
+    else:  # reject
+        return {
+            'action': 'reject',
+            'reason': synthesis['feedback'],
+            'auto': False,
+        }
+
+
+def violates_hard_limits(config: Dict, code_metrics: Dict, pr_data: Dict) -> bool:
+    """Verifica si se violan límites duros"""
+    # Límite 1: PRs que tocan núcleo sagrado sin Issue [CONCEPTUAL]
+    if code_metrics.get('touches_sacred_core', False):
+        # Verificar si hay Issue [CONCEPTUAL] relacionado
+        # TODO: Verificar en GitHub si hay Issue relacionado
+        # Por ahora, asumimos que requiere revisión humana
+        pass
+
+    # Límite 2: PRs extremadamente grandes
+    max_size = config.get('evaluation', {}).get('max_pr_size', 300)
+    if code_metrics.get('total_lines', 0) > max_size * 2:
+        return True
+
+    # Límite 3: Múltiples términos prohibidos
+    if len(code_metrics.get('forbidden_terms_found', [])) > 3:
+        return True
+
+    return False
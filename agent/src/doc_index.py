@@ -0,0 +1,458 @@
+"""
+Document Index - Índice invertido con ranking BM25 sobre la documentación de F3-OS
+
+Construye un índice invertido (con posiciones) sobre toda la documentación Markdown
+del proyecto para resolver consultas en milisegundos:
+- Documentos raíz (*.md), agent/*.md y agent/gui_web/*.md
+- Tokenizador consciente de español/inglés (acentos, stopwords, plurales)
+- Postings posicionales para extraer fragmentos relevantes
+- Actualización incremental por mtime/tamaño cuando cambian los archivos
+"""
+
+import math
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from .document_store import get_document_store
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+# Patrones de documentación indexados por defecto (relativos a la raíz del proyecto)
+DEFAULT_PATTERNS = (
+    '*.md',
+    'agent/*.md',
+    'agent/gui_web/*.md',
+)
+
+# Archivos adicionales indexados siempre (reglas del proyecto)
+DEFAULT_EXTRA_FILES = (
+    '.cursorrules',
+)
+
+# Stopwords mínimas en español e inglés (ya sin acentos)
+STOPWORDS: Set[str] = {
+    # Español
+    'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'de', 'del', 'al',
+    'y', 'o', 'u', 'e', 'a', 'en', 'por', 'para', 'con', 'sin', 'que', 'se',
+    'su', 'sus', 'es', 'son', 'lo', 'le', 'les', 'como', 'mas', 'pero', 'si',
+    'no', 'ya', 'este', 'esta', 'estos', 'estas', 'ese', 'esa', 'cual', 'cuales',
+    'quien', 'donde', 'cuando', 'muy', 'tambien', 'hay', 'ser', 'fue', 'mi', 'tu',
+    'me', 'te', 'nos',
+    # Inglés
+    'the', 'an', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'is', 'are',
+    'was', 'be', 'by', 'it', 'this', 'that', 'as', 'at', 'from', 'not', 'what',
+    'which', 'who', 'how', 'do', 'does', 'can', 'i', 'you', 'we', 'they',
+}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Parámetros BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def fold_accents(text: str) -> str:
+    """Normaliza texto a minúsculas sin acentos (síntesis -> sintesis)"""
+    if text.isascii():
+        return text.lower()
+    normalized = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in normalized if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=65536)
+def normalize_token(token: str) -> Optional[str]:
+    """Normaliza un token: sin acentos, sin stopwords y con plural simple recortado"""
+    token = fold_accents(token)
+    if len(token) < 2 or token in STOPWORDS:
+        return None
+    # Plurales simples (reglas -> regla, rules -> rule, fases -> fase)
+    if len(token) > 4 and token.endswith('s') and not token.endswith('ss'):
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[Tuple[str, int]]:
+    """Tokeniza texto devolviendo (término normalizado, offset de carácter)"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text):
+        term = normalize_token(match.group())
+        if term:
+            tokens.append((term, match.start()))
+    return tokens
+
+
+def query_terms(query: str) -> List[str]:
+    """Términos únicos de una consulta, en orden de aparición"""
+    seen = []
+    for term, _ in tokenize(query):
+        if term not in seen:
+            seen.append(term)
+    return seen
+
+
+@dataclass
+class IndexedDocument:
+    """Documento indexado"""
+    path: str  # Relativo a la raíz del proyecto
+    mtime: float
+    size: int
+    length: int  # Número de tokens
+    text: str
+    offsets: array = field(default_factory=lambda: array('I'))  # posición -> offset de carácter
+
+
+@dataclass
+class SearchResult:
+    """Resultado de búsqueda rankeado"""
+    path: str
+    score: float
+    snippets: List[str] = field(default_factory=list)
+    matched_terms: List[str] = field(default_factory=list)
+
+
+class DocumentIndex:
+    """Índice invertido posicional con ranking BM25"""
+
+    def __init__(self, project_root: Path, patterns: Iterable[str] = DEFAULT_PATTERNS,
+                 extra_files: Iterable[str] = DEFAULT_EXTRA_FILES, refresh_interval: float = 2.0):
+        self.project_root = Path(project_root)
+        self.patterns = tuple(patterns)
+        self.extra_files = tuple(extra_files)
+        self.refresh_interval = refresh_interval
+        self.watcher = None  # FileWatcher que reemplaza al sondeo mientras está activo
+        self.document_store = get_document_store(self.project_root)
+
+        self.documents: Dict[str, IndexedDocument] = {}
+        # término -> {documento -> posiciones}
+        self.postings: Dict[str, Dict[str, array]] = defaultdict(dict)
+        self.total_length = 0
+
+        self.lock = threading.RLock()
+        self._built = False
+        self._last_refresh = 0.0
+
+    # ---------- Construcción y actualización ----------
+
+    def discover_files(self) -> List[str]:
+        """Descubre los archivos a indexar (rutas relativas)"""
+        found = set()
+        for pattern in self.patterns:
+            for path in self.project_root.glob(pattern):
+                if path.is_file():
+                    found.add(path.relative_to(self.project_root).as_posix())
+        for filename in self.extra_files:
+            if (self.project_root / filename).is_file():
+                found.add(filename)
+        return sorted(found)
+
+    def build(self) -> None:
+        """Construye el índice completo"""
+        start = time.perf_counter()
+        with self.lock:
+            self.documents.clear()
+            self.postings.clear()
+            self.total_length = 0
+            for rel_path in self.discover_files():
+                self._index_file(rel_path)
+            self._built = True
+            self._last_refresh = time.monotonic()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Índice de documentación construido: {len(self.documents)} documentos, "
+                    f"{len(self.postings)} términos ({elapsed_ms:.1f} ms)")
+
+    def ensure_built(self) -> None:
+        """Construye el índice si aún no existe"""
+        if not self._built:
+            self.build()
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """Reindexa incrementalmente los archivos nuevos, modificados o eliminados
+
+        Returns:
+            Lista de rutas que cambiaron
+        """
+        if not self._built:
+            self.build()
+            return []
+
+        now = time.monotonic()
+        if not force and (self._watched() or now - self._last_refresh < self.refresh_interval):
+            return []
+
+        changed = []
+        with self.lock:
+            self._last_refresh = now
+            current = set(self.discover_files())
+
+            for rel_path in list(self.documents):
+                if rel_path not in current:
+                    self._remove_document(rel_path)
+                    changed.append(rel_path)
+
+            for rel_path in current:
+                if self.update_file(rel_path):
+                    changed.append(rel_path)
+
+        if changed:
+            logger.debug(f"Índice actualizado: {changed}")
+        return changed
+
+    def update_file(self, rel_path: str) -> bool:
+        """Reindexa un archivo si cambió su mtime o tamaño
+
+        Returns:
+            True si el índice cambió
+        """
+        filepath = self.project_root / rel_path
+        with self.lock:
+            existing = self.documents.get(rel_path)
+            if not filepath.is_file():
+                if existing:
+                    self._remove_document(rel_path)
+                    return True
+                return False
+
+            stat = filepath.stat()
+            if existing and existing.mtime == stat.st_mtime and existing.size == stat.st_size:
+                return False
+
+            if existing:
+                self._remove_document(rel_path)
+            return self._index_file(rel_path)
+
+    def remove_file(self, rel_path: str) -> bool:
+        """Elimina un archivo del índice"""
+        with self.lock:
+            if rel_path in self.documents:
+                self._remove_document(rel_path)
+                return True
+            return False
+
+    def handle_file_event(self, event) -> None:
+        """Reindexa solo el archivo afectado por un evento del FileWatcher"""
+        if event.kind == 'deleted':
+            self.remove_file(event.path)
+        elif self._built:
+            self.update_file(event.path)
+
+    def attach_watcher(self, watcher) -> None:
+        """Delega la detección de cambios en un FileWatcher
+
+        El sondeo por mtime solo se omite mientras el watcher está en marcha
+        (se suscribe siempre, pero solo gui-server llama a start_file_watcher).
+        """
+        watcher.subscribe(self.handle_file_event, categories=('docs', 'rules'))
+        self.watcher = watcher
+
+    def _watched(self) -> bool:
+        return self.watcher is not None and self.watcher.running
+
+    def _index_file(self, rel_path: str) -> bool:
+        """Lee (vía DocumentStore) e indexa un archivo"""
+        document = self.document_store.get_document(rel_path, revalidate=True)
+        if document is None:
+            logger.warning(f"Error indexando {rel_path}")
+            return False
+
+        self._add_document(rel_path, document.content, document.mtime, document.size)
+        return True
+
+    def _add_document(self, rel_path: str, text: str, mtime: float, size: int) -> None:
+        """Agrega un documento al índice"""
+        tokens = tokenize(text)
+        offsets = array('I', (offset for _, offset in tokens))
+
+        positions: Dict[str, array] = defaultdict(lambda: array('I'))
+        for position, (term, _) in enumerate(tokens):
+            positions[term].append(position)
+
+        for term, term_positions in positions.items():
+            self.postings[term][rel_path] = term_positions
+
+        self.documents[rel_path] = IndexedDocument(
+            path=rel_path,
+            mtime=mtime,
+            size=size,
+            length=len(tokens),
+            text=text,
+            offsets=offsets,
+        )
+        self.total_length += len(tokens)
+
+    def _remove_document(self, rel_path: str) -> None:
+        """Elimina un documento y sus postings"""
+        document = self.documents.pop(rel_path, None)
+        if document is None:
+            return
+        self.total_length -= document.length
+
+        for term in {term for term, _ in tokenize(document.text)}:
+            doc_postings = self.postings.get(term)
+            if doc_postings is None:
+                continue
+            doc_postings.pop(rel_path, None)
+            if not doc_postings:
+                del self.postings[term]
+
+    # ---------- Consulta ----------
+
+    @traced('knowledge.doc_index.search')
+    def search(self, query: str, limit: int = 5, paths: Optional[Iterable[str]] = None,
+               max_snippets: int = 1, context_lines: int = 2) -> List[SearchResult]:
+        """Busca documentos rankeados por BM25
+
+        Args:
+            query: Consulta en texto libre
+            limit: Máximo de documentos a devolver
+            paths: Restringir la búsqueda a estas rutas relativas
+            max_snippets: Fragmentos por documento
+            context_lines: Líneas de contexto alrededor de cada fragmento
+        """
+        self.refresh()
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        allowed = set(paths) if paths is not None else None
+
+        with self.lock:
+            n_docs = len(self.documents)
+            if n_docs == 0:
+                return []
+            avg_length = self.total_length / n_docs
+
+            scores: Dict[str, float] = defaultdict(float)
+            matched: Dict[str, List[str]] = defaultdict(list)
+
+            for term in terms:
+                doc_postings = self.postings.get(term)
+                if not doc_postings:
+                    continue
+                df = len(doc_postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+                for rel_path, term_positions in doc_postings.items():
+                    if allowed is not None and rel_path not in allowed:
+                        continue
+                    tf = len(term_positions)
+                    length = self.documents[rel_path].length
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[rel_path] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    matched[rel_path].append(term)
+
+            # Bonus por proximidad: términos consecutivos de la consulta adyacentes en el texto
+            if len(terms) > 1:
+                for rel_path in scores:
+                    scores[rel_path] *= 1 + 0.25 * self._adjacent_pairs(rel_path, terms)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+            return [
+                SearchResult(
+                    path=rel_path,
+                    score=score,
+                    snippets=self._extract_snippets(rel_path, matched[rel_path],
+                                                    max_snippets, context_lines),
+                    matched_terms=matched[rel_path],
+                )
+                for rel_path, score in ranked
+            ]
+
+    def _adjacent_pairs(self, rel_path: str, terms: List[str]) -> int:
+        """Cuenta pares de términos consecutivos de la consulta que aparecen adyacentes"""
+        count = 0
+        for first, second in zip(terms, terms[1:]):
+            first_positions = self.postings.get(first, {}).get(rel_path)
+            second_positions = self.postings.get(second, {}).get(rel_path)
+            if not first_positions or not second_positions:
+                continue
+            following = set(second_positions)
+            if any(p + 1 in following for p in first_positions):
+                count += 1
+        return count
+
+    def _extract_snippets(self, rel_path: str, terms: List[str], max_snippets: int,
+                          context_lines: int) -> List[str]:
+        """Extrae fragmentos alrededor de las zonas con más términos coincidentes"""
+        document = self.documents[rel_path]
+        hits = sorted(
+            position
+            for term in terms
+            for position in self.postings.get(term, {}).get(rel_path, ())
+        )
+        if not hits:
+            return []
+
+        # Ventanas de ~30 tokens, priorizando las de mayor densidad de coincidencias
+        window = 30
+        candidates = []
+        for i, start in enumerate(hits):
+            j = i
+            while j < len(hits) and hits[j] - start <= window:
+                j += 1
+            candidates.append((j - i, -start, start))
+        candidates.sort(reverse=True)
+
+        text = document.text
+        snippets = []
+        used_lines: Set[int] = set()
+        for _, _, position in candidates:
+            if len(snippets) >= max_snippets:
+                break
+            offset = document.offsets[position]
+            line_number = text.count('\n', 0, offset)
+            if line_number in used_lines:
+                continue
+
+            start = text.rfind('\n', 0, offset) + 1
+            for _ in range(context_lines):
+                if start == 0:
+                    break
+                start = text.rfind('\n', 0, start - 1) + 1
+            end = text.find('\n', offset)
+            end = len(text) if end == -1 else end
+            for _ in range(context_lines):
+                if end >= len(text):
+                    break
+                next_end = text.find('\n', end + 1)
+                end = len(text) if next_end == -1 else next_end
+
+            used_lines.update(range(line_number - context_lines, line_number + context_lines + 1))
+            snippets.append(text[start:end].strip('\n'))
+
+        return snippets
+
+    def get_stats(self) -> Dict:
+        """Estadísticas del índice"""
+        with self.lock:
+            return {
+                'documents': len(self.documents),
+                'terms': len(self.postings),
+                'tokens': self.total_length,
+            }
+
+
+# Índices compartidos por raíz de proyecto
+_indexes: Dict[str, DocumentIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_document_index(project_root: Path) -> DocumentIndex:
+    """Obtiene el índice compartido para una raíz de proyecto"""
+    key = str(Path(project_root).resolve())
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = DocumentIndex(Path(key))
+        return _indexes[key]
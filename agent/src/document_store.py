@@ -0,0 +1,147 @@
+"""
+Document Store - Almacén compartido de documentos del proyecto F3-OS
+
+Carga los archivos del proyecto bajo demanda y los mantiene frescos:
+- Lectura perezosa (solo en el primer acceso)
+- Revalidación por mtime/tamaño (los cambios se ven sin reiniciar)
+- Una única copia del texto compartida por todos los consumidores
+  (ProjectAnalyzer, ProjectKnowledgeBase, DocumentIndex)
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredDocument:
+    """Documento cargado en el almacén"""
+    path: str  # Relativo a la raíz del proyecto
+    content: str
+    mtime: float
+    size: int
+    checked_at: float  # Última revalidación (time.monotonic)
+
+    @property
+    def version(self) -> Tuple[float, int]:
+        """Versión del documento (mtime, tamaño)"""
+        return (self.mtime, self.size)
+
+
+class DocumentStore:
+    """Almacén de documentos con carga perezosa y revalidación por mtime/tamaño"""
+
+    def __init__(self, project_root: Path, revalidate_interval: float = 1.0):
+        self.project_root = Path(project_root)
+        self.revalidate_interval = revalidate_interval
+        self.documents: Dict[str, StoredDocument] = {}
+        self.lock = threading.RLock()
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, rel_path: str) -> Optional[str]:
+        """Obtiene el contenido de un archivo (None si no existe o no se puede leer)"""
+        document = self.get_document(rel_path)
+        return document.content if document else None
+
+    def get_version(self, rel_path: str) -> Optional[Tuple[float, int]]:
+        """Obtiene la versión (mtime, tamaño) actual de un archivo"""
+        document = self.get_document(rel_path)
+        return document.version if document else None
+
+    def signature(self, rel_paths: Iterable[str]) -> Tuple:
+        """Firma combinada de varios archivos (cambia si alguno cambia)"""
+        return tuple((rel_path, self.get_version(rel_path)) for rel_path in rel_paths)
+
+    def invalidate(self, rel_path: Optional[str] = None) -> None:
+        """Invalida un archivo (o todo el almacén) para forzar su relectura"""
+        with self.lock:
+            if rel_path is None:
+                self.documents.clear()
+            else:
+                self.documents.pop(rel_path, None)
+
+    def handle_file_event(self, event) -> None:
+        """Invalida el documento afectado por un evento del FileWatcher"""
+        self.invalidate(event.path)
+
+    def attach_watcher(self, watcher) -> None:
+        """Recibe invalidaciones de un FileWatcher"""
+        watcher.subscribe(self.handle_file_event, categories=('docs', 'rules', 'config'))
+
+    def get_document(self, rel_path: str, revalidate: bool = False) -> Optional[StoredDocument]:
+        """Obtiene un documento revalidándolo si es necesario
+
+        Args:
+            rel_path: Ruta relativa a la raíz del proyecto
+            revalidate: Forzar la comprobación de mtime/tamaño aunque sea reciente
+        """
+        now = time.monotonic()
+        with self.lock:
+            document = self.documents.get(rel_path)
+            if (document and not revalidate and
+                    now - document.checked_at < self.revalidate_interval):
+                self.hits += 1
+                return document
+
+            filepath = self.project_root / rel_path
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                if document:
+                    del self.documents[rel_path]
+                return None
+
+            if document and document.mtime == stat.st_mtime and document.size == stat.st_size:
+                document.checked_at = now
+                self.hits += 1
+                return document
+
+            try:
+                with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+            except OSError as e:
+                logger.error(f"Error leyendo {rel_path}: {e}")
+                return None
+
+            document = StoredDocument(
+                path=rel_path,
+                content=content,
+                mtime=stat.st_mtime,
+                size=stat.st_size,
+                checked_at=now,
+            )
+            self.documents[rel_path] = document
+            self.loads += 1
+            logger.debug(f"Documento cargado: {rel_path} ({stat.st_size} bytes)")
+            return document
+
+    def get_stats(self) -> Dict:
+        """Estadísticas del almacén"""
+        with self.lock:
+            return {
+                'documents': len(self.documents),
+                'bytes': sum(d.size for d in self.documents.values()),
+                'loads': self.loads,
+                'hits': self.hits,
+            }
+
+
+# Almacenes compartidos por raíz de proyecto
+_stores: Dict[str, DocumentStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_document_store(project_root: Path) -> DocumentStore:
+    """Obtiene el almacén compartido para una raíz de proyecto"""
+    key = str(Path(project_root).resolve())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = DocumentStore(Path(key))
+        return _stores[key]
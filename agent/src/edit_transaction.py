@@ -0,0 +1,197 @@
+"""
+Edit Transaction - Ediciones multi-archivo atómicas
+
+Aplica un lote de creaciones y modificaciones de archivos como una transacción:
+- Todo el contenido nuevo se calcula en memoria antes de tocar el disco
+- Cada archivo se escribe en un temporal del mismo directorio y se renombra encima
+- Si algo falla, los archivos ya reemplazados se restauran y los nuevos se borran
+
+El árbol nunca queda a medio escribir.
+"""
+
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _current_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Permisos de un archivo nuevo (como open()); mkstemp crea los temporales con 0600
+NEW_FILE_MODE = 0o666 & ~_current_umask()
+
+
+class EditError(Exception):
+    """Error al preparar o aplicar un lote de ediciones"""
+
+
+def apply_modifications(content: str, modifications: List[Dict]) -> str:
+    """Aplica modificaciones a un texto
+
+    modifications: Lista de modificaciones
+    [
+        {'type': 'replace', 'old': 'old_text', 'new': 'new_text'},
+        {'type': 'insert', 'after': 'marker', 'content': 'new_content'},
+        {'type': 'delete', 'text': 'text_to_delete'}
+    ]
+    """
+    for mod in modifications:
+        if mod['type'] == 'replace':
+            content = content.replace(mod['old'], mod['new'])
+        elif mod['type'] == 'insert':
+            marker = mod.get('after', '')
+            if marker in content:
+                content = content.replace(marker, marker + '\n' + mod['content'])
+            else:
+                content += '\n' + mod['content']
+        elif mod['type'] == 'delete':
+            content = content.replace(mod['text'], '')
+    return content
+
+
+def atomic_write(path: Path, content: str) -> None:
+    """Escribe un archivo mediante temporal + rename (conserva los permisos; los nuevos siguen la umask)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        mode = path.stat().st_mode & 0o7777 if path.exists() else NEW_FILE_MODE
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+@dataclass
+class StagedFile:
+    """Archivo preparado dentro de una transacción"""
+    path: str  # Relativo a la raíz del proyecto
+    content: str
+    created: bool  # No existía antes de la transacción
+    operations: int = 0  # Ediciones del lote que lo afectan
+    original: Optional[bytes] = None  # Contenido previo (para restaurar)
+    mode: Optional[int] = None
+
+
+@dataclass
+class EditTransaction:
+    """Lote de ediciones que se aplica entero o no se aplica"""
+    project_root: Path
+    staged: Dict[str, StagedFile] = field(default_factory=dict)
+
+    def _current(self, rel_path: str) -> Optional[str]:
+        """Contenido visible dentro de la transacción (preparado o en disco)"""
+        if rel_path in self.staged:
+            return self.staged[rel_path].content
+        full_path = self.project_root / rel_path
+        if not full_path.exists():
+            return None
+        return full_path.read_text(encoding='utf-8')
+
+    def _stage(self, rel_path: str, content: str) -> StagedFile:
+        staged = self.staged.get(rel_path)
+        if staged is None:
+            full_path = self.project_root / rel_path
+            exists = full_path.exists()
+            staged = StagedFile(
+                path=rel_path,
+                content=content,
+                created=not exists,
+                original=full_path.read_bytes() if exists else None,
+                mode=full_path.stat().st_mode & 0o7777 if exists else None,
+            )
+            self.staged[rel_path] = staged
+        staged.content = content
+        staged.operations += 1
+        return staged
+
+    def create(self, rel_path: str, content: str) -> StagedFile:
+        """Prepara la creación (o sobrescritura) de un archivo"""
+        return self._stage(rel_path, content)
+
+    def modify(self, rel_path: str, modifications: List[Dict]) -> StagedFile:
+        """Prepara modificaciones sobre un archivo existente (o ya preparado)"""
+        content = self._current(rel_path)
+        if content is None:
+            raise EditError(f'Archivo no existe: {rel_path}')
+        return self._stage(rel_path, apply_modifications(content, modifications))
+
+    @property
+    def paths(self) -> List[str]:
+        return list(self.staged)
+
+    def commit(self) -> None:
+        """Escribe todos los archivos; ante cualquier error deshace lo aplicado"""
+        temps: Dict[str, str] = {}
+        created_dirs: List[Path] = []
+        applied: List[StagedFile] = []
+        try:
+            # 1. Escribir todos los temporales (el árbol aún no cambió)
+            for staged in self.staged.values():
+                full_path = self.project_root / staged.path
+                missing = []
+                parent = full_path.parent
+                while not parent.exists():
+                    missing.append(parent)
+                    parent = parent.parent
+                full_path.parent.mkdir(parents=True, exist_ok=True)
+                created_dirs.extend(reversed(missing))
+
+                fd, tmp_name = tempfile.mkstemp(dir=full_path.parent, prefix=f'.{full_path.name}.',
+                                                suffix='.tmp')
+                temps[staged.path] = tmp_name
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(staged.content)
+                os.chmod(tmp_name, staged.mode if staged.mode is not None else NEW_FILE_MODE)
+
+            # 2. Renombrar encima de los destinos
+            for staged in self.staged.values():
+                os.replace(temps[staged.path], self.project_root / staged.path)
+                del temps[staged.path]
+                applied.append(staged)
+        except BaseException:
+            self._rollback(applied, temps, created_dirs)
+            raise
+
+    def _rollback(self, applied: List[StagedFile], temps: Dict[str, str],
+                  created_dirs: List[Path]) -> None:
+        """Restaura los archivos reemplazados y borra temporales, nuevos y directorios creados"""
+        for tmp_name in temps.values():
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+        for staged in reversed(applied):
+            full_path = self.project_root / staged.path
+            try:
+                if staged.created:
+                    full_path.unlink()
+                else:
+                    fd, tmp_name = tempfile.mkstemp(dir=full_path.parent, prefix=f'.{full_path.name}.',
+                                                    suffix='.tmp')
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(staged.original)
+                    if staged.mode is not None:
+                        os.chmod(tmp_name, staged.mode)
+                    os.replace(tmp_name, full_path)
+            except OSError as e:
+                logger.error(f"❌ No se pudo restaurar {staged.path}: {e}")
+        for directory in reversed(created_dirs):
+            try:
+                directory.rmdir()
+            except OSError:
+                pass
+        logger.warning(f"↩️  Transacción de edición revertida ({len(applied)} archivos restaurados)")
@@ -0,0 +1,287 @@
+"""
+Execution Log - Registro de ejecuciones en JSON Lines con rotación
+
+Historial de ejecuciones del agente de solo-añadir y con coste constante:
+- Cada ejecución es una línea JSON añadida a agent/data/execution_log/current.jsonl
+- Al superar el tamaño máximo el segmento se rota (y opcionalmente se comprime con gzip)
+- Solo se conservan los últimos N segmentos
+- index.json guarda los segmentos rotados con su número de líneas y rango de fechas
+- tail(limit) lee desde el final: el segmento activo hacia atrás por bloques y
+  solo los segmentos rotados necesarios
+"""
+
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_VERSION = 1
+
+ACTIVE_NAME = 'current.jsonl'
+
+# Tamaño de bloque para leer el segmento activo desde el final
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def _read_tail_lines(path: Path, count: int) -> List[bytes]:
+    """Últimas `count` líneas (count > 0) de un archivo, leyendo bloques desde el final"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b''
+            while position > 0 and data.count(b'\n') <= count:
+                step = min(TAIL_BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+    except OSError:
+        return []
+    lines = [line for line in data.split(b'\n') if line.strip()]
+    if position > 0:
+        lines = lines[1:]  # La primera puede estar cortada
+    return lines[-count:]
+
+
+class ExecutionLog:
+    """Historial de ejecuciones persistente, rotado por tamaño"""
+
+    def __init__(self, log_dir: Path, max_segment_bytes: int = 5 * 1024 * 1024,
+                 max_segments: int = 10, compress: bool = True):
+        self.log_dir = Path(log_dir)
+        self.active_path = self.log_dir / ACTIVE_NAME
+        self.index_path = self.log_dir / 'index.json'
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segments = max(1, max_segments)
+        self.compress = compress
+        self.segments: List[Dict] = []  # Del más antiguo al más reciente
+        self.next_segment = 1
+        self.active_lines = 0
+        self.active_first: Optional[str] = None
+        self.active_last: Optional[str] = None
+        self.active_size = 0
+        self.handle = None
+        self.lock = threading.Lock()
+        self._load()
+
+    # ---------- Índice ----------
+
+    def _load(self) -> None:
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == INDEX_VERSION:
+                    self.segments = [s for s in data.get('segments', [])
+                                     if (self.log_dir / s['name']).exists()]
+                    self.next_segment = data.get('next_segment', 1)
+            except Exception as e:
+                logger.warning(f"Índice del log de ejecuciones inválido, se reconstruye: {e}")
+                self.segments = []
+        if not self.segments:
+            self._rebuild_segments()
+
+        # Estado del segmento activo (acotado por max_segment_bytes)
+        if self.active_path.exists():
+            self.active_size = self.active_path.stat().st_size
+            with open(self.active_path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    self.active_lines += 1
+                    timestamp = self._timestamp(line)
+                    self.active_first = self.active_first or timestamp
+                    self.active_last = timestamp or self.active_last
+
+    def _rebuild_segments(self) -> None:
+        """Reconstruye el índice a partir de los segmentos presentes en disco"""
+        found = sorted(path for path in self.log_dir.glob('segment-*')
+                       if path.name.endswith(('.jsonl', '.jsonl.gz'))) if self.log_dir.exists() else []
+        for path in found:
+            lines = self._read_segment(path.name)
+            self.segments.append({
+                'name': path.name,
+                'lines': len(lines),
+                'first': self._timestamp(lines[0]) if lines else None,
+                'last': self._timestamp(lines[-1]) if lines else None,
+            })
+            number = int(path.name.split('-')[1].split('.')[0])
+            self.next_segment = max(self.next_segment, number + 1)
+
+    def _save_index(self) -> None:
+        data = {
+            'version': INDEX_VERSION,
+            'next_segment': self.next_segment,
+            'segments': self.segments,
+        }
+        try:
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            tmp_path.replace(self.index_path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el índice del log de ejecuciones: {e}")
+
+    @staticmethod
+    def _timestamp(line: bytes) -> Optional[str]:
+        try:
+            return json.loads(line).get('timestamp')
+        except ValueError:
+            return None
+
+    # ---------- Escritura ----------
+
+    def append(self, record: Dict) -> None:
+        """Añade una ejecución (una línea JSON)"""
+        self.extend([record])
+
+    def extend(self, records: List[Dict]) -> None:
+        """Añade varios registros con una sola escritura (la rotación se comprueba al final)"""
+        if not records:
+            return
+        data = b''.join((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8') for record in records)
+        with self.lock:
+            try:
+                if self.handle is None:
+                    self.log_dir.mkdir(parents=True, exist_ok=True)
+                    self.handle = open(self.active_path, 'ab')
+                self.handle.write(data)
+                self.handle.flush()
+            except OSError as e:
+                logger.warning(f"No se pudo escribir en el log de ejecuciones: {e}")
+                return
+            self.active_size += len(data)
+            self.active_lines += len(records)
+            self.active_first = self.active_first or records[0].get('timestamp')
+            self.active_last = records[-1].get('timestamp') or self.active_last
+            if self.active_size >= self.max_segment_bytes:
+                self._rotate()
+
+    def _rotate(self) -> None:
+        """Cierra el segmento activo, lo archiva (comprimido) y purga los antiguos"""
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+        name = f"segment-{self.next_segment:06d}.jsonl"
+        try:
+            if self.compress:
+                name += '.gz'
+                tmp_path = self.log_dir / (name + '.tmp')
+                with open(self.active_path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+                    for block in iter(lambda: src.read(1024 * 1024), b''):
+                        dst.write(block)
+                tmp_path.replace(self.log_dir / name)
+                self.active_path.unlink()
+            else:
+                self.active_path.replace(self.log_dir / name)
+        except OSError as e:
+            logger.warning(f"No se pudo rotar el log de ejecuciones: {e}")
+            return
+
+        self.segments.append({
+            'name': name,
+            'lines': self.active_lines,
+            'first': self.active_first,
+            'last': self.active_last,
+        })
+        self.next_segment += 1
+        self.active_size = 0
+        self.active_lines = 0
+        self.active_first = self.active_last = None
+
+        while len(self.segments) > self.max_segments:
+            old = self.segments.pop(0)
+            try:
+                (self.log_dir / old['name']).unlink()
+            except OSError:
+                pass
+        self._save_index()
+        logger.debug(f"Log de ejecuciones rotado: {name}")
+
+    def flush(self) -> None:
+        """Fuerza la escritura a disco del segmento activo"""
+        with self.lock:
+            if self.handle is not None:
+                self.handle.flush()
+                os.fsync(self.handle.fileno())
+
+    def close(self) -> None:
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+
+    # ---------- Lectura ----------
+
+    def _read_segment(self, name: str) -> List[bytes]:
+        path = self.log_dir / name
+        try:
+            opener = gzip.open if name.endswith('.gz') else open
+            with opener(path, 'rb') as f:
+                return [line for line in f.read().split(b'\n') if line.strip()]
+        except OSError as e:
+            logger.warning(f"Segmento ilegible del log de ejecuciones {name}: {e}")
+            return []
+
+    @staticmethod
+    def _decode(lines: List[bytes]) -> List[Dict]:
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+    def tail(self, limit: Optional[int] = None) -> List[Dict]:
+        """Últimas `limit` ejecuciones (todas si limit es None o 0), de la más antigua a la más reciente"""
+        if not limit:
+            limit = None
+        with self.lock:
+            if self.handle is not None:
+                self.handle.flush()
+            segments = list(self.segments)
+            active_lines = self.active_lines
+
+        if limit is not None and limit <= active_lines:
+            return self._decode(_read_tail_lines(self.active_path, limit))
+
+        # Segmentos rotados necesarios (del más reciente hacia atrás, según el índice)
+        needed: List[Dict] = []
+        remaining = None if limit is None else limit - active_lines
+        for segment in reversed(segments):
+            if remaining is not None and remaining <= 0:
+                break
+            needed.append(segment)
+            if remaining is not None:
+                remaining -= segment['lines']
+
+        lines: List[bytes] = []
+        for segment in reversed(needed):
+            lines.extend(self._read_segment(segment['name']))
+        if active_lines:
+            lines.extend(self._read_segment(ACTIVE_NAME))
+        if limit is not None:
+            lines = lines[-limit:]
+        return self._decode(lines)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.active_lines + sum(s['lines'] for s in self.segments)
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {
+                'records': self.active_lines + sum(s['lines'] for s in self.segments),
+                'segments': len(self.segments),
+                'active_bytes': self.active_size,
+                'first': self.segments[0]['first'] if self.segments else self.active_first,
+                'last': self.active_last or (self.segments[-1]['last'] if self.segments else None),
+            }
@@ -0,0 +1,381 @@
+"""
+File Watcher - Vigilancia de archivos del proyecto F3-OS
+
+Publica eventos de cambio para que el conocimiento del agente se refresque
+de forma incremental, sin reinicios ni recargas completas:
+- Documentación (*.md, agent/*.md, agent/gui_web/*.md)
+- Reglas del proyecto (.cursorrules)
+- Configuración del agente (agent/config/*.yaml)
+- Código del kernel (kernel/src/**)
+
+Backends (solo biblioteca estándar):
+- inotify (Linux, vía ctypes): despierta solo cuando algo cambia
+- Poller por snapshots de mtime/tamaño: fallback portable
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WatchSpec:
+    """Qué vigilar: archivos de un directorio que cumplen un patrón"""
+    category: str  # 'docs', 'rules', 'config', 'agent_rules', 'kernel_src'
+    directory: str  # Relativo a la raíz del proyecto ('' = raíz)
+    pattern: str
+    recursive: bool = False
+
+
+# Archivos vigilados por defecto
+DEFAULT_WATCH_SPECS = (
+    WatchSpec('docs', '', '*.md'),
+    WatchSpec('docs', 'agent', '*.md'),
+    WatchSpec('docs', 'agent/gui_web', '*.md'),
+    WatchSpec('rules', '', '.cursorrules'),
+    WatchSpec('config', 'agent/config', '*.yaml'),
+    WatchSpec('agent_rules', 'agent/config/rules', '*.yaml'),
+    WatchSpec('kernel_src', 'kernel/src', '*', recursive=True),
+)
+
+
+@dataclass
+class FileChangeEvent:
+    """Evento de cambio de un archivo vigilado"""
+    path: str  # Relativo a la raíz del proyecto
+    kind: str  # 'created', 'modified', 'deleted'
+    category: str
+    timestamp: float
+
+
+Snapshot = Dict[str, Tuple[float, int]]  # ruta relativa -> (mtime, tamaño)
+
+
+class FileWatcher:
+    """Vigila archivos del proyecto y publica eventos de cambio"""
+
+    def __init__(self, project_root: Path, config: Optional[dict] = None,
+                 specs: Iterable[WatchSpec] = DEFAULT_WATCH_SPECS):
+        self.project_root = Path(project_root)
+        watcher_config = (config or {}).get('file_watcher', {})
+        self.enabled = watcher_config.get('enabled', True)
+        self.backend_name = watcher_config.get('backend', 'auto')
+        self.poll_interval = watcher_config.get('poll_interval', 2.0)
+        self.debounce = watcher_config.get('debounce', 0.05)
+        self.specs = tuple(specs)
+
+        self.subscribers: List[Tuple[Callable[[FileChangeEvent], None], Optional[Set[str]]]] = []
+        self.lock = threading.Lock()
+        self.snapshot: Snapshot = {}
+        self.running = False
+        self.backend: Optional[str] = None
+        self.watcher_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.events_published = 0
+
+    # ---------- Suscripción ----------
+
+    def subscribe(self, callback: Callable[[FileChangeEvent], None],
+                  categories: Optional[Iterable[str]] = None) -> None:
+        """Suscribe un callback a eventos (opcionalmente solo de ciertas categorías)"""
+        with self.lock:
+            self.subscribers.append((callback, set(categories) if categories else None))
+
+    def unsubscribe(self, callback: Callable[[FileChangeEvent], None]) -> None:
+        """Desuscribe un callback"""
+        with self.lock:
+            self.subscribers = [(cb, cats) for cb, cats in self.subscribers if cb != callback]
+
+    def _publish(self, events: List[FileChangeEvent]) -> None:
+        """Entrega eventos a los suscriptores interesados"""
+        if not events:
+            return
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for event in events:
+            logger.debug(f"Cambio detectado: {event.kind} {event.path} ({event.category})")
+            for callback, categories in subscribers:
+                if categories is not None and event.category not in categories:
+                    continue
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.error(f"Error procesando cambio de {event.path}: {e}")
+        self.events_published += len(events)
+
+    # ---------- Ciclo de vida ----------
+
+    def start(self) -> None:
+        """Inicia la vigilancia en segundo plano"""
+        if self.running or not self.enabled:
+            return
+
+        self.snapshot = self._scan_all()
+        self._stop_event.clear()
+        self.running = True
+
+        inotify = None
+        if self.backend_name in ('auto', 'inotify'):
+            inotify = _Inotify.create()
+        if inotify is not None:
+            self.backend = 'inotify'
+            target = lambda: self._run_inotify(inotify)
+        else:
+            self.backend = 'poll'
+            target = self._run_poller
+
+        self.watcher_thread = threading.Thread(target=target, daemon=True)
+        self.watcher_thread.start()
+        logger.info(f"👀 Vigilancia de archivos iniciada ({self.backend}, {len(self.snapshot)} archivos)")
+
+    def stop(self) -> None:
+        """Detiene la vigilancia"""
+        self.running = False
+        self._stop_event.set()
+        if self.watcher_thread:
+            self.watcher_thread.join(timeout=2.0)
+        logger.info("🛑 Vigilancia de archivos detenida")
+
+    # ---------- Snapshots ----------
+
+    def _category_for(self, rel_path: str) -> Optional[str]:
+        """Categoría de un archivo según las especificaciones (None si no se vigila)"""
+        directory, _, name = rel_path.rpartition('/')
+        for spec in self.specs:
+            if spec.recursive:
+                in_scope = directory == spec.directory or directory.startswith(spec.directory + '/')
+            else:
+                in_scope = directory == spec.directory
+            if in_scope and fnmatch.fnmatch(name, spec.pattern):
+                return spec.category
+        return None
+
+    def _scan_directory(self, rel_dir: str, recursive: bool) -> Snapshot:
+        """Snapshot de los archivos vigilados en un directorio"""
+        snapshot: Snapshot = {}
+        base = self.project_root / rel_dir if rel_dir else self.project_root
+        try:
+            entries = list(os.scandir(base))
+        except OSError:
+            return snapshot
+
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        snapshot.update(self._scan_directory(rel_path, True))
+                    continue
+                if self._category_for(rel_path) is None:
+                    continue
+                stat = entry.stat()
+                snapshot[rel_path] = (stat.st_mtime, stat.st_size)
+            except OSError:
+                continue
+        return snapshot
+
+    def _scan_all(self) -> Snapshot:
+        """Snapshot completo de todos los archivos vigilados"""
+        snapshot: Snapshot = {}
+        scanned: Set[Tuple[str, bool]] = set()
+        for spec in self.specs:
+            key = (spec.directory, spec.recursive)
+            if key not in scanned:
+                scanned.add(key)
+                snapshot.update(self._scan_directory(spec.directory, spec.recursive))
+        return snapshot
+
+    def _diff(self, old: Snapshot, new: Snapshot) -> List[FileChangeEvent]:
+        """Calcula eventos entre dos snapshots"""
+        now = time.time()
+        events = []
+        for rel_path, version in new.items():
+            previous = old.get(rel_path)
+            if previous is None:
+                events.append(FileChangeEvent(rel_path, 'created', self._category_for(rel_path), now))
+            elif previous != version:
+                events.append(FileChangeEvent(rel_path, 'modified', self._category_for(rel_path), now))
+        for rel_path in old:
+            if rel_path not in new:
+                events.append(FileChangeEvent(rel_path, 'deleted', self._category_for(rel_path), now))
+        return events
+
+    def check_now(self) -> List[FileChangeEvent]:
+        """Compara contra un snapshot completo y publica los cambios (sin esperar al hilo)"""
+        new_snapshot = self._scan_all()
+        events = self._diff(self.snapshot, new_snapshot)
+        self.snapshot = new_snapshot
+        self._publish(events)
+        return events
+
+    # ---------- Backends ----------
+
+    def _run_poller(self) -> None:
+        """Backend portable: snapshot completo cada poll_interval"""
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.check_now()
+            except Exception as e:
+                logger.error(f"Error vigilando archivos: {e}")
+
+    def _watched_directories(self) -> List[Tuple[str, bool]]:
+        """Directorios a registrar en inotify (relativos, recursivo)"""
+        directories = {}
+        for spec in self.specs:
+            directories[spec.directory] = directories.get(spec.directory, False) or spec.recursive
+        return list(directories.items())
+
+    def _run_inotify(self, inotify: '_Inotify') -> None:
+        """Backend inotify: reescanea solo los directorios con eventos"""
+        wd_to_dir: Dict[int, Tuple[str, bool]] = {}
+
+        def add_watch(rel_dir: str, recursive: bool) -> None:
+            path = self.project_root / rel_dir if rel_dir else self.project_root
+            wd = inotify.add_watch(str(path))
+            if wd >= 0:
+                wd_to_dir[wd] = (rel_dir, recursive)
+            if recursive:
+                try:
+                    for entry in os.scandir(path):
+                        if entry.is_dir(follow_symlinks=False):
+                            sub_dir = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                            add_watch(sub_dir, True)
+                except OSError:
+                    pass
+
+        try:
+            for rel_dir, recursive in self._watched_directories():
+                add_watch(rel_dir, recursive)
+
+            while not self._stop_event.is_set():
+                events = inotify.read_events(timeout=0.5)
+                if not events:
+                    continue
+                # Agrupar ráfagas de eventos (p. ej. editores que guardan en varios pasos)
+                time.sleep(self.debounce)
+                events.extend(inotify.read_events(timeout=0))
+
+                dirty: Set[Tuple[str, bool]] = set()
+                for wd, mask, name in events:
+                    watched = wd_to_dir.get(wd)
+                    if watched is None:
+                        continue
+                    rel_dir, recursive = watched
+                    if mask & _Inotify.IN_IGNORED:
+                        wd_to_dir.pop(wd, None)
+                        continue
+                    dirty.add(watched)
+                    if recursive and mask & _Inotify.IN_ISDIR and mask & (_Inotify.IN_CREATE | _Inotify.IN_MOVED_TO):
+                        sub_dir = f"{rel_dir}/{name}" if rel_dir else name
+                        add_watch(sub_dir, True)
+                        dirty.add((sub_dir, True))
+
+                self._rescan(dirty)
+        except Exception as e:
+            logger.error(f"Error en vigilancia inotify, usando poller: {e}")
+            self.backend = 'poll'
+            inotify.close()
+            self._run_poller()
+            return
+        inotify.close()
+
+    def _rescan(self, directories: Set[Tuple[str, bool]]) -> None:
+        """Reescanea directorios concretos y publica sus cambios"""
+        events = []
+        for rel_dir, recursive in directories:
+            prefix = f"{rel_dir}/" if rel_dir else ''
+
+            def in_directory(rel_path: str) -> bool:
+                if not rel_path.startswith(prefix):
+                    return False
+                return recursive or '/' not in rel_path[len(prefix):]
+
+            old = {p: v for p, v in self.snapshot.items() if in_directory(p)}
+            new = self._scan_directory(rel_dir, recursive)
+            for rel_path in old:
+                self.snapshot.pop(rel_path, None)
+            self.snapshot.update(new)
+            events.extend(self._diff(old, new))
+        self._publish(events)
+
+
+class _Inotify:
+    """Envoltorio mínimo de inotify(7) vía ctypes"""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+                  IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, libc, fd: int):
+        self.libc = libc
+        self.fd = fd
+
+    @classmethod
+    def create(cls) -> Optional['_Inotify']:
+        """Crea una instancia de inotify (None si no está disponible)"""
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(cls.IN_NONBLOCK | cls.IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        return cls(libc, fd)
+
+    def add_watch(self, path: str) -> int:
+        """Registra un directorio"""
+        return self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """Lee eventos disponibles [(wd, mask, nombre)] esperando hasta timeout segundos"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', errors='replace')
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        """Cierra el descriptor de inotify"""
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
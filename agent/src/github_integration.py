@@ -5,6 +5,37 @@ GitHub Integration - Interfaz con GitHub API
 from github import Github
 from typing import Dict, List, Optional
 import base64
+import functools
+
+from .tracing import traced
+from .metrics import get_registry
+
+GITHUB_CALLS = get_registry().counter(
+    'f3_agent_github_api_calls_total', 'Llamadas a métodos de la API de GitHub por resultado',
+    ('method', 'outcome'))
+GITHUB_RATE_LIMIT_REMAINING = get_registry().gauge(
+    'f3_agent_github_rate_limit_remaining', 'Peticiones restantes del rate limit de GitHub (última respuesta)')
+GITHUB_RATE_LIMIT = get_registry().gauge(
+    'f3_agent_github_rate_limit', 'Límite de peticiones de GitHub por hora (última respuesta)')
+
+
+def _github_call(method: str):
+    """Span y métricas (llamadas, resultado, rate limit restante) de un método de la API"""
+    def decorator(func):
+        traced_func = traced(f'github.{method}')(func)
+        
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            try:
+                result = traced_func(self, *args, **kwargs)
+            except Exception:
+                GITHUB_CALLS.inc(method=method, outcome='error')
+                raise
+            GITHUB_CALLS.inc(method=method, outcome='ok')
+            self._update_rate_limit()
+            return result
+        return wrapper
+    return decorator
 
 
 class GitHubIntegration:
@@ -44,6 +75,16 @@ class GitHubIntegration:
                 print("O edita: config/config.yaml")
             raise
     
+    def _update_rate_limit(self) -> None:
+        """Rate limit según las cabeceras de la última respuesta (sin petición extra)"""
+        try:
+            remaining, limit = self.github.rate_limiting
+        except Exception:
+            return
+        GITHUB_RATE_LIMIT_REMAINING.set(remaining)
+        GITHUB_RATE_LIMIT.set(limit)
+    
+    @_github_call('get_pr')
     def get_pr(self, pr_number: int, resource_manager=None) -> Dict:
         """Obtiene datos de un PR"""
         # Aplicar throttling si se proporciona resource_manager
@@ -86,16 +127,19 @@ class GitHubIntegration:
         
         return pr_data
     
+    @_github_call('get_open_prs')
     def get_open_prs(self) -> List[int]:
         """Obtiene lista de PRs abiertos"""
         prs = self.repo.get_pulls(state='open', sort='created', direction='desc')
         return [pr.number for pr in prs]
     
+    @_github_call('comment_on_pr')
     def comment_on_pr(self, pr_number: int, comment: str) -> None:
         """Comenta en un PR"""
         pr = self.repo.get_pull(pr_number)
         pr.create_issue_comment(comment)
     
+    @_github_call('approve_pr')
     def approve_pr(self, pr_number: int, comment: Optional[str] = None) -> None:
         """Aprueba un PR (requiere permisos de review)"""
         pr = self.repo.get_pull(pr_number)
@@ -104,17 +148,20 @@ class GitHubIntegration:
         else:
             pr.create_review(event='APPROVE')
     
+    @_github_call('request_changes')
     def request_changes(self, pr_number: int, comment: str) -> None:
         """Solicita cambios en un PR"""
         pr = self.repo.get_pull(pr_number)
         pr.create_review(body=comment, event='REQUEST_CHANGES')
     
+    @_github_call('reject_pr')
     def reject_pr(self, pr_number: int, comment: str) -> None:
         """Rechaza un PR (comentando y cerrando)"""
         self.comment_on_pr(pr_number, comment)
         pr = self.repo.get_pull(pr_number)
         pr.edit(state='closed')
     
+    @_github_call('get_related_issues')
     def get_related_issues(self, pr_number: int) -> List[Dict]:
         """Obtiene Issues relacionados con el PR"""
         pr = self.repo.get_pull(pr_number)
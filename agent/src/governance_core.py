@@ -5,6 +5,8 @@ Toma decisiones finales basadas en síntesis de todos los componentes.
 """
 
 import logging
+import time
+from dataclasses import asdict
 from typing import Dict, Optional
 from pathlib import Path
 
@@ -12,12 +14,30 @@ logger = logging.getLogger(__name__)
 from .code_analyzer import CodeAnalyzer
 from .context_manager import ContextManager
 from .synthesis_engine import SynthesisEngine
+from .decision_policy import make_decision, violates_hard_limits
 from .development_phase import DevelopmentCycle
-from .resource_manager import ResourceManager, ThrottledOperation
+from .resource_manager import ResourceLimits, ResourceManager, ThrottledOperation
 from .internet_learning import InternetLearner, NetworkManager
 from .agent_rules import AgentRulesSystem
 from .autonomous_executor import AutonomousExecutor
 from .autonomous_worker import AutonomousWorker
+from .file_watcher import FileWatcher, FileChangeEvent
+from .document_store import get_document_store
+from .doc_index import get_document_index
+from .section_index import get_section_index
+from .code_index import get_code_index
+from .execution_log import ExecutionLog
+from .replay_engine import snapshot_record
+from .tracing import configure_tracing, span
+from .metrics import get_registry
+
+PRS_EVALUATED = get_registry().counter(
+    'f3_agent_prs_evaluated_total', 'PRs evaluados por el núcleo de gobierno')
+PR_DECISIONS = get_registry().counter(
+    'f3_agent_pr_decisions_total', 'Decisiones tomadas sobre PRs por acción', ('action',))
+PR_EVALUATION_SECONDS = get_registry().histogram(
+    'f3_agent_pr_evaluation_seconds', 'Latencia de evaluate_pr en segundos (incluye throttling)',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
 
 
 class GovernanceCore:
@@ -25,12 +45,24 @@ class GovernanceCore:
     
     def __init__(self, config: dict, data_dir):
         self.config = config
+        self.data_dir = data_dir
+        configure_tracing(config, data_dir)
         self.code_analyzer = CodeAnalyzer(config)
         self.context_manager = ContextManager(config, data_dir)
         self.synthesis_engine = SynthesisEngine(config)
         self.development_cycle = DevelopmentCycle(config)
         self.resource_manager = ResourceManager(config)
         
+        # Instantáneas de los PRs evaluados (entrada del replay offline)
+        replay_config = config.get('replay', {})
+        self.pr_snapshots = None
+        if replay_config.get('record_snapshots', True):
+            self.pr_snapshots = ExecutionLog(
+                Path(data_dir) / 'pr_snapshots',
+                max_segment_bytes=int(replay_config.get('snapshot_max_mb', 20) * 1024 * 1024),
+                max_segments=replay_config.get('snapshot_max_segments', 20),
+            )
+        
         # Gestión de red y aprendizaje en internet
         self.network_manager = NetworkManager(config)
         self.internet_learner = InternetLearner(config, self.network_manager)
@@ -49,24 +81,25 @@ class GovernanceCore:
         self.autonomous_executor = AutonomousExecutor(
             project_root=project_root,
             agent_rules=self.agent_rules,
-            resource_manager=self.resource_manager
+            resource_manager=self.resource_manager,
+            config=config
         )
         
         # Trabajador autónomo (ejecuta tareas periódicamente)
         self.autonomous_worker = AutonomousWorker(self, config)
         
-        # Aplicar límites de recursos desde reglas
-        rule_limits = self.agent_rules.get_resource_limits()
-        if rule_limits:
-            # Actualizar límites si están definidos en reglas
-            if 'max_cpu_percent' in rule_limits:
-                self.resource_manager.limits.max_cpu_percent = rule_limits['max_cpu_percent']
-            if 'max_ram_gb' in rule_limits:
-                self.resource_manager.limits.max_ram_gb = rule_limits['max_ram_gb']
-            if 'available_cores' in rule_limits:
-                self.resource_manager.limits.available_cores = rule_limits['available_cores']
-            if 'available_threads' in rule_limits:
-                self.resource_manager.limits.available_threads = rule_limits['available_threads']
+        # Vigilancia de archivos (refresco incremental; se inicia con start_file_watcher)
+        self.file_watcher = FileWatcher(project_root, config)
+        get_document_store(project_root).attach_watcher(self.file_watcher)
+        get_document_index(project_root).attach_watcher(self.file_watcher)
+        get_section_index(project_root).attach_watcher(self.file_watcher)
+        get_code_index(project_root).attach_watcher(self.file_watcher)
+        self.agent_rules.attach_watcher(self.file_watcher)
+        self.file_watcher.subscribe(self._on_config_changed, categories=('config',))
+        
+        # Aplicar límites de recursos (configuración y reglas; de nuevo al recargar las reglas)
+        self._apply_resource_limits()
+        self.agent_rules.add_reload_listener(self._apply_resource_limits)
         
         # Iniciar monitoreo de recursos
         self.resource_manager.start_monitoring()
@@ -82,6 +115,75 @@ class GovernanceCore:
         logger.info("✅ Ejecutor autónomo habilitado - El agente puede implementar código automáticamente")
         logger.info("🤖 SISTEMA 100% AUTÓNOMO ACTIVADO")
     
+    def start_file_watcher(self) -> None:
+        """Inicia la vigilancia de archivos para mantener el conocimiento actualizado"""
+        self.file_watcher.start()
+    
+    def stop_file_watcher(self) -> None:
+        """Detiene la vigilancia de archivos"""
+        self.file_watcher.stop()
+    
+    def _on_config_changed(self, event: FileChangeEvent) -> None:
+        """Recarga la configuración del agente cuando cambia config.yaml"""
+        if event.kind == 'deleted' or Path(event.path).name != 'config.yaml':
+            return
+        
+        import yaml
+        config_path = self.file_watcher.project_root / event.path
+        try:
+            with open(config_path, 'r') as f:
+                new_config = yaml.safe_load(f) or {}
+        except Exception as e:
+            logger.error(f"Error recargando configuración {event.path}: {e}")
+            return
+        
+        self.reload_config(new_config)
+    
+    def _apply_resource_limits(self) -> None:
+        """Límites de recursos: valores por defecto, luego la configuración y por último
+        las reglas RESOURCE_LIMITS (tienen precedencia)"""
+        values = asdict(ResourceLimits())
+        resource_config = self.config.get('resources', {})
+        values.update({key: resource_config[key] for key in values if key in resource_config})
+        rule_limits = self.agent_rules.get_resource_limits()
+        for key in ('max_cpu_percent', 'max_ram_gb', 'available_cores', 'available_threads'):
+            if key in rule_limits:
+                values[key] = rule_limits[key]
+        limits = self.resource_manager.limits
+        for key, value in values.items():
+            setattr(limits, key, value)
+    
+    def reload_config(self, new_config: Dict) -> None:
+        """Aplica una configuración nueva solo a los componentes que dependen de ella"""
+        # Actualizar en el mismo dict (compartido con el resto de componentes)
+        project_root = self.config.get('project_root')
+        self.config.clear()
+        self.config.update(new_config)
+        if project_root and 'project_root' not in new_config:
+            self.config['project_root'] = project_root
+        
+        # Analizador: núcleo sagrado, vocabulario y términos prohibidos
+        self.code_analyzer = CodeAnalyzer(self.config)
+        
+        # Pesos del score de síntesis (se parte de los valores por defecto)
+        self.synthesis_engine.load_weights(self.config)
+        
+        # Ciclo de desarrollo: duraciones y umbrales (sin perder el estado)
+        self.development_cycle._load_phase_durations()
+        
+        # Límites de recursos (las reglas siguen teniendo precedencia)
+        self._apply_resource_limits()
+        
+        # Decisiones de permisos tomadas con la configuración anterior
+        self.autonomous_executor.permission_cache.clear()
+        
+        # Tracing (activar/desactivar sin reinicio)
+        configure_tracing(self.config, self.data_dir)
+        
+        from .activity_stream import log_success
+        log_success("Configuración recargada sin reinicio")
+        logger.info("✅ Configuración recargada")
+    
     def evaluate_pr(self, pr_data: Dict) -> Dict:
         """
         Evalúa un PR completo y toma decisión
@@ -92,15 +194,20 @@ class GovernanceCore:
         Returns:
             Dict con decisión y justificación
         """
-        # Usar throttling para mantener uso de CPU bajo
-        with ThrottledOperation(self.resource_manager):
+        started = time.perf_counter()
+        
+        # Usar throttling para mantener uso de CPU bajo (el span raíz incluye la espera)
+        with span('evaluate_pr', pr=pr_data.get('number', 0)) as root, \
+                ThrottledOperation(self.resource_manager):
             # 1. Analizar código (Code Analyzer)
             files_changed = pr_data.get('files', [])
             diff_content = pr_data.get('diff', '')
-            code_metrics = self.code_analyzer.analyze_pr(files_changed, diff_content)
+            with span('evaluate_pr.analyze_pr', files=len(files_changed)):
+                code_metrics = self.code_analyzer.analyze_pr(files_changed, diff_content)
         
             # 2. Obtener contexto (Context Manager)
-            similar_decisions = self.context_manager.get_similar_decisions(code_metrics)
+            with span('evaluate_pr.get_similar_decisions'):
+                similar_decisions = self.context_manager.get_similar_decisions(code_metrics)
             context_info = {
                 'similar_decisions': similar_decisions,
                 'project_context': self.context_manager.context,
@@ -117,22 +224,30 @@ class GovernanceCore:
             }
             
             # 4. Sintetizar (Synthesis Engine)
-            synthesis = self.synthesis_engine.synthesize(
-                code_metrics, context_info, phase_info
-            )
+            with span('evaluate_pr.synthesize'):
+                synthesis = self.synthesis_engine.synthesize(
+                    code_metrics, context_info, phase_info
+                )
             
             # 5. Tomar decisión final (Governance Core)
-            decision = self._make_decision(
-                synthesis, code_metrics, pr_data, phase_info
-            )
+            with span('evaluate_pr.make_decision'):
+                decision = self._make_decision(
+                    synthesis, code_metrics, pr_data, phase_info
+                )
+            root.set('decision', decision['action'])
             
             # 6. Registrar decisión
-            self.context_manager.record_decision(
-                pr_data.get('number', 0),
-                decision['action'],
-                decision['reason'],
-                code_metrics
-            )
+            with span('evaluate_pr.record_decision'):
+                self.context_manager.record_decision(
+                    pr_data.get('number', 0),
+                    decision['action'],
+                    decision['reason'],
+                    code_metrics
+                )
+                if self.pr_snapshots is not None:
+                    self.pr_snapshots.append(snapshot_record(
+                        pr_data, code_metrics, phase_info, similar_decisions, synthesis, decision
+                    ))
             
             # 7. Actualizar ciclo de desarrollo
             self.development_cycle.process_pr({
@@ -140,6 +255,10 @@ class GovernanceCore:
                 'experimental': phase_info['should_allow_experimentation'],
             })
         
+        PRS_EVALUATED.inc()
+        PR_DECISIONS.inc(action=decision['action'])
+        PR_EVALUATION_SECONDS.observe(time.perf_counter() - started)
+        
         return {
             'decision': decision,
             'synthesis': synthesis,
@@ -150,78 +269,11 @@ class GovernanceCore:
     
     def _make_decision(self, synthesis: Dict, code_metrics: Dict, pr_data: Dict, phase_info: Dict) -> Dict:
         """Toma decisión final basada en síntesis"""
-        recommendation = synthesis['recommendation']
-        score = synthesis['overall_score']
-        issues = synthesis['key_issues']
-        
-        # Verificar límites duros (nunca se violan)
-        if self._violates_hard_limits(code_metrics, pr_data):
-            return {
-                'action': 'reject',
-                'reason': 'Violación de límites duros del modelo F3',
-                'auto': False,  # Requiere revisión humana
-            }
-        
-        # Auto-aprobar si cumple criterios y está en fase apropiada
-        auto_approve = self.config.get('evaluation', {}).get('auto_approve_small', False)
-        auto_threshold = self.config.get('evaluation', {}).get('auto_approve_threshold', 50)
-        
-        if (auto_approve and 
-            code_metrics.get('total_lines', 0) < auto_threshold and
-            score >= 80 and
-            not issues and
-            not code_metrics.get('touches_sacred_core', False)):
-            return {
-                'action': 'approve',
-                'reason': 'PR pequeño, bien alineado con modelo F3',
-                'auto': True,
-            }
-        
-        # Decisión basada en recomendación
-        if recommendation == 'approve':
-            return {
-                'action': 'approve',
-                'reason': synthesis['feedback'],
-                'auto': False,
-            }
-        elif recommendation == 'approve_with_caution':
-            return {
-                'action': 'approve',
-                'reason': f"Aprobado con precaución. {synthesis['feedback']}",
-                'auto': False,
-            }
-        elif recommendation == 'request_changes':
-            return {
-                'action': 'request_changes',
-                'reason': synthesis['feedback'],
-                'auto': False,
-            }
-        else:  # reject
-            return {
-                'action': 'reject',
-                'reason': synthesis['feedback'],
-                'auto': False,
-            }
+        return make_decision(self.config, synthesis, code_metrics, pr_data)
     
     def _violates_hard_limits(self, code_metrics: Dict, pr_data: Dict) -> bool:
         """Verifica si se violan límites duros"""
-        # Límite 1: PRs que tocan núcleo sagrado sin Issue [CONCEPTUAL]
-        if code_metrics.get('touches_sacred_core', False):
-            # Verificar si hay Issue [CONCEPTUAL] relacionado
-            # TODO: Verificar en GitHub si hay Issue relacionado
-            # Por ahora, asumimos que requiere revisión humana
-            pass
-        
-        # Límite 2: PRs extremadamente grandes
-        max_size = self.config.get('evaluation', {}).get('max_pr_size', 300)
-        if code_metrics.get('total_lines', 0) > max_size * 2:
-            return True
-        
-        # Límite 3: Múltiples términos prohibidos
-        if len(code_metrics.get('forbidden_terms_found', [])) > 3:
-            return True
-        
-        return False
+        return violates_hard_limits(self.config, code_metrics, pr_data)
     
     def get_status(self) -> Dict:
         """Obtiene estado actual del agente"""
@@ -236,5 +288,6 @@ class GovernanceCore:
             'cycle_count': cycle_state.cycle_count,
             'context': context_summary,
             'resources': resource_stats,
+            'permission_cache': self.autonomous_executor.permission_cache.get_stats(),
         }
 
@@ -4,6 +4,7 @@ GUI Assistant - Asistente/Amigo del usuario en la GUI de F3-OS
 El agente gobernante también funciona como asistente amigable dentro de la GUI.
 """
 
+import re
 import time
 from typing import Dict, List, Optional, Callable
 from dataclasses import dataclass
@@ -13,6 +14,7 @@ import logging
 
 from .project_analyzer import ProjectAnalyzer
 from .project_knowledge_base import ProjectKnowledgeBase
+from .code_index import get_code_index
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +73,9 @@ class GUIAssistant:
         # Analizador de proyecto (para búsquedas específicas)
         self.project_analyzer = ProjectAnalyzer(project_root=project_root)
         
+        # Índice de símbolos del kernel (¿dónde está definido X? / ¿quién usa X?)
+        self.code_index = get_code_index(self.project_analyzer.project_root)
+        
         # Aprendizaje en internet (separado del entorno del usuario)
         if hasattr(governance_core, 'internet_learner'):
             self.internet_learner = governance_core.internet_learner
@@ -156,10 +161,26 @@ class GUIAssistant:
         
         return response
     
+    # Frases que indican una consulta sobre el código fuente
+    CODE_SEARCH_PHRASES = [
+        'dónde está definid', 'donde esta definid', 'dónde se define', 'donde se define',
+        'dónde se usa', 'donde se usa', 'quién usa', 'quien usa', 'quién llama', 'quien llama',
+        'where is', 'defined', 'who uses', 'who calls', 'usages of', 'references to',
+    ]
+    
+    def _extract_code_symbols(self, user_input: str) -> List[str]:
+        """Identificadores del mensaje que son símbolos definidos en kernel/src"""
+        candidates = list(dict.fromkeys(re.findall(r'[A-Za-z_]\w*', user_input)))
+        return self.code_index.known_symbols(candidates)
+    
     def _analyze_intent(self, user_input: str) -> str:
         """Analiza la intención del usuario"""
         input_lower = user_input.lower()
         
+        # Búsqueda de símbolos en el código (antes que el resto: "F3State" contiene "f3")
+        if any(phrase in input_lower for phrase in self.CODE_SEARCH_PHRASES) and self._extract_code_symbols(user_input):
+            return 'code_search'
+        
         # Saludos
         if any(word in input_lower for word in ['hola', 'hi', 'hello', 'saludo']):
             return 'greeting'
@@ -210,6 +231,12 @@ class GUIAssistant:
         if intent == 'greeting':
             return f"¡Hola {self.state.user_name}! ¿En qué puedo ayudarte hoy?"
         
+        elif intent == 'code_search':
+            symbols = self._extract_code_symbols(user_input)
+            response = "🔎 **Símbolos en el código del kernel:**\n\n"
+            response += "\n\n".join(self.code_index.describe_symbol(name) for name in symbols[:3])
+            return response
+        
         elif intent == 'rules':
             # Obtener TODAS las reglas desde la base de conocimiento completa
             logger.info("Usuario pregunta sobre reglas - usando base de conocimiento completa...")
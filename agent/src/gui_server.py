@@ -5,13 +5,31 @@ Proporciona API HTTP simple para que la GUI del sistema se comunique con el asis
 """
 
 import json
-from typing import Dict, Optional
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import time
+from typing import Dict, Optional, Tuple
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import threading
+import logging
 
 from .gui_integration import GUIIntegration
 from .activity_stream import get_activity_stream
+from .document_store import get_document_store
+from .metrics import CONTENT_TYPE, get_registry
+from .tracing import get_tracer, span
+
+logger = logging.getLogger(__name__)
+
+_registry = get_registry()
+HTTP_REQUESTS = _registry.counter(
+    'f3_agent_http_requests_total', 'Peticiones HTTP atendidas', ('method', 'route', 'status'))
+HTTP_REQUEST_SECONDS = _registry.histogram(
+    'f3_agent_http_request_duration_seconds', 'Latencia de las peticiones HTTP por ruta', ('method', 'route'))
+SSE_LAG_SECONDS = _registry.histogram(
+    'f3_agent_sse_lag_seconds', 'Retraso entre el registro de una actividad y su envío por SSE',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+_registry.gauge('f3_agent_sse_subscribers', 'Clientes suscritos al stream de actividades (SSE)',
+                function=lambda: len(get_activity_stream().subscribers))
 
 
 class AssistantHTTPHandler(BaseHTTPRequestHandler):
@@ -21,41 +39,56 @@ class AssistantHTTPHandler(BaseHTTPRequestHandler):
         self.gui = gui_integration
         super().__init__(*args, **kwargs)
     
+    # Rutas -> handler (las rutas desconocidas se agrupan en un solo span)
+    GET_ROUTES = {
+        '/': '_handle_index',
+        '/index.html': '_handle_index',
+        '/assistant/status': '_handle_status',
+        '/api/status': '_handle_api_status',
+        '/api/metrics': '_handle_metrics',
+        '/metrics': '_handle_prometheus',
+        '/assistant/conversation': '_handle_conversation',
+        '/assistant/suggestions': '_handle_suggestions',
+        '/api/activities': '_handle_activities',
+        '/activities': '_handle_activities',
+        '/api/activities/stream': '_handle_activities_stream',
+    }
+    
+    POST_ROUTES = {
+        '/assistant/open': '_handle_open',
+        '/assistant/close': '_handle_close',
+        '/assistant/message': '_handle_message',
+        '/api/query': '_handle_message',
+    }
+    
     def do_GET(self):
         """Maneja peticiones GET"""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
-        if path == '/' or path == '/index.html':
-            self._handle_index()
-        elif path == '/assistant/status':
-            self._handle_status()
-        elif path == '/api/status':
-            self._handle_api_status()
-        elif path == '/assistant/conversation':
-            self._handle_conversation()
-        elif path == '/assistant/suggestions':
-            self._handle_suggestions()
-        elif path == '/api/activities' or path == '/activities':
-            self._handle_activities()
-        elif path == '/api/activities/stream':
-            self._handle_activities_stream()
-        else:
-            self._send_error(404, "Not Found")
+        self._dispatch('GET', self.GET_ROUTES)
     
     def do_POST(self):
         """Maneja peticiones POST"""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
-        if path == '/assistant/open':
-            self._handle_open()
-        elif path == '/assistant/close':
-            self._handle_close()
-        elif path == '/assistant/message' or path == '/api/query':
-            self._handle_message()
-        else:
-            self._send_error(404, "Not Found")
+        self._dispatch('POST', self.POST_ROUTES)
+    
+    def _dispatch(self, method: str, routes: Dict[str, str]):
+        path = urlparse(self.path).path
+        handler = routes.get(path)
+        route = path if handler else 'not_found'
+        started = time.perf_counter()
+        self.response_status = None
+        try:
+            with span(f"http {method} {route}", method=method, route=route) as current:
+                if handler:
+                    getattr(self, handler)()
+                else:
+                    self._send_error(404, "Not Found")
+                current.set('status', self.response_status)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=self.response_status or 0)
+    
+    def send_response(self, code, message=None):
+        self.response_status = code
+        super().send_response(code, message)
     
     def _handle_index(self):
         """Sirve la página HTML principal"""
@@ -202,6 +235,24 @@ class AssistantHTTPHandler(BaseHTTPRequestHandler):
             'memory_mb': resources.get('memory_mb', 0.0),
         })
     
+    def _handle_metrics(self):
+        """Spans por etapa (p50/p95/p99, errores) y últimos spans"""
+        query_params = parse_qs(urlparse(self.path).query)
+        try:
+            recent = max(0, int(query_params.get('recent', [20])[0]))
+        except ValueError:
+            recent = 20
+        self._send_json(200, get_tracer().get_metrics(recent=recent))
+    
+    def _handle_prometheus(self):
+        """Métricas en formato de exposición de texto (para Prometheus)"""
+        body = get_registry().render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def _handle_status(self):
         """Obtiene estado del asistente"""
         state = self.gui.get_window_state()
@@ -247,6 +298,7 @@ class AssistantHTTPHandler(BaseHTTPRequestHandler):
                 data = json.dumps(activity.to_dict())
                 self.wfile.write(f"data: {data}\n\n".encode('utf-8'))
                 self.wfile.flush()
+                SSE_LAG_SECONDS.observe(max(0.0, time.time() - activity.timestamp.timestamp()))
             except Exception as e:
                 logger.error(f"Error enviando actividad: {e}")
         
@@ -262,8 +314,7 @@ class AssistantHTTPHandler(BaseHTTPRequestHandler):
             except:
                 break
         
-        # Mantener conexión abierta (simplificado - en producción usar threading)
-        import time
+        # Mantener conexión abierta (cada petición tiene su hilo: ThreadingHTTPServer)
         try:
             while True:
                 time.sleep(1)
@@ -331,7 +382,7 @@ class GUIServer:
     def __init__(self, gui_integration: GUIIntegration, port: int = 8080):
         self.gui = gui_integration
         self.port = port
-        self.server: Optional[HTTPServer] = None
+        self.server: Optional[ThreadingHTTPServer] = None
         self.server_thread: Optional[threading.Thread] = None
         self.running = False
     
@@ -367,7 +418,8 @@ class GUIServer:
                 
                 # Puerto disponible, crear servidor
                 # Escuchar en 0.0.0.0 para que sea accesible desde QEMU/F3-OS
-                self.server = HTTPServer(('0.0.0.0', self.port), handler_factory)
+                # Un hilo por petición: un cliente SSE no bloquea /metrics ni la API
+                self.server = ThreadingHTTPServer(('0.0.0.0', self.port), handler_factory)
                 if original_port != self.port:
                     print(f"ℹ️  Usando puerto {self.port} (el puerto {original_port} estaba ocupado)")
                 break
@@ -380,6 +432,7 @@ class GUIServer:
                     raise
         
         self.running = True
+        self._register_metrics()
         
         def run_server():
             print(f"🌐 Servidor GUI del asistente iniciado en http://0.0.0.0:{self.port}")
@@ -393,6 +446,40 @@ class GUIServer:
         self.server_thread = threading.Thread(target=run_server, daemon=True)
         self.server_thread.start()
     
+    def _register_metrics(self) -> None:
+        """Métricas que se calculan al exportar /metrics: proceso (CPU/RSS) y cachés"""
+        registry = get_registry()
+        resource_manager = self.gui.resource_manager
+        registry.counter('process_cpu_seconds_total', 'Tiempo de CPU del proceso (usuario + sistema)',
+                         function=lambda: sum(resource_manager.process.cpu_times()[:2]))
+        registry.gauge('process_resident_memory_bytes', 'Memoria residente (RSS) del proceso',
+                       function=lambda: resource_manager.process.memory_info().rss)
+        registry.gauge('f3_agent_cpu_percent', 'Uso de CPU del proceso (último muestreo del monitor)',
+                       function=lambda: resource_manager.current_cpu_usage)
+        registry.counter('f3_agent_cache_requests_total', 'Consultas a las cachés por resultado',
+                         ('cache', 'result'), function=lambda: {
+                             (name, result): value
+                             for name, counts in self._cache_counts().items()
+                             for result, value in zip(('hit', 'miss'), counts)})
+        registry.gauge('f3_agent_cache_hit_ratio', 'Proporción de aciertos por caché', ('cache',),
+                       function=lambda: {
+                           name: hits / (hits + misses)
+                           for name, (hits, misses) in self._cache_counts().items() if hits + misses})
+    
+    def _cache_counts(self) -> Dict[str, Tuple[int, int]]:
+        """(aciertos, fallos) de cada caché del agente"""
+        governance = self.gui.governance_core
+        executor = governance.autonomous_executor
+        counts = {}
+        for name, cache in (('permissions', executor.permission_cache), ('builds', executor.build_cache),
+                            ('learning', governance.internet_learner.cache)):
+            if cache is not None:
+                stats = cache.get_stats()
+                counts[name] = (stats['hits'], stats['misses'])
+        stats = get_document_store(executor.project_root).get_stats()
+        counts['documents'] = (stats['hits'], stats['loads'])  # Cada carga es un fallo
+        return counts
+    
     def stop(self) -> None:
         """Detiene el servidor"""
         self.running = False
@@ -0,0 +1,359 @@
+"""
+HTML Extractor - Extracción de texto de HTML en streaming
+
+Convierte HTML en texto en una sola pasada con un escáner incremental de etiquetas
+(búsquedas lineales con str.find; html.parser resultó varias veces más lento que
+las regex originales en páginas con muchas etiquetas):
+- Ignora script/style/noscript/template saltando directamente a su cierre
+- Segmenta por bloques (p, li, h1-h6, div...) y por frases
+- Puntúa cada segmento contra los términos de la query en una única pasada
+- Se detiene en cuanto tiene suficiente contenido relevante
+- Descarta sin recorrerlos los fragmentos que no contienen ningún término
+- Memoria acotada: acepta el documento en fragmentos y solo conserva lo necesario
+
+Uso:
+    result = extract_text(html, query="rust kernel")
+    result.text, result.title
+"""
+
+from dataclasses import dataclass
+from html import unescape
+from typing import Iterable, List, Optional, Union
+import re
+
+# Elementos cuyo contenido no es texto visible
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg'}
+
+# Elementos que cierran un bloque de texto
+BLOCK_TAGS = {
+    'p', 'div', 'li', 'ul', 'ol', 'br', 'hr', 'tr', 'td', 'th', 'table', 'pre',
+    'section', 'article', 'header', 'footer', 'nav', 'aside', 'main', 'blockquote',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'dd', 'dt', 'figcaption', 'body',
+}
+
+# Tamaño de fragmento al alimentar el parser con un documento completo
+CHUNK_SIZE = 16 * 1024
+
+# Máximo de texto retenido esperando el cierre de una etiqueta incompleta
+MAX_PENDING = 64 * 1024
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_TAG_RE = re.compile(r'(/?)([A-Za-z][\w:-]*)')
+_SKIP_END_RE = {tag: re.compile(rf'</{tag}\s*>', re.IGNORECASE) for tag in SKIP_TAGS}
+
+
+def _find_tag_end(buffer: str, start: int) -> int:
+    """Índice del '>' que cierra la etiqueta, o -1 si aún no está completa
+
+    Una sola pasada: solo la comilla que abre un valor de atributo (tras '=')
+    inicia un tramo entrecomillado, y solo la misma comilla lo cierra; así un
+    apóstrofo dentro de title="Don't" no deja la etiqueta abierta.
+    """
+    gt = buffer.find('>', start)
+    if gt == -1 or (buffer.find('"', start, gt) == -1 and buffer.find("'", start, gt) == -1):
+        return gt  # Caso común: etiqueta sin comillas
+    quote = None
+    after_equals = False
+    for index in range(start, len(buffer)):
+        char = buffer[index]
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char == '>':
+            return index
+        elif char == '=':
+            after_equals = True
+        elif after_equals and (char == '"' or char == "'"):
+            quote = char
+            after_equals = False
+        elif not char.isspace():
+            after_equals = False
+    return -1
+
+
+@dataclass
+class ExtractionResult:
+    """Resultado de la extracción"""
+    title: str
+    text: str
+    relevant_segments: int  # Segmentos que contienen algún término de la query
+    complete: bool  # False si se detuvo antes del final del documento
+    bytes_processed: int = 0
+
+
+class StreamingTextExtractor:
+    """Extractor incremental: alimentar con feed_chunk(fragmento) hasta que devuelva True"""
+
+    def __init__(self, query: Optional[str] = None, max_chars: int = 5000, max_segments: int = 10):
+        self.terms = [term.lower() for term in query.split()] if query else []
+        self.max_chars = max_chars
+        self.max_segments = max_segments
+
+        self.done = False
+        self.bytes_processed = 0
+        self._pending = ''  # Resto del fragmento anterior (etiqueta incompleta)
+        self._skip_end = None  # Patrón de cierre del elemento que se está saltando
+        self._in_title = False
+        self._title_parts: List[str] = []
+        self._block: List[str] = []
+        self._block_size = 0
+
+        # Texto plano (primeros max_chars) y segmentos relevantes
+        self._plain: List[str] = []
+        self._plain_size = 0
+        self._relevant: List[str] = []
+
+    # ---------- Escáner ----------
+
+    def _scan(self, buffer: str, final: bool = False) -> None:
+        """Recorre el buffer emitiendo etiquetas y texto; guarda lo incompleto"""
+        pos = 0
+        length = len(buffer)
+        while pos < length and not self.done:
+            if self._skip_end is not None:
+                match = self._skip_end.search(buffer, pos)
+                if match is None:
+                    # Conservar solo lo suficiente para detectar el cierre partido
+                    self._pending = buffer[-16:] if not final else ''
+                    return
+                self._skip_end = None
+                pos = match.end()
+                continue
+
+            lt = buffer.find('<', pos)
+            if lt == -1:
+                end = length
+                if not final:
+                    # Una entidad (&amp;) partida entre fragmentos se completa con el siguiente
+                    amp = buffer.rfind('&', max(pos, length - 10))
+                    if amp != -1 and ';' not in buffer[amp:]:
+                        end = amp
+                self.handle_data(buffer[pos:end])
+                pos = end
+                break
+            if lt > pos:
+                self.handle_data(buffer[pos:lt])
+                pos = lt
+
+            if buffer.startswith('<!--', lt):
+                end = buffer.find('-->', lt + 4)
+                if end == -1:
+                    break
+                pos = end + 3
+                continue
+
+            # '>' dentro de un atributo entrecomillado no cierra la etiqueta
+            gt = _find_tag_end(buffer, lt + 1)
+            if gt == -1:
+                break
+
+            match = _TAG_RE.match(buffer, lt + 1, gt)
+            if match is None:
+                # <!DOCTYPE>, <?xml?> o un '<' suelto en el texto
+                if buffer[lt + 1:lt + 2] not in ('!', '?'):
+                    self.handle_data('<')
+                    pos = lt + 1
+                    continue
+            else:
+                tag = match.group(2).lower()
+                if match.group(1):
+                    self.handle_endtag(tag)
+                elif buffer[gt - 1] == '/':
+                    self.handle_startendtag(tag)
+                else:
+                    self.handle_starttag(tag)
+            pos = gt + 1
+        else:
+            self._pending = ''
+            return
+
+        pending = buffer[pos:]
+        if final or len(pending) > MAX_PENDING:
+            # Etiqueta sin cerrar al final del documento (o anormalmente larga): descartar
+            pending = ''
+        self._pending = pending
+
+    # ---------- Eventos ----------
+
+    def handle_starttag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_end = _SKIP_END_RE[tag]
+        elif tag == 'title':
+            self._in_title = True
+        elif tag in BLOCK_TAGS:
+            self._flush_block()
+
+    def handle_startendtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self._flush_block()
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif tag in BLOCK_TAGS:
+            self._flush_block()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+            return
+        if self.done:
+            return
+        self._block.append(data)
+        self._block_size += len(data)
+        # Bloques enormes sin etiquetas: procesar por partes (memoria acotada)
+        if self._block_size > 4 * self.max_chars:
+            self._flush_block()
+
+    # ---------- Segmentación y puntuación ----------
+
+    def _flush_block(self) -> None:
+        """Procesa el bloque acumulado: normaliza espacios y puntúa sus frases"""
+        if not self._block:
+            return
+        text = ''.join(self._block)
+        self._block = []
+        self._block_size = 0
+        if '&' in text:
+            text = unescape(text)
+        text = ' '.join(text.split())
+        if not text or self.done:
+            return
+
+        if self._plain_size < self.max_chars:
+            self._plain.append(text)
+            self._plain_size += len(text) + 1
+
+        if not self.terms:
+            if self._plain_size >= self.max_chars:
+                self.done = True
+            return
+
+        # Una sola conversión a minúsculas por bloque; la mayoría no contiene ningún término
+        lowered = text.lower()
+        if not any(term in lowered for term in self.terms):
+            return
+
+        for sentence in text.split('.'):
+            lowered = sentence.lower()
+            if any(term in lowered for term in self.terms):
+                self._relevant.append(sentence)
+                if len(self._relevant) >= self.max_segments:
+                    self.done = True
+                    return
+
+    # ---------- API ----------
+
+    def feed_chunk(self, chunk: str) -> bool:
+        """Alimenta un fragmento; devuelve True cuando ya hay suficiente contenido"""
+        if self.done:
+            return True
+        self.bytes_processed += len(chunk)
+        buffer = self._pending + chunk if self._pending else chunk
+        self._pending = ''
+
+        if self._only_relevant_needed():
+            # Terminar primero el elemento a saltar que quedó abierto
+            if self._skip_end is not None:
+                match = self._skip_end.search(buffer)
+                if match is None:
+                    self._pending = buffer[-16:]
+                    return self.done
+                self._skip_end = None
+                buffer = buffer[match.end():]
+
+            # El texto a medias del bloque se reprocesa junto con el fragmento
+            if self._block:
+                buffer = ''.join(self._block) + buffer
+                self._block = []
+                self._block_size = 0
+
+            resume = self._irrelevant_until(buffer)
+            if resume is not None:
+                # Nada que extraer: conservar solo el final (texto o etiqueta abiertos)
+                pending = buffer[resume:]
+                if len(pending) > MAX_PENDING and not pending.startswith('<'):
+                    pending = pending[-MAX_PENDING:]
+                self._pending = pending
+                return self.done
+
+        self._scan(buffer)
+        return self.done
+
+    def _only_relevant_needed(self) -> bool:
+        """¿Solo interesan ya las frases con términos de la query?
+
+        Con el texto plano de respaldo lleno, un fragmento sin ningún término no
+        puede aportar nada y se descarta sin recorrer sus etiquetas.
+        """
+        return bool(self.terms) and self._plain_size >= self.max_chars and not self._in_title
+
+    def _irrelevant_until(self, buffer: str) -> Optional[int]:
+        """Si el buffer no contiene términos, posición desde la que retomar (si no, None)"""
+        lowered = buffer.lower()
+        if any(term in lowered for term in self.terms):
+            return None
+        # Un comentario o elemento a saltar abierto al final exige el recorrido normal
+        if lowered.rfind('<!--') > lowered.rfind('-->'):
+            return None
+        for tag in SKIP_TAGS:
+            if lowered.rfind('<' + tag) > lowered.rfind('</' + tag):
+                return None
+        # Retomar desde la última etiqueta de bloque: el texto del bloque abierto
+        # (con sus etiquetas en línea) puede completarse con términos más adelante
+        lt = buffer.rfind('<')
+        while lt != -1:
+            match = _TAG_RE.match(buffer, lt + 1)
+            if match is not None and match.group(2).lower() in BLOCK_TAGS:
+                break
+            lt = buffer.rfind('<', 0, lt)
+        if lt != -1 and len(buffer) - lt <= MAX_PENDING:
+            return lt
+        if lt == -1 and len(buffer) <= MAX_PENDING:
+            return 0
+        # Bloque anormalmente largo: conservar solo lo que sigue a la última etiqueta
+        last_gt = buffer.rfind('>')
+        last_lt = buffer.rfind('<')
+        return last_lt if last_lt > last_gt else last_gt + 1
+
+    def result(self) -> ExtractionResult:
+        """Cierra el parser y devuelve el texto extraído"""
+        complete = not self.done
+        if not self.done and self._pending:
+            self._scan(self._pending, final=True)
+        self._flush_block()
+
+        if self._relevant:
+            text = '. '.join(self._relevant)
+        else:
+            text = ' '.join(self._plain)
+        title = _WHITESPACE_RE.sub(' ', unescape(''.join(self._title_parts))).strip()[:200]
+        return ExtractionResult(
+            title=title or "Sin título",
+            text=text.strip()[:self.max_chars],
+            relevant_segments=len(self._relevant),
+            complete=complete,
+            bytes_processed=self.bytes_processed,
+        )
+
+
+def extract_text(html: Union[str, Iterable[str]], query: Optional[str] = None,
+                 max_chars: int = 5000, max_segments: int = 10) -> ExtractionResult:
+    """Extrae texto de un documento HTML (cadena o iterable de fragmentos)
+
+    Args:
+        html: Documento completo o fragmentos decodificados
+        query: Términos a priorizar (sin query se devuelve el texto inicial)
+        max_chars: Máximo de caracteres del resultado
+        max_segments: Frases relevantes tras las que se detiene la extracción
+    """
+    extractor = StreamingTextExtractor(query, max_chars=max_chars, max_segments=max_segments)
+    if isinstance(html, str):
+        chunks = (html[i:i + CHUNK_SIZE] for i in range(0, len(html), CHUNK_SIZE))
+    else:
+        chunks = html
+    for chunk in chunks:
+        if extractor.feed_chunk(chunk):
+            break
+    return extractor.result()
+
@@ -5,26 +5,73 @@ El agente puede aprender libremente de internet para completar el propósito del
 Consume hasta 50% de la disponibilidad de conexión de red.
 """
 
+import codecs
 import requests
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Callable
 from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
 import logging
 from urllib.parse import urljoin, urlparse
 import re
 
+from .learning_cache import LearningCache, CacheEntry
+from .html_extractor import StreamingTextExtractor, extract_text
+from .knowledge_store import LearnedKnowledgeStore
+from .doc_index import query_terms, tokenize
+
 logger = logging.getLogger(__name__)
 
 
+# Texto extraído que se guarda en caché por URL (el enfoque por query se aplica al leer)
+CACHED_TEXT_CHARS = 20000
+
+
 @dataclass
 class NetworkLimits:
     """Límites de red para el agente"""
     max_bandwidth_percent: float = 50.0  # Máximo 50% de ancho de banda disponible
     target_bandwidth_percent: float = 40.0  # Objetivo 40%
     check_interval: float = 1.0
-    request_delay: float = 0.5  # Delay entre peticiones para respetar límites
+    request_delay: float = 0.5  # Obsoleto: el ritmo lo marca el presupuesto de ancho de banda
+    max_concurrent_requests: int = 8  # Peticiones simultáneas en total
+    max_per_domain: int = 5  # Peticiones simultáneas por dominio
+    link_capacity_mbps: float = 0.0  # Capacidad del enlace (0 = estimar con psutil)
+    min_budget_kbps: float = 64.0  # Presupuesto mínimo (evita bloquear el aprendizaje)
+
+
+@dataclass
+class StreamResult:
+    """Resultado de una descarga en streaming"""
+    status_code: int
+    headers: Dict[str, str]
+    bytes_read: int
+    complete: bool  # False si se cortó (límite de bytes o el consumidor tuvo suficiente)
+    rejected: Optional[str] = None  # Motivo si no se descargó el cuerpo
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+# Tipos de contenido que se descargan para aprender (el resto se descarta sin leer el cuerpo)
+DEFAULT_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'text/markdown')
+
+# Tamaño de lectura al descargar en streaming
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+def _charset_from_content_type(content_type: str) -> Optional[str]:
+    """Extrae el charset de una cabecera Content-Type"""
+    for part in content_type.split(';')[1:]:
+        key, _, value = part.strip().partition('=')
+        if key.lower() == 'charset' and value:
+            return value.strip('"\' ')
+    return None
 
 
 @dataclass
@@ -39,7 +86,13 @@ class LearningSource:
 
 
 class NetworkManager:
-    """Gestiona uso de red del agente"""
+    """Gestiona uso de red del agente
+    
+    El ritmo de las peticiones no se fija con esperas: se mide el tráfico del sistema
+    con psutil.net_io_counters y el agente dispone de max_bandwidth_percent de la
+    capacidad que queda libre (token bucket en bytes/segundo). La concurrencia se
+    limita globalmente y por dominio.
+    """
     
     def __init__(self, config: dict):
         self.config = config
@@ -50,6 +103,10 @@ class NetworkManager:
             target_bandwidth_percent=network_config.get('target_bandwidth_percent', 40.0),
             check_interval=network_config.get('check_interval', 1.0),
             request_delay=network_config.get('request_delay', 0.5),
+            max_concurrent_requests=network_config.get('max_concurrent_requests', 8),
+            max_per_domain=network_config.get('max_per_domain', 5),
+            link_capacity_mbps=network_config.get('link_capacity_mbps', 0.0),
+            min_budget_kbps=network_config.get('min_budget_kbps', 64.0),
         )
         
         self.monitoring = False
@@ -59,8 +116,37 @@ class NetworkManager:
         self.total_bytes_received = 0
         self.request_count = 0
         
-        # Session para reutilizar conexiones
+        # Presupuesto de ancho de banda (token bucket, bytes)
+        self.lock = threading.Lock()
+        self.budget_condition = threading.Condition(self.lock)
+        self.min_budget_rate = self.limits.min_budget_kbps * 1024
+        self.budget_rate = self.min_budget_rate  # bytes/s permitidos al agente
+        self.budget_tokens = self.budget_rate
+        self.budget_updated = time.monotonic()
+        
+        # Medición de tráfico del sistema
+        self.link_capacity = self.limits.link_capacity_mbps * 125_000  # bytes/s (0 = estimar)
+        self.peak_rate = 0.0  # Mayor tasa observada (estimación de capacidad)
+        self.system_rate = 0.0
+        self.agent_rate = 0.0
+        self._last_sample: Optional[tuple] = None  # (monotonic, bytes del sistema, bytes del agente)
+        
+        # Concurrencia: global y por dominio
+        self.request_slots = threading.BoundedSemaphore(self.limits.max_concurrent_requests)
+        self.domain_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.limits.max_concurrent_requests,
+            thread_name_prefix='f3-net'
+        )
+        
+        # Session para reutilizar conexiones (pool dimensionado para la concurrencia)
         self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.limits.max_concurrent_requests,
+            pool_maxsize=self.limits.max_concurrent_requests,
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'F3-OS-Agent/1.0 (Learning Agent)'
         })
@@ -83,22 +169,173 @@ class NetworkManager:
     
     def _monitor_network(self) -> None:
         """Monitorea uso de red"""
-        import psutil
-        
         while self.monitoring:
             try:
-                # Obtener estadísticas de red del proceso
-                net_io = psutil.net_io_counters()
-                # Calcular uso aproximado (simplificado)
-                # En producción, se calcularía basado en velocidad de conexión
-                time.sleep(self.limits.check_interval)
+                self._sample()
             except Exception as e:
                 logger.error(f"Error en monitoreo de red: {e}")
-                time.sleep(self.limits.check_interval)
+            time.sleep(self.limits.check_interval)
+    
+    def _sample(self) -> None:
+        """Mide el tráfico del sistema y recalcula el presupuesto del agente"""
+        import psutil
+        
+        net_io = psutil.net_io_counters()
+        now = time.monotonic()
+        with self.lock:
+            system_bytes = net_io.bytes_sent + net_io.bytes_recv
+            agent_bytes = self.total_bytes_sent + self.total_bytes_received
+            previous = self._last_sample
+            self._last_sample = (now, system_bytes, agent_bytes)
+            if previous is None or now - previous[0] <= 0:
+                return
+            
+            elapsed = now - previous[0]
+            self.system_rate = max(0.0, (system_bytes - previous[1]) / elapsed)
+            self.agent_rate = max(0.0, (agent_bytes - previous[2]) / elapsed)
+            self.peak_rate = max(self.peak_rate, self.system_rate)
+            
+            # Capacidad: configurada o la mayor tasa observada
+            capacity = self.link_capacity or self.peak_rate
+            if capacity <= 0:
+                return
+            
+            # Disponibilidad = capacidad menos el tráfico que no es del agente
+            other_traffic = max(0.0, self.system_rate - self.agent_rate)
+            available = max(0.0, capacity - other_traffic)
+            self._refill_budget(now)
+            self.budget_rate = max(self.min_budget_rate,
+                                   available * self.limits.max_bandwidth_percent / 100.0)
+            self.current_bandwidth_usage = min(100.0, self.agent_rate / capacity * 100.0)
+            self.budget_condition.notify_all()
+    
+    def _refill_budget(self, now: float) -> None:
+        """Recarga el bucket según la tasa actual (máximo: un segundo de presupuesto)"""
+        elapsed = now - self.budget_updated
+        self.budget_updated = now
+        self.budget_tokens = min(self.budget_rate, self.budget_tokens + elapsed * self.budget_rate)
     
     def throttle_request(self) -> None:
-        """Aplica throttling a peticiones de red"""
-        time.sleep(self.limits.request_delay)
+        """Espera a que haya presupuesto de ancho de banda (no hay espera fija)"""
+        if not self.monitoring:
+            # Sin hilo de monitoreo: medir bajo demanda
+            stale = (self._last_sample is None or
+                     time.monotonic() - self._last_sample[0] >= self.limits.check_interval)
+            if stale:
+                try:
+                    self._sample()
+                except Exception as e:
+                    logger.debug(f"No se pudo medir la red: {e}")
+        
+        with self.budget_condition:
+            while True:
+                now = time.monotonic()
+                self._refill_budget(now)
+                if self.budget_tokens >= 0:
+                    return
+                # Deuda de bytes: esperar lo justo para saldarla
+                self.budget_condition.wait(timeout=-self.budget_tokens / self.budget_rate)
+    
+    def record_transfer(self, bytes_received: int, bytes_sent: int = 0) -> None:
+        """Registra una transferencia y la descuenta del presupuesto"""
+        with self.lock:
+            self.request_count += 1
+        self.record_bytes(bytes_received, bytes_sent)
+    
+    def record_bytes(self, bytes_received: int, bytes_sent: int = 0) -> None:
+        """Contabiliza bytes en cuanto llegan (descargas en streaming)"""
+        with self.lock:
+            self.total_bytes_received += bytes_received
+            self.total_bytes_sent += bytes_sent
+            self._refill_budget(time.monotonic())
+            self.budget_tokens -= bytes_received + bytes_sent
+    
+    def _domain_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Semáforo de concurrencia del dominio de una URL"""
+        domain = urlparse(url).netloc
+        with self.lock:
+            slot = self.domain_slots.get(domain)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.limits.max_per_domain)
+                self.domain_slots[domain] = slot
+            return slot
+    
+    @contextmanager
+    def request_slot(self, url: str):
+        """Reserva un hueco de petición (global y por dominio) con presupuesto disponible"""
+        domain_slot = self._domain_slot(url)
+        with domain_slot, self.request_slots:
+            self.throttle_request()
+            yield
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET respetando concurrencia y presupuesto de ancho de banda"""
+        with self.request_slot(url):
+            response = self.session.get(url, **kwargs)
+            self.record_transfer(len(response.content))
+            return response
+    
+    def stream_text(self, url: str, consumer: Callable[[str], bool], max_bytes: int,
+                    content_types: Optional[tuple] = DEFAULT_CONTENT_TYPES,
+                    **kwargs) -> StreamResult:
+        """GET en streaming: decodifica por fragmentos y se detiene al tener suficiente
+        
+        Args:
+            url: URL a descargar
+            consumer: Recibe cada fragmento de texto; devuelve True para detener la descarga
+            max_bytes: Máximo de bytes del cuerpo a leer
+            content_types: Tipos aceptados (None = cualquiera)
+        """
+        with self.request_slot(url):
+            with self.lock:
+                self.request_count += 1
+            response = self.session.get(url, stream=True, **kwargs)
+            try:
+                headers = dict(response.headers)
+                if response.status_code == 304 or response.status_code >= 400:
+                    return StreamResult(response.status_code, headers, 0, True)
+                
+                content_type = response.headers.get('Content-Type', '')
+                media_type = content_type.split(';')[0].strip().lower()
+                if content_types is not None and media_type and media_type not in content_types:
+                    return StreamResult(response.status_code, headers, 0, False,
+                                        rejected=f"tipo de contenido no soportado: {media_type}")
+                
+                declared = response.headers.get('Content-Length')
+                if declared and declared.isdigit() and int(declared) > max_bytes:
+                    return StreamResult(response.status_code, headers, 0, False,
+                                        rejected=f"demasiado grande: {int(declared)} bytes")
+                
+                charset = _charset_from_content_type(content_type) or 'utf-8'
+                try:
+                    decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+                except LookupError:
+                    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                
+                bytes_read = 0
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    chunk = chunk[:max_bytes - bytes_read]
+                    bytes_read += len(chunk)
+                    self.record_bytes(len(chunk))
+                    if consumer(decoder.decode(chunk)):
+                        return StreamResult(response.status_code, headers, bytes_read, False)
+                    if bytes_read >= max_bytes:
+                        logger.debug(f"Descarga cortada en {max_bytes} bytes: {url}")
+                        return StreamResult(response.status_code, headers, bytes_read, False)
+                
+                consumer(decoder.decode(b'', final=True))
+                return StreamResult(response.status_code, headers, bytes_read, True)
+            finally:
+                # Cerrar sin leer el resto del cuerpo
+                response.close()
+    
+    def map_concurrent(self, func: Callable, items: List) -> List:
+        """Ejecuta func sobre items en el pool de red, conservando el orden"""
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        return list(self.executor.map(func, items))
     
     def get_network_stats(self) -> dict:
         """Obtiene estadísticas de red"""
@@ -107,6 +344,8 @@ class NetworkManager:
             'bytes_received': self.total_bytes_received,
             'requests': self.request_count,
             'bandwidth_usage_percent': self.current_bandwidth_usage,
+            'budget_bytes_per_sec': self.budget_rate,
+            'system_bytes_per_sec': self.system_rate,
         }
 
 
@@ -116,11 +355,13 @@ class InternetLearner:
     def __init__(self, config: dict, network_manager: NetworkManager):
         self.config = config
         self.network_manager = network_manager
-        self.learned_sources: List[LearningSource] = []
-        self.learning_enabled = config.get('internet_learning', {}).get('enabled', True)
+        # Conocimiento aprendido indexado (BM25, facetas por tag, sin duplicados)
+        self.knowledge_store = LearnedKnowledgeStore()
+        learning_config = config.get('internet_learning', {})
+        self.learning_enabled = learning_config.get('enabled', True)
         
         # Fuentes de aprendizaje permitidas
-        self.allowed_domains = config.get('internet_learning', {}).get('allowed_domains', [
+        self.allowed_domains = learning_config.get('allowed_domains', [
             'github.com',
             'stackoverflow.com',
             'rust-lang.org',
@@ -129,14 +370,86 @@ class InternetLearner:
             'docs.rs',
         ])
         
+        # Límites de descarga (streaming con corte temprano)
+        self.max_download_bytes = int(learning_config.get('max_download_kb', 2048) * 1024)
+        self.allowed_content_types = tuple(learning_config.get('content_types', DEFAULT_CONTENT_TYPES))
+        
+        # Caché persistente por URL (lo aprendido sobrevive a reinicios)
+        self.cache: Optional[LearningCache] = None
+        if learning_config.get('cache_learned', True):
+            cache_dir = learning_config.get('cache_dir')
+            if cache_dir is None:
+                project_root = Path(config.get('project_root') or Path(__file__).parent.parent.parent)
+                cache_dir = project_root / 'agent' / 'data' / 'learning_cache'
+            self.cache = LearningCache(
+                Path(cache_dir),
+                ttl_hours=learning_config.get('cache_ttl_hours', 24.0),
+                max_size_mb=learning_config.get('cache_max_mb', 50.0),
+            )
+            self._load_cached_sources()
+        
         logger.info("Internet Learner inicializado - Aprendizaje libre habilitado")
     
+    def _load_cached_sources(self) -> None:
+        """Recupera las fuentes aprendidas en sesiones anteriores"""
+        for entry in list(self.cache.entries.values()):
+            text = self.cache.read_content(entry)
+            if text is None:
+                continue
+            self.knowledge_store.add(LearningSource(
+                url=entry.url,
+                title=entry.title,
+                content=text[:5000],
+                relevance_score=entry.relevance_score,
+                learned_at=datetime.fromtimestamp(entry.fetched_at),
+                tags=list(entry.tags),
+            ))
+        if len(self.knowledge_store):
+            logger.info(f"📦 {len(self.knowledge_store)} fuentes recuperadas de la caché de aprendizaje")
+    
+    @property
+    def learned_sources(self) -> List[LearningSource]:
+        """Fuentes aprendidas (sin duplicados)"""
+        return self.knowledge_store.sources()
+    
+    def _remember(self, source: LearningSource) -> None:
+        """Registra una fuente aprendida (una sola entrada por URL; los mirrors se unifican)"""
+        self.knowledge_store.add(source)
+        if self.cache:
+            # El almacén no crece más allá de lo que la caché conserva
+            stats = self.knowledge_store.get_stats()
+            if stats['urls'] > len(self.cache.entries):
+                self.knowledge_store.retain(self.cache.entries)
+    
+    def _build_source(self, url: str, title: str, text: str, query: Optional[str],
+                      learned_at: Optional[datetime] = None) -> LearningSource:
+        """Construye una fuente enfocando el texto en la query"""
+        content = self._focus_content(text, query)
+        relevance = self._calculate_relevance(content, query) if query else 0.5
+        return LearningSource(
+            url=url,
+            title=title,
+            content=content[:5000],  # Limitar tamaño
+            relevance_score=relevance,
+            learned_at=learned_at or datetime.now(),
+            tags=self._extract_tags(content, query)
+        )
+    
+    def _source_from_cache(self, entry: CacheEntry, query: Optional[str],
+                           revalidated: bool) -> Optional[LearningSource]:
+        """Sirve una fuente desde la caché (sin descargar el cuerpo)"""
+        text = self.cache.read_content(entry)
+        if text is None:
+            return None
+        self.cache.record_hit(entry, revalidated=revalidated)
+        return self._build_source(entry.url, entry.title, text, query,
+                                  learned_at=datetime.fromtimestamp(entry.fetched_at))
+    
     def learn_from_url(self, url: str, query: Optional[str] = None) -> Optional[LearningSource]:
         """Aprende de una URL específica"""
-        from .activity_stream import log_internet_learn
+        from .activity_stream import log_internet_learn, get_activity_stream
         
         activity = log_internet_learn(url, "")
-        """Aprende de una URL específica"""
         if not self.learning_enabled:
             return None
         
@@ -148,41 +461,69 @@ class InternetLearner:
             logger.warning(f"Dominio no permitido: {parsed.netloc}")
             return None
         
-        # Aplicar throttling de red
-        self.network_manager.throttle_request()
+        stream = get_activity_stream()
+        cached = self.cache.lookup(url) if self.cache else None
+        
+        # Dentro del TTL: cero bytes de red
+        if cached and self.cache.is_fresh(cached):
+            source = self._source_from_cache(cached, query, revalidated=False)
+            if source:
+                self._remember(source)
+                stream.update_activity(activity.id, status="success",
+                                       description=f"Desde caché (relevancia: {source.relevance_score:.2f})")
+                return source
         
         try:
-            response = self.network_manager.session.get(url, timeout=10)
-            response.raise_for_status()
+            # Descarga en streaming: el extractor consume cada fragmento y corta
+            # la descarga en cuanto tiene suficiente texto
+            extractor = StreamingTextExtractor(max_chars=CACHED_TEXT_CHARS)
+            headers = cached.conditional_headers() if cached else {}
+            response = self.network_manager.stream_text(
+                url, extractor.feed_chunk, self.max_download_bytes,
+                content_types=self.allowed_content_types, headers=headers, timeout=10
+            )
             
-            # Actualizar estadísticas
-            self.network_manager.total_bytes_received += len(response.content)
-            self.network_manager.request_count += 1
+            # 304: el contenido cacheado sigue vigente
+            if cached and response.status_code == 304:
+                source = self._source_from_cache(cached, query, revalidated=True)
+                if source:
+                    self._remember(source)
+                    stream.update_activity(activity.id, status="success",
+                                           description=f"Revalidado (relevancia: {source.relevance_score:.2f})")
+                    return source
+                # El contenido local se perdió: descargar sin condiciones
+                extractor = StreamingTextExtractor(max_chars=CACHED_TEXT_CHARS)
+                response = self.network_manager.stream_text(
+                    url, extractor.feed_chunk, self.max_download_bytes,
+                    content_types=self.allowed_content_types, timeout=10
+                )
             
-            # Extraer contenido relevante
-            content = self._extract_content(response.text, query)
-            title = self._extract_title(response.text)
+            response.raise_for_status()
+            if response.rejected:
+                logger.warning(f"Descartado {url}: {response.rejected}")
+                stream.update_activity(activity.id, status="warning", description=response.rejected)
+                return None
+            if self.cache:
+                self.cache.record_miss()
             
-            # Calcular relevancia
-            relevance = self._calculate_relevance(content, query) if query else 0.5
+            # Extraer contenido relevante
+            extraction = extractor.result()
+            text, title = extraction.text, extraction.title
+            source = self._build_source(url, title, text, query)
             
-            source = LearningSource(
-                url=url,
-                title=title,
-                content=content[:5000],  # Limitar tamaño
-                relevance_score=relevance,
-                learned_at=datetime.now(),
-                tags=self._extract_tags(content, query)
-            )
+            if self.cache:
+                self.cache.store(
+                    url, text, title, source.tags, source.relevance_score,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                )
             
-            self.learned_sources.append(source)
-            logger.info(f"✅ Aprendido de: {url} (relevancia: {relevance:.2f})")
+            self._remember(source)
+            logger.info(f"✅ Aprendido de: {url} (relevancia: {source.relevance_score:.2f})")
             
             # Actualizar actividad
-            from .activity_stream import get_activity_stream
-            stream = get_activity_stream()
             stream.update_activity(activity.id, status="success", 
-                                 description=f"Relevancia: {relevance:.2f}")
+                                 description=f"Relevancia: {source.relevance_score:.2f}")
             
             return source
             
@@ -200,17 +541,16 @@ class InternetLearner:
         
         sources = []
         
-        # Búsqueda en fuentes conocidas
-        search_queries = self._generate_search_queries(query)
+        # Búsqueda en fuentes conocidas (en paralelo; el orden de las queries se conserva)
+        search_queries = self._generate_search_queries(query)[:max_results]
         
-        for search_query in search_queries[:max_results]:
-            # Buscar en GitHub (API)
-            github_results = self._search_github(search_query)
+        # Buscar en GitHub (API)
+        for github_results in self.network_manager.map_concurrent(self._search_github, search_queries):
             sources.extend(github_results)
-            
-            # Buscar en Stack Overflow (web scraping básico)
-            # stack_results = self._search_stackoverflow(search_query)
-            # sources.extend(stack_results)
+        
+        # Buscar en Stack Overflow (web scraping básico)
+        # stack_results = self._search_stackoverflow(search_query)
+        # sources.extend(stack_results)
         
         # Actualizar actividad con resultados
         from .activity_stream import get_activity_stream
@@ -222,20 +562,27 @@ class InternetLearner:
         return sources[:max_results]
     
     def _extract_content(self, html: str, query: Optional[str] = None) -> str:
-        """Extrae contenido relevante de HTML"""
-        # Remover tags HTML básicos
-        text = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
-        text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-        text = re.sub(r'<[^>]+>', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Si hay query, priorizar secciones relevantes
+        """Extrae contenido relevante de HTML (en streaming, se detiene al tener suficiente)"""
+        return extract_text(html, query).text
+    
+    def _html_to_text(self, html: str) -> str:
+        """Convierte HTML en texto plano"""
+        return extract_text(html, max_chars=CACHED_TEXT_CHARS).text
+    
+    def _focus_content(self, text: str, query: Optional[str] = None) -> str:
+        """Prioriza las secciones del texto relevantes para la query"""
         if query:
-            # Buscar párrafos que contengan términos de la query
-            paragraphs = text.split('.')
-            relevant = [p for p in paragraphs if any(term.lower() in p.lower() for term in query.split())]
+            # Buscar párrafos que contengan términos de la query (una conversión por párrafo)
+            terms = [term.lower() for term in query.split()]
+            relevant = []
+            for paragraph in text.split('.'):
+                lowered = paragraph.lower()
+                if any(term in lowered for term in terms):
+                    relevant.append(paragraph)
+                    if len(relevant) == 10:
+                        break
             if relevant:
-                text = '. '.join(relevant[:10])
+                text = '. '.join(relevant)
         
         return text.strip()[:5000]  # Limitar tamaño
     
@@ -251,11 +598,12 @@ class InternetLearner:
         if not query:
             return 0.5
         
-        query_terms = set(query.lower().split())
-        content_lower = content.lower()
+        # Términos normalizados (acentos, plurales, stopwords) presentes como palabras
+        terms = query_terms(query)
+        content_terms = {term for term, _ in tokenize(content)}
         
-        matches = sum(1 for term in query_terms if term in content_lower)
-        relevance = matches / len(query_terms) if query_terms else 0.0
+        matches = sum(1 for term in terms if term in content_terms)
+        relevance = matches / len(terms) if terms else 0.0
         
         return min(relevance, 1.0)
     
@@ -272,8 +620,8 @@ class InternetLearner:
                 tags.append(term)
         
         if query:
-            query_terms = query.lower().split()[:3]
-            tags.extend(query_terms)
+            query_words = query.lower().split()[:3]
+            tags.extend(query_words)
         
         return list(set(tags))[:10]
     
@@ -299,8 +647,6 @@ class InternetLearner:
             return []
         
         try:
-            self.network_manager.throttle_request()
-            
             # Buscar repositorios
             url = "https://api.github.com/search/repositories"
             params = {
@@ -314,7 +660,7 @@ class InternetLearner:
                 'Accept': 'application/vnd.github.v3+json'
             }
             
-            response = self.network_manager.session.get(url, params=params, headers=headers, timeout=10)
+            response = self.network_manager.get(url, params=params, headers=headers, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -337,22 +683,30 @@ class InternetLearner:
             logger.error(f"Error buscando en GitHub: {e}")
             return []
     
-    def get_learned_knowledge(self, query: Optional[str] = None) -> List[LearningSource]:
-        """Obtiene conocimiento aprendido, filtrado por query si se proporciona"""
-        if query:
-            query_lower = query.lower()
-            return [
-                source for source in self.learned_sources
-                if query_lower in source.content.lower() or 
-                   query_lower in source.title.lower() or
-                   any(query_lower in tag.lower() for tag in source.tags)
-            ]
-        return self.learned_sources
+    def get_learned_knowledge(self, query: Optional[str] = None,
+                              tags: Optional[List[str]] = None,
+                              limit: Optional[int] = None) -> List[LearningSource]:
+        """Obtiene conocimiento aprendido, rankeado por BM25 si la query tiene términos"""
+        if query and query_terms(query):
+            return [source for source, _ in self.knowledge_store.search(query, limit=limit, tags=tags)]
+        sources = self.knowledge_store.sources()
+        if tags:
+            sources = [source for source in sources if all(tag in source.tags for tag in tags)]
+        return sources[:limit] if limit is not None else sources
     
     def apply_learned_knowledge(self, context: Dict) -> Dict:
         """Aplica conocimiento aprendido a un contexto"""
-        # Buscar fuentes relevantes
-        relevant_sources = self.get_learned_knowledge(context.get('query', ''))
+        # Buscar fuentes relevantes: BM25 si la query tiene términos; si no, todas
+        # (filtradas por tags) ordenadas por relevancia
+        query = context.get('query', '')
+        tags = context.get('tags')
+        if query and query_terms(query):
+            ranked = self.knowledge_store.search(query, limit=None, tags=tags)
+        else:
+            sources = self.get_learned_knowledge(query, tags=tags)
+            ranked = [(source, 0.0) for source in
+                      sorted(sources, key=lambda source: source.relevance_score, reverse=True)]
+        relevant_sources = [source for source, _ in ranked]
         
         if relevant_sources:
             # Sintetizar conocimiento aprendido
@@ -363,10 +717,12 @@ class InternetLearner:
                         'url': s.url,
                         'title': s.title,
                         'relevance': s.relevance_score,
+                        'score': round(score, 3),
                         'tags': s.tags
                     }
-                    for s in sorted(relevant_sources, key=lambda x: x.relevance_score, reverse=True)[:3]
+                    for s, score in ranked[:3]
                 ],
+                'facets': self.knowledge_store.facets(relevant_sources),
                 'insights': self._synthesize_insights(relevant_sources)
             }
             return synthesized
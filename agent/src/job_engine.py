@@ -0,0 +1,415 @@
+"""
+Job Engine - Motor de ejecución de comandos en segundo plano
+
+Ejecuta comandos del sistema como trabajos gestionados:
+- Cada trabajo corre en su propio hilo (subprocess.Popen, sin bloquear al agente)
+- Salida leída línea a línea y publicada en el ActivityStream mientras corre
+- Buffers circulares de stdout/stderr con límite de bytes (la salida no crece sin control)
+- Cancelación, timeout total y timeout por inactividad (un cargo colgado se mata)
+- Límite de trabajos simultáneos (el resto espera en cola)
+"""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Estados de un trabajo
+QUEUED = "queued"
+RUNNING = "running"
+SUCCESS = "success"
+ERROR = "error"
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"
+
+FINAL_STATES = (SUCCESS, ERROR, CANCELLED, TIMEOUT)
+
+# Segundos entre SIGTERM y SIGKILL al detener un proceso
+KILL_GRACE_SECONDS = 5.0
+
+# Intervalo del bucle de supervisión (segundos)
+POLL_INTERVAL = 0.1
+
+
+class OutputBuffer:
+    """Buffer circular de líneas con límite de bytes (descarta las más antiguas)"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.lines: Deque[str] = deque()
+        self.size = 0
+        self.total_lines = 0
+        self.dropped_lines = 0
+        self.lock = threading.Lock()
+
+    def append(self, line: str) -> None:
+        if len(line) > self.max_bytes:
+            line = line[-self.max_bytes:]
+        with self.lock:
+            self.lines.append(line)
+            self.size += len(line)
+            self.total_lines += 1
+            while self.size > self.max_bytes and self.lines:
+                self.size -= len(self.lines.popleft())
+                self.dropped_lines += 1
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped_lines > 0
+
+    def text(self) -> str:
+        """Salida retenida como texto"""
+        with self.lock:
+            return ''.join(self.lines)
+
+    def tail(self, count: int) -> List[str]:
+        """Últimas líneas retenidas"""
+        with self.lock:
+            start = max(0, len(self.lines) - count)
+            return [self.lines[i].rstrip('\r\n') for i in range(start, len(self.lines))]
+
+
+@dataclass
+class Job:
+    """Comando gestionado por el motor"""
+    id: str
+    command: List[str]
+    cwd: str
+    stdout: OutputBuffer
+    stderr: OutputBuffer
+    timeout: Optional[float] = None
+    idle_timeout: Optional[float] = None
+    status: str = QUEUED
+    return_code: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    last_output_at: Optional[float] = None
+    last_line: str = ""
+    env: Optional[Dict[str, str]] = None  # Variables añadidas al entorno del proceso
+    activity_ids: List[str] = field(default_factory=list)
+    on_line: Optional[Callable[['Job', str, str], None]] = None
+    on_complete: Optional[Callable[['Job'], None]] = None
+    process: Optional[subprocess.Popen] = None
+    cancel_requested: threading.Event = field(default_factory=threading.Event)
+    done_event: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def command_line(self) -> str:
+        return ' '.join(self.command)
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATES
+
+    @property
+    def duration_ms(self) -> Optional[int]:
+        if self.started_at is None:
+            return None
+        end = self.finished_at or time.time()
+        return int((end - self.started_at) * 1000)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que termine el trabajo (True si terminó)"""
+        return self.done_event.wait(timeout)
+
+    def to_dict(self, include_output: bool = False, tail_lines: int = 20) -> Dict:
+        """Convierte a diccionario para JSON"""
+        data = {
+            'id': self.id,
+            'command': self.command_line,
+            'cwd': self.cwd,
+            'status': self.status,
+            'return_code': self.return_code,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'duration_ms': self.duration_ms,
+            'output_lines': self.stdout.total_lines + self.stderr.total_lines,
+            'last_line': self.last_line,
+        }
+        if include_output:
+            data['stdout'] = self.stdout.text()
+            data['stderr'] = self.stderr.text()
+            data['stdout_truncated'] = self.stdout.truncated
+            data['stderr_truncated'] = self.stderr.truncated
+        else:
+            data['tail'] = self.stdout.tail(tail_lines)
+        return data
+
+
+class JobEngine:
+    """Ejecuta comandos como trabajos concurrentes con salida en streaming"""
+
+    def __init__(self, max_concurrent: int = 2, output_max_bytes: int = 256 * 1024,
+                 default_timeout: float = 300.0, idle_timeout: float = 0.0,
+                 progress_interval: float = 0.25, max_finished_jobs: int = 100):
+        self.max_concurrent = max(1, max_concurrent)
+        self.output_max_bytes = output_max_bytes
+        self.default_timeout = default_timeout
+        self.idle_timeout = idle_timeout
+        self.progress_interval = progress_interval
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs: Dict[str, Job] = {}
+        self.slots = threading.Semaphore(self.max_concurrent)
+        self.lock = threading.Lock()
+        self.job_counter = 0
+
+    # ---------- API ----------
+
+    def submit(self, command: List[str], cwd: Path, timeout: Optional[float] = None,
+               idle_timeout: Optional[float] = None, env: Optional[Dict[str, str]] = None,
+               activity_ids: Optional[List[str]] = None,
+               on_line: Optional[Callable[[Job, str, str], None]] = None,
+               on_complete: Optional[Callable[[Job], None]] = None) -> Job:
+        """Encola un comando y devuelve el trabajo (no bloquea)
+
+        Args:
+            command: Comando y argumentos
+            cwd: Directorio de trabajo
+            timeout: Duración máxima en segundos (None = por defecto, 0 = sin límite)
+            idle_timeout: Segundos sin salida antes de matar el proceso (0 = sin límite)
+            env: Variables de entorno adicionales
+            activity_ids: Actividades del ActivityStream que reciben el progreso
+            on_line: Callback (job, stream, línea) por cada línea de salida
+            on_complete: Callback al terminar (en el hilo del trabajo)
+        """
+        with self.lock:
+            self.job_counter += 1
+            job = Job(
+                id=f"job_{self.job_counter}",
+                command=list(command),
+                cwd=str(cwd),
+                stdout=OutputBuffer(self.output_max_bytes),
+                stderr=OutputBuffer(self.output_max_bytes),
+                timeout=self.default_timeout if timeout is None else timeout,
+                idle_timeout=self.idle_timeout if idle_timeout is None else idle_timeout,
+                env=dict(env) if env else None,
+                activity_ids=list(activity_ids or []),
+                on_line=on_line,
+                on_complete=on_complete,
+            )
+            self.jobs[job.id] = job
+            self._prune_finished()
+
+        threading.Thread(target=self._run, args=(job,), daemon=True, name=job.id).start()
+        return job
+
+    def run(self, command: List[str], cwd: Path, **kwargs) -> Job:
+        """Ejecuta un comando y espera a que termine"""
+        job = self.submit(command, cwd, **kwargs)
+        job.wait()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancela un trabajo en cola o en ejecución"""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_requested.set()
+        logger.info(f"🛑 Cancelando trabajo {job_id}: {job.command_line}")
+        return True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self, include_finished: bool = True) -> List[Dict]:
+        """Trabajos conocidos, del más reciente al más antiguo"""
+        with self.lock:
+            jobs = list(self.jobs.values())
+        return [job.to_dict(tail_lines=5) for job in reversed(jobs)
+                if include_finished or not job.done]
+
+    def running_count(self) -> int:
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if job.status == RUNNING)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Cancela todos los trabajos pendientes y espera a que terminen"""
+        with self.lock:
+            pending = [job for job in self.jobs.values() if not job.done]
+        for job in pending:
+            job.cancel_requested.set()
+        deadline = time.time() + timeout
+        for job in pending:
+            job.wait(max(0.0, deadline - time.time()))
+
+    def _prune_finished(self) -> None:
+        """Olvida los trabajos terminados más antiguos (llamar con el lock tomado)"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job_id]
+
+    # ---------- Ejecución ----------
+
+    def _run(self, job: Job) -> None:
+        """Hilo del trabajo: espera un hueco, lanza el proceso y lo supervisa"""
+        try:
+            # Esperar un hueco libre sin dejar de atender la cancelación
+            while not self.slots.acquire(timeout=POLL_INTERVAL):
+                if job.cancel_requested.is_set():
+                    self._finish(job, CANCELLED, error='Cancelado en cola')
+                    return
+            try:
+                if job.cancel_requested.is_set():
+                    self._finish(job, CANCELLED, error='Cancelado en cola')
+                    return
+                self._execute(job)
+            finally:
+                self.slots.release()
+        except Exception as e:
+            logger.error(f"❌ Error en trabajo {job.id} ({job.command_line}): {e}")
+            self._finish(job, ERROR, error=str(e))
+
+    def _execute(self, job: Job) -> None:
+        popen_kwargs = {}
+        if os.name == 'posix':
+            # Grupo de procesos propio: al cancelar se matan también los hijos (rustc, ld...)
+            popen_kwargs['start_new_session'] = True
+        if job.env:
+            popen_kwargs['env'] = {**os.environ, **job.env}
+
+        job.process = subprocess.Popen(
+            job.command,
+            cwd=job.cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1,
+            **popen_kwargs
+        )
+        job.started_at = job.last_output_at = time.time()
+        job.status = RUNNING
+        self._publish(job, f"En ejecución ({job.id})")
+
+        readers = [
+            threading.Thread(target=self._read_stream, args=(job, job.process.stdout, 'stdout', job.stdout),
+                             daemon=True),
+            threading.Thread(target=self._read_stream, args=(job, job.process.stderr, 'stderr', job.stderr),
+                             daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        final_status, error = self._supervise(job)
+
+        for reader in readers:
+            reader.join(timeout=KILL_GRACE_SECONDS)
+
+        job.return_code = job.process.returncode
+        if final_status is None:
+            final_status = SUCCESS if job.return_code == 0 else ERROR
+        self._finish(job, final_status, error=error)
+
+    def _supervise(self, job: Job):
+        """Espera al proceso; lo mata si se cancela o supera algún timeout"""
+        last_publish = 0.0
+        published_line = None
+        while True:
+            try:
+                job.process.wait(timeout=POLL_INTERVAL)
+                return None, None
+            except subprocess.TimeoutExpired:
+                pass
+
+            now = time.time()
+            if job.cancel_requested.is_set():
+                self._kill(job)
+                return CANCELLED, 'Cancelado'
+            if job.timeout and now - job.started_at > job.timeout:
+                self._kill(job)
+                return TIMEOUT, f'Timeout ({int(job.timeout)}s)'
+            if job.idle_timeout and now - job.last_output_at > job.idle_timeout:
+                self._kill(job)
+                return TIMEOUT, f'Sin salida durante {int(job.idle_timeout)}s'
+
+            # Progreso en vivo (limitado para no inundar a los suscriptores)
+            if job.last_line != published_line and now - last_publish >= self.progress_interval:
+                published_line = job.last_line
+                last_publish = now
+                self._publish(job, job.last_line)
+
+    def _read_stream(self, job: Job, pipe, name: str, buffer: OutputBuffer) -> None:
+        """Lee una salida del proceso línea a línea"""
+        try:
+            for line in pipe:
+                buffer.append(line)
+                job.last_output_at = time.time()
+                stripped = line.strip()
+                if stripped:
+                    job.last_line = stripped[:200]
+                if job.on_line:
+                    try:
+                        job.on_line(job, name, line)
+                    except Exception as e:
+                        logger.debug(f"Error en callback de línea de {job.id}: {e}")
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def _kill(self, job: Job) -> None:
+        """Termina el proceso (y su grupo); SIGKILL si no responde"""
+        process = job.process
+        if process is None or process.poll() is not None:
+            return
+        try:
+            if os.name == 'posix':
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                process.terminate()
+            try:
+                process.wait(timeout=KILL_GRACE_SECONDS)
+            except subprocess.TimeoutExpired:
+                if os.name == 'posix':
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+                process.wait()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _publish(self, job: Job, description: str) -> None:
+        """Publica el progreso del trabajo en sus actividades"""
+        if not job.activity_ids or not description:
+            return
+        from .activity_stream import get_activity_stream
+        stream = get_activity_stream()
+        details = {
+            'job_id': job.id,
+            'job_status': job.status,
+            'output_lines': job.stdout.total_lines + job.stderr.total_lines,
+        }
+        for activity_id in job.activity_ids:
+            stream.update_activity(activity_id, description=description, details=details)
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        if job.started_at is None:
+            job.started_at = job.finished_at
+        if job.on_complete:
+            try:
+                job.on_complete(job)
+            except Exception as e:
+                logger.error(f"Error en callback de fin de {job.id}: {e}")
+        job.done_event.set()
@@ -0,0 +1,332 @@
+"""
+Knowledge Store - Almacén indexado del conocimiento aprendido en internet
+
+Mantiene las fuentes aprendidas (LearningSource) con recuperación rankeada:
+- Índice invertido sobre título, contenido y tags (mismo tokenizador que DocumentIndex)
+- Ranking BM25
+- Facetas por tag (filtrado y conteos)
+- Deduplicación: hash del texto normalizado (copias exactas) y SimHash de 64 bits
+  con bandas (casi duplicados, p. ej. mirrors de GitHub) -> se guardan una sola vez
+
+Las búsquedas solo recorren los postings de los términos de la consulta, por lo que
+siguen siendo rápidas con decenas de miles de páginas.
+"""
+
+import hashlib
+import math
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from .doc_index import BM25_B, BM25_K1, query_terms, tokenize
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+# Distancia de Hamming máxima entre SimHash para considerar casi duplicados
+# (cambiar ~1% de las palabras de una página da distancias de hasta ~6)
+SIMHASH_MAX_DISTANCE = 7
+
+# Bandas de 8 bits: con distancia <= 7 al menos una de las 8 bandas coincide exactamente
+SIMHASH_BANDS = SIMHASH_MAX_DISTANCE + 1
+SIMHASH_BAND_BITS = 64 // SIMHASH_BANDS
+
+# Documentos con menos términos distintos solo se deduplican por hash exacto
+SIMHASH_MIN_TERMS = 20
+
+
+@dataclass
+class StoredKnowledge:
+    """Fuente indexada"""
+    doc_id: int
+    source: Any  # LearningSource
+    urls: Set[str]  # URL canónica y alias (duplicados)
+    terms: Counter
+    length: int
+    content_hash: str
+    simhash: int
+
+
+# Ancho de cada contador en la suma vectorial de simhash (bits)
+_FIELD_BITS = 32
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+
+
+def _spread_hash(term: str) -> int:
+    """Hash de 64 bits de un término con cada bit en su propio campo de _FIELD_BITS"""
+    value = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'big')
+    spread = 0
+    for bit in range(64):
+        if value >> bit & 1:
+            spread |= 1 << (bit * _FIELD_BITS)
+    return spread
+
+
+def simhash(weights: Dict[str, int], cache: Optional[Dict[str, int]] = None) -> int:
+    """SimHash de 64 bits de un conjunto de términos ponderados
+
+    Los 64 contadores por bit se suman a la vez como campos de un único entero
+    (una multiplicación y una suma por término, en C).
+    """
+    accumulator = 0
+    total = 0
+    for term, weight in weights.items():
+        spread = cache.get(term) if cache is not None else None
+        if spread is None:
+            spread = _spread_hash(term)
+            if cache is not None:
+                cache[term] = spread
+        accumulator += weight * spread
+        total += weight
+
+    result = 0
+    for bit in range(64):
+        # Bit a 1 si pesan más los términos con ese bit a 1
+        ones = (accumulator >> (bit * _FIELD_BITS)) & _FIELD_MASK
+        if 2 * ones > total:
+            result |= 1 << bit
+    return result
+
+
+def _bands(value: int) -> List[int]:
+    mask = (1 << SIMHASH_BAND_BITS) - 1
+    return [(value >> (i * SIMHASH_BAND_BITS)) & mask for i in range(SIMHASH_BANDS)]
+
+
+class LearnedKnowledgeStore:
+    """Almacén de fuentes aprendidas con índice invertido, BM25, facetas y deduplicación"""
+
+    def __init__(self):
+        self.documents: Dict[int, StoredKnowledge] = {}
+        self.url_index: Dict[str, int] = {}  # URL (canónica o alias) -> doc_id
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)  # término -> {doc_id: tf}
+        self.tag_index: Dict[str, Set[int]] = defaultdict(set)
+        self.content_hashes: Dict[str, int] = {}
+        self.simhash_bands: List[Dict[int, Set[int]]] = [defaultdict(set) for _ in range(SIMHASH_BANDS)]
+        self.total_length = 0
+        self.duplicates = 0
+        self.lock = threading.RLock()
+        self._next_id = 1
+        self._term_hashes: Dict[str, int] = {}
+
+    # ---------- Escritura ----------
+
+    def add(self, source) -> Tuple[Any, bool]:
+        """Agrega una fuente; devuelve (fuente almacenada, es_nueva)
+
+        Si es copia (exacta o casi) de una fuente existente, la URL queda como alias
+        de la existente y se devuelve esta.
+        """
+        content_terms = [term for term, _ in tokenize(source.content)]
+        content_hash = hashlib.sha1(' '.join(content_terms).encode('utf-8')).hexdigest()
+        content_counts = Counter(content_terms)
+        # El título y los tags se indexan, pero no cuentan para detectar duplicados
+        terms = Counter(content_counts)
+        terms.update(term for term, _ in tokenize(f"{source.title} {' '.join(source.tags)}"))
+
+        with self.lock:
+            existing_id = self.url_index.get(source.url)
+            if existing_id is not None:
+                existing = self.documents[existing_id]
+                if existing.content_hash == content_hash:
+                    # Misma URL y mismo contenido: refrescar metadatos
+                    if source.url == existing.source.url:
+                        self._replace_source(existing, source)
+                    return existing.source, False
+                self._detach_url(source.url)
+
+            value = simhash(content_counts, self._term_hashes) if len(content_counts) >= SIMHASH_MIN_TERMS else 0
+            duplicate_id = self._find_duplicate(content_hash, value)
+            if duplicate_id is not None:
+                duplicate = self.documents[duplicate_id]
+                duplicate.urls.add(source.url)
+                self.url_index[source.url] = duplicate_id
+                for tag in source.tags:
+                    if tag not in duplicate.source.tags:
+                        duplicate.source.tags.append(tag)
+                    self.tag_index[tag].add(duplicate_id)
+                self.duplicates += 1
+                logger.debug(f"Fuente duplicada: {source.url} -> {duplicate.source.url}")
+                return duplicate.source, False
+
+            doc_id = self._next_id
+            self._next_id += 1
+            stored = StoredKnowledge(
+                doc_id=doc_id,
+                source=source,
+                urls={source.url},
+                terms=terms,
+                length=sum(terms.values()),
+                content_hash=content_hash,
+                simhash=value,
+            )
+            self._index(stored)
+            return source, True
+
+    def _replace_source(self, stored: StoredKnowledge, source) -> None:
+        """Reemplaza la fuente de un documento sin cambiar su contenido indexado"""
+        for tag in stored.source.tags:
+            self.tag_index[tag].discard(stored.doc_id)
+        stored.source = source
+        for tag in source.tags:
+            self.tag_index[tag].add(stored.doc_id)
+
+    def _find_duplicate(self, content_hash: str, value: int) -> Optional[int]:
+        """Busca un documento idéntico (hash) o casi idéntico (SimHash, 0 = no aplica)"""
+        doc_id = self.content_hashes.get(content_hash)
+        if doc_id is not None:
+            return doc_id
+        if not value:
+            return None
+
+        candidates: Set[int] = set()
+        for band_index, band in enumerate(_bands(value)):
+            candidates |= self.simhash_bands[band_index].get(band, set())
+        for candidate in candidates:
+            if bin(self.documents[candidate].simhash ^ value).count('1') <= SIMHASH_MAX_DISTANCE:
+                return candidate
+        return None
+
+    def _index(self, stored: StoredKnowledge) -> None:
+        self.documents[stored.doc_id] = stored
+        self.url_index[stored.source.url] = stored.doc_id
+        self.content_hashes[stored.content_hash] = stored.doc_id
+        for term, tf in stored.terms.items():
+            self.postings[term][stored.doc_id] = tf
+        for tag in stored.source.tags:
+            self.tag_index[tag].add(stored.doc_id)
+        if stored.simhash:
+            for band_index, band in enumerate(_bands(stored.simhash)):
+                self.simhash_bands[band_index][band].add(stored.doc_id)
+        self.total_length += stored.length
+
+    def _unindex(self, stored: StoredKnowledge) -> None:
+        del self.documents[stored.doc_id]
+        if self.content_hashes.get(stored.content_hash) == stored.doc_id:
+            del self.content_hashes[stored.content_hash]
+        for term in stored.terms:
+            doc_postings = self.postings.get(term)
+            if doc_postings is not None:
+                doc_postings.pop(stored.doc_id, None)
+                if not doc_postings:
+                    del self.postings[term]
+        for tag in stored.source.tags:
+            tagged = self.tag_index.get(tag)
+            if tagged is not None:
+                tagged.discard(stored.doc_id)
+                if not tagged:
+                    del self.tag_index[tag]
+        if stored.simhash:
+            for band_index, band in enumerate(_bands(stored.simhash)):
+                bucket = self.simhash_bands[band_index].get(band)
+                if bucket is not None:
+                    bucket.discard(stored.doc_id)
+                    if not bucket:
+                        del self.simhash_bands[band_index][band]
+        self.total_length -= stored.length
+
+    def _detach_url(self, url: str) -> None:
+        """Desvincula una URL; el documento se elimina si era su última URL"""
+        doc_id = self.url_index.pop(url, None)
+        if doc_id is None:
+            return
+        stored = self.documents[doc_id]
+        stored.urls.discard(url)
+        if not stored.urls:
+            self._unindex(stored)
+        elif stored.source.url == url:
+            # La fuente canónica pasa a ser uno de los alias
+            alias = next(iter(stored.urls))
+            stored.source.url = alias
+
+    def remove(self, url: str) -> None:
+        """Elimina una URL del almacén"""
+        with self.lock:
+            self._detach_url(url)
+
+    def retain(self, urls: Iterable[str]) -> int:
+        """Conserva solo las URLs indicadas; devuelve cuántas se eliminaron"""
+        keep = set(urls)
+        with self.lock:
+            removed = [url for url in self.url_index if url not in keep]
+            for url in removed:
+                self._detach_url(url)
+        return len(removed)
+
+    # ---------- Consulta ----------
+
+    @traced('knowledge.store.search')
+    def search(self, query: str, limit: Optional[int] = 10,
+               tags: Optional[Iterable[str]] = None) -> List[Tuple[Any, float]]:
+        """Busca fuentes rankeadas por BM25 (opcionalmente filtradas por tags)"""
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        with self.lock:
+            n_docs = len(self.documents)
+            if n_docs == 0:
+                return []
+            avg_length = self.total_length / n_docs or 1.0
+
+            allowed: Optional[Set[int]] = None
+            if tags:
+                for tag in tags:
+                    tagged = self.tag_index.get(tag, set())
+                    allowed = set(tagged) if allowed is None else allowed & tagged
+
+            scores: Dict[int, float] = defaultdict(float)
+            for term in terms:
+                doc_postings = self.postings.get(term)
+                if not doc_postings:
+                    continue
+                df = len(doc_postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in doc_postings.items():
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    length = self.documents[doc_id].length
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            if limit is not None:
+                ranked = ranked[:limit]
+            return [(self.documents[doc_id].source, score) for doc_id, score in ranked]
+
+    def facets(self, sources: Optional[Iterable[Any]] = None, limit: int = 20) -> Dict[str, int]:
+        """Conteo de tags (de todo el almacén o de las fuentes indicadas)"""
+        with self.lock:
+            if sources is None:
+                counts = {tag: len(doc_ids) for tag, doc_ids in self.tag_index.items()}
+            else:
+                counts = Counter(tag for source in sources for tag in source.tags)
+        return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit])
+
+    def get(self, url: str):
+        """Fuente almacenada para una URL (o la canónica de la que es alias)"""
+        with self.lock:
+            doc_id = self.url_index.get(url)
+            return self.documents[doc_id].source if doc_id is not None else None
+
+    def sources(self) -> List[Any]:
+        """Todas las fuentes (sin duplicados), en orden de inserción"""
+        with self.lock:
+            return [stored.source for stored in self.documents.values()]
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def get_stats(self) -> Dict:
+        """Estadísticas del almacén"""
+        with self.lock:
+            return {
+                'documents': len(self.documents),
+                'urls': len(self.url_index),
+                'terms': len(self.postings),
+                'tags': len(self.tag_index),
+                'duplicates': self.duplicates,
+            }
@@ -0,0 +1,245 @@
+"""
+Learning Cache - Caché persistente de fuentes aprendidas en internet
+
+Guarda en disco lo aprendido de cada URL para no volver a descargarlo:
+- Índice por URL (agent/data/learning_cache/index.json) con ETag/Last-Modified
+- Contenido extraído direccionado por contenido (objects/<sha1>.txt, sin duplicados)
+- TTL: dentro del TTL la fuente se sirve sin tocar la red
+- Revalidación condicional (If-None-Match / If-Modified-Since) al expirar
+- Expulsión LRU cuando se supera el tamaño máximo
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_VERSION = 1
+
+# Los aciertos simples solo actualizan last_access en memoria; el índice se guarda
+# como mucho cada HIT_SAVE_INTERVAL segundos (el orden LRU tras un reinicio puede
+# perder los accesos de ese último intervalo)
+HIT_SAVE_INTERVAL = 60.0
+
+
+@dataclass
+class CacheEntry:
+    """Metadatos de una URL cacheada"""
+    url: str
+    content_hash: str
+    title: str
+    tags: List[str]
+    relevance_score: float
+    size: int  # Bytes del contenido extraído
+    fetched_at: float  # Última descarga completa (time.time)
+    validated_at: float  # Última vez que se confirmó vigente
+    last_access: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self, ttl_seconds: float, now: Optional[float] = None) -> bool:
+        """¿Se puede servir sin revalidar?"""
+        return ((now or time.time()) - self.validated_at) < ttl_seconds
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Cabeceras para una petición condicional"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class LearningCache:
+    """Caché en disco de fuentes aprendidas, indexada por URL"""
+
+    def __init__(self, cache_dir: Path, ttl_hours: float = 24.0, max_size_mb: float = 50.0):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.index_path = self.cache_dir / 'index.json'
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.entries: Dict[str, CacheEntry] = {}
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._last_save = time.monotonic()
+        self._load()
+
+    # ---------- Persistencia ----------
+
+    def _load(self) -> None:
+        """Carga el índice (descarta entradas cuyo contenido ya no existe)"""
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return
+            for url, entry in data.get('entries', {}).items():
+                cache_entry = CacheEntry(**entry)
+                if self._object_path(cache_entry.content_hash).exists():
+                    self.entries[url] = cache_entry
+            logger.debug(f"Caché de aprendizaje cargada: {len(self.entries)} URLs")
+        except Exception as e:
+            logger.warning(f"Caché de aprendizaje inválida, se reinicia: {e}")
+            self.entries.clear()
+
+    def save(self) -> None:
+        """Persiste el índice (escritura atómica)"""
+        with self.lock:
+            self._last_save = time.monotonic()
+            data = {
+                'version': INDEX_VERSION,
+                'entries': {url: asdict(entry) for url, entry in self.entries.items()},
+            }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            tmp_path.replace(self.index_path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la caché de aprendizaje: {e}")
+
+    def _object_path(self, content_hash: str) -> Path:
+        return self.objects_dir / f"{content_hash}.txt"
+
+    # ---------- Consulta ----------
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Obtiene la entrada de una URL (fresca o no)"""
+        with self.lock:
+            return self.entries.get(url)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """¿La entrada está dentro del TTL?"""
+        return entry.is_fresh(self.ttl_seconds)
+
+    def read_content(self, entry: CacheEntry) -> Optional[str]:
+        """Lee el contenido extraído de una entrada"""
+        try:
+            return self._object_path(entry.content_hash).read_text(encoding='utf-8')
+        except OSError:
+            with self.lock:
+                self.entries.pop(entry.url, None)
+            return None
+
+    def record_hit(self, entry: CacheEntry, revalidated: bool = False) -> None:
+        """Registra un acierto (y la revalidación 304 si la hubo)"""
+        now = time.time()
+        with self.lock:
+            entry.last_access = now
+            if revalidated:
+                entry.validated_at = now
+                self.revalidations += 1
+            else:
+                self.hits += 1
+            save = revalidated or time.monotonic() - self._last_save >= HIT_SAVE_INTERVAL
+        if save:
+            self.save()
+
+    def record_miss(self) -> None:
+        with self.lock:
+            self.misses += 1
+
+    # ---------- Escritura ----------
+
+    def store(self, url: str, content: str, title: str, tags: List[str], relevance_score: float,
+              etag: Optional[str] = None, last_modified: Optional[str] = None) -> CacheEntry:
+        """Guarda (o reemplaza) lo aprendido de una URL"""
+        raw = content.encode('utf-8')
+        content_hash = hashlib.sha1(raw).hexdigest()
+        now = time.time()
+        entry = CacheEntry(
+            url=url,
+            content_hash=content_hash,
+            title=title,
+            tags=list(tags),
+            relevance_score=relevance_score,
+            size=len(raw),
+            fetched_at=now,
+            validated_at=now,
+            last_access=now,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+        with self.lock:
+            object_path = self._object_path(content_hash)
+            try:
+                if not object_path.exists():
+                    self.objects_dir.mkdir(parents=True, exist_ok=True)
+                    tmp_path = object_path.with_suffix('.tmp')
+                    tmp_path.write_bytes(raw)
+                    tmp_path.replace(object_path)
+            except OSError as e:
+                logger.warning(f"No se pudo cachear {url}: {e}")
+                return entry
+
+            previous = self.entries.get(url)
+            self.entries[url] = entry
+            if previous and previous.content_hash != content_hash:
+                self._release_object(previous.content_hash)
+            self._evict()
+        self.save()
+        return entry
+
+    def _release_object(self, content_hash: str) -> None:
+        """Borra un objeto si ninguna URL lo referencia"""
+        if any(entry.content_hash == content_hash for entry in self.entries.values()):
+            return
+        try:
+            self._object_path(content_hash).unlink()
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Expulsa las entradas menos usadas hasta quedar bajo el tamaño máximo"""
+        # Los objetos compartidos por varias URLs solo ocupan una vez
+        sizes = {entry.content_hash: entry.size for entry in self.entries.values()}
+        total = sum(sizes.values())
+        if total <= self.max_size:
+            return
+
+        for entry in sorted(self.entries.values(), key=lambda e: e.last_access):
+            if total <= self.max_size:
+                break
+            del self.entries[entry.url]
+            if not any(e.content_hash == entry.content_hash for e in self.entries.values()):
+                total -= entry.size
+                self._release_object(entry.content_hash)
+            logger.debug(f"Caché de aprendizaje: expulsada {entry.url}")
+
+    def purge_expired(self, max_age_hours: float) -> int:
+        """Elimina entradas no revalidadas en max_age_hours"""
+        limit = time.time() - max_age_hours * 3600
+        with self.lock:
+            expired = [entry for entry in self.entries.values() if entry.validated_at < limit]
+            for entry in expired:
+                del self.entries[entry.url]
+                self._release_object(entry.content_hash)
+        if expired:
+            self.save()
+        return len(expired)
+
+    def get_stats(self) -> Dict:
+        """Estadísticas de la caché"""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': sum({e.content_hash: e.size for e in self.entries.values()}.values()),
+                'hits': self.hits,
+                'revalidations': self.revalidations,
+                'misses': self.misses,
+            }
@@ -3,6 +3,7 @@ Main Entry Point - F3-OS Governance Agent
 """
 
 import sys
+import json
 import argparse
 import yaml
 from pathlib import Path
@@ -160,6 +161,69 @@ def run_cycle(config: Dict, data_dir: Path):
     show_status(config, data_dir)
 
 
+def replay_history(config: Dict, data_dir: Path, overrides: list, workers: int = None,
+                   simulate_cycle: bool = False, limit: int = None, output: Path = None):
+    """Re-decide el historial de PRs con otra configuración (sin GitHub ni escrituras)"""
+    from .replay_engine import ReplayEngine
+    
+    # --set seccion.clave=valor (el valor se interpreta como YAML)
+    parsed = {}
+    for item in overrides or []:
+        if '=' not in item:
+            print(f"Error: override inválido (se espera clave=valor): {item}")
+            sys.exit(1)
+        key, value = item.split('=', 1)
+        parsed[key.strip()] = yaml.safe_load(value)
+    
+    engine = ReplayEngine(config, data_dir, workers=workers)
+    cases = engine.load()
+    if not cases:
+        print("⚠️  No hay historial de PRs para reproducir")
+        return
+    
+    report = engine.run(parsed, simulate_cycle=simulate_cycle, limit=limit)
+    print(report.summary())
+    for diff in report.diffs[:20]:
+        print(f"   PR #{diff['pr_number']}: {diff['before']} → {diff['after']} "
+              f"(score {diff['score_before']} → {diff['score_after']})")
+    if len(report.diffs) > 20:
+        print(f"   ... y {len(report.diffs) - 20} más")
+    
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+        print(f"💾 Informe guardado en {output}")
+
+
+def run_pr_benchmark(config: Dict, data_dir: Path, iterations: int, save_baseline: bool = False,
+                     output: Path = None):
+    """Benchmark offline de la evaluación de PRs (comparado con la línea base)"""
+    from .pr_benchmark import run_benchmark, format_results, compare, load_results, save_results
+    
+    baseline_path = data_dir / 'benchmarks' / 'baseline.json'
+    print(f"⏱️  Benchmark de evaluación de PRs ({iterations} iteraciones por escenario)...")
+    results = run_benchmark(config, iterations=iterations)
+    print(format_results(results))
+    
+    baseline = load_results(baseline_path)
+    if baseline:
+        tolerance = config.get('benchmark', {}).get('regression_tolerance', 0.2)
+        regressions = compare(results, baseline, tolerance)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} regresiones de p95 (> {tolerance:.0%}) respecto de {baseline['timestamp']}:")
+            for item in regressions:
+                print(f"   {item['scenario']}/{item['stage']}: {item['baseline_p95_us']} → {item['p95_us']} µs")
+        else:
+            print(f"\n✅ Sin regresiones respecto de la línea base ({baseline['timestamp']})")
+    
+    if save_baseline:
+        save_results(results, baseline_path)
+        print(f"💾 Línea base guardada en {baseline_path}")
+    if output:
+        save_results(results, output)
+        print(f"💾 Resultados guardados en {output}")
+
+
 def start_gui_server(config: Dict, data_dir: Path, port: int = 8080):
     """Inicia servidor HTTP para GUI del asistente"""
     print(f"🎨 Iniciando servidor GUI del asistente en puerto {port}...")
@@ -167,16 +231,16 @@ def start_gui_server(config: Dict, data_dir: Path, port: int = 8080):
     
     from .gui_server import GUIServer
     
-    governance = GovernanceCore(config, data_dir)
-    resource_manager = ResourceManager(config)
-    resource_manager.start_monitoring()
-    
     # Agregar project_root al config si no está presente
     if 'project_root' not in config:
         # Calcular project_root: agent/src/main.py -> agent/ -> f3-os/
         project_root = Path(__file__).resolve().parent.parent.parent
         config['project_root'] = str(project_root)
     
+    governance = GovernanceCore(config, data_dir)
+    resource_manager = ResourceManager(config)
+    resource_manager.start_monitoring()
+    
     from .gui_integration import GUIIntegration
     gui = GUIIntegration(governance, resource_manager, config)
     
@@ -185,6 +249,9 @@ def start_gui_server(config: Dict, data_dir: Path, port: int = 8080):
     # Iniciar trabajador autónomo
     governance.autonomous_worker.start()
     
+    # Vigilar cambios en documentación, reglas, configuración y kernel
+    governance.start_file_watcher()
+    
     server = GUIServer(gui, port=port)
     server.start()
     
@@ -198,6 +265,7 @@ def start_gui_server(config: Dict, data_dir: Path, port: int = 8080):
     except KeyboardInterrupt:
         print("\n🛑 Deteniendo servidor...")
         governance.autonomous_worker.stop()
+        governance.stop_file_watcher()
         server.stop()
         resource_manager.stop_monitoring()
 
@@ -210,7 +278,7 @@ def main():
     
     parser.add_argument(
         'command',
-        choices=['evaluate-pr', 'monitor', 'status', 'cycle', 'gui-server'],
+        choices=['evaluate-pr', 'monitor', 'status', 'cycle', 'gui-server', 'replay', 'benchmark'],
         help='Comando a ejecutar'
     )
     
@@ -247,6 +315,51 @@ def main():
         help='Puerto para servidor GUI (para gui-server)'
     )
     
+    parser.add_argument(
+        '--set',
+        action='append',
+        default=[],
+        metavar='CLAVE=VALOR',
+        help='Override de configuración para replay (p. ej. evaluation.max_pr_size=400)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Procesos para el análisis en replay (por defecto: núcleos disponibles)'
+    )
+    
+    parser.add_argument(
+        '--simulate-cycle',
+        action='store_true',
+        help='En replay, recalcular la fase del ciclo en lugar de usar la registrada'
+    )
+    
+    parser.add_argument(
+        '--limit',
+        type=int,
+        help='En replay, solo los últimos N PRs'
+    )
+    
+    parser.add_argument(
+        '--output',
+        type=Path,
+        help='Guardar el informe completo en JSON (replay, benchmark)'
+    )
+    
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=200,
+        help='PRs sintéticos por escenario (para benchmark)'
+    )
+    
+    parser.add_argument(
+        '--save-baseline',
+        action='store_true',
+        help='Guardar el resultado como línea base (para benchmark)'
+    )
+    
     args = parser.parse_args()
     
     # Cargar configuración
@@ -279,6 +392,13 @@ def main():
     
     elif args.command == 'gui-server':
         start_gui_server(config, args.data_dir, args.port)
+    
+    elif args.command == 'replay':
+        replay_history(config, args.data_dir, args.set, args.workers,
+                       args.simulate_cycle, args.limit, args.output)
+    
+    elif args.command == 'benchmark':
+        run_pr_benchmark(config, args.data_dir, args.iterations, args.save_baseline, args.output)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,276 @@
+"""
+Metrics - Contadores, gauges e histogramas en formato de exposición de Prometheus
+
+Métricas operativas del agente para GET /metrics (sin dependencias externas):
+- Counter e Histogram escriben en un shard por hilo (threading.local): cada hilo
+  actualiza solo su dict, sin lock; el lock se toma una vez por hilo y métrica
+  (al crear el shard) y al exportar
+- Al exportar se suman los shards; los de hilos terminados se pliegan en un
+  acumulado para que la lista no crezca con cada hilo de petición HTTP
+- Gauge guarda el último valor (asignación simple) o lo calcula al exportar con
+  una función; Counter también acepta una función (contadores de otros módulos)
+- render() produce el formato de texto 0.0.4 (HELP, TYPE, muestras con etiquetas)
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Segundos: de 1 ms a 10 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value is None or math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str, quote: bool = True) -> str:
+    value = value.replace('\\', '\\\\').replace('\n', '\\n')
+    return value.replace('"', '\\"') if quote else value
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Shards:
+    """Un dict por hilo; los de hilos terminados se pliegan en `retired`"""
+
+    def __init__(self, fold: Callable[[Dict, LabelKey, Any], None]):
+        self.fold = fold
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.shards: List[Tuple[threading.Thread, Dict]] = []
+        self.retired: Dict = {}
+
+    def shard(self) -> Dict:
+        try:
+            return self.local.values
+        except AttributeError:
+            values = self.local.values = {}
+            with self.lock:
+                self.shards.append((threading.current_thread(), values))
+            return values
+
+    def merged(self) -> Dict:
+        with self.lock:
+            alive = []
+            for thread, values in self.shards:
+                if thread.is_alive():
+                    alive.append((thread, values))
+                else:
+                    for key, value in values.items():
+                        self.fold(self.retired, key, value)
+            self.shards = alive
+            result: Dict = {}
+            for key, value in self.retired.items():
+                self.fold(result, key, value)
+            for _, values in alive:
+                for key, value in values.copy().items():  # copy(): atómico frente al hilo dueño
+                    self.fold(result, key, value)
+        return result
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.function = function
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: etiquetas esperadas {self.labelnames}, recibidas {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _function_samples(self) -> Dict[LabelKey, float]:
+        """Valores calculados al exportar: número (sin etiquetas) o dict etiquetas -> valor"""
+        try:
+            result = self.function()
+        except Exception as e:
+            logger.warning(f"⚠️  Métrica {self.name} no disponible: {e}")
+            return {}
+        if result is None:
+            return {}
+        if isinstance(result, dict):
+            return {(key if isinstance(key, tuple) else (str(key),)): value
+                    for key, value in result.items() if value is not None}
+        return {(): result}
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.help, quote=False)}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+def _add(target: Dict, key: LabelKey, value: float) -> None:
+    target[key] = target.get(key, 0.0) + value
+
+
+class Counter(_Metric):
+    """Contador monótono"""
+
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._shards = _Shards(_add)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels) if labels or self.labelnames else ()
+        values = self._shards.shard()
+        values[key] = values.get(key, 0.0) + amount
+
+    def values(self) -> Dict[LabelKey, float]:
+        merged = self._shards.merged()
+        if self.function is not None:
+            for key, value in self._function_samples().items():
+                _add(merged, key, value)
+        return merged
+
+    def samples(self) -> Iterable[str]:
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{_labels_text(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Valor instantáneo (último asignado o calculado al exportar)"""
+
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels) if labels or self.labelnames else ()] = value
+
+    def values(self) -> Dict[LabelKey, float]:
+        values = dict(self._values)
+        if self.function is not None:
+            values.update(self._function_samples())
+        return values
+
+    def samples(self) -> Iterable[str]:
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{_labels_text(self.labelnames, key)} {_format_value(value)}"
+
+
+def _add_row(target: Dict, key: LabelKey, row: List[float]) -> None:
+    current = target.get(key)
+    if current is None:
+        target[key] = list(row)
+    else:
+        for index, value in enumerate(row):
+            current[index] += value
+
+
+class Histogram(_Metric):
+    """Distribución por buckets acumulados (le), con suma y conteo"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _Shards(_add_row)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels) if labels or self.labelnames else ()
+        values = self._shards.shard()
+        row = values.get(key)
+        if row is None:
+            row = values[key] = [0.0] * (len(self.buckets) + 2)  # buckets, +Inf, suma
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observa la duración del bloque (segundos)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterable[str]:
+        for key, row in sorted(self._shards.merged().items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), row[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_labels_text(self.labelnames, key, le)} {_format_value(cumulative)}"
+            yield f"{self.name}_sum{_labels_text(self.labelnames, key)} {_format_value(row[-1])}"
+            yield f"{self.name}_count{_labels_text(self.labelnames, key)} {_format_value(cumulative)}"
+
+
+class MetricsRegistry:
+    """Registro de métricas; registrar dos veces el mismo nombre devuelve la existente"""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs) -> Any:
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrica {name} ya registrada como {metric.kind}")
+            elif kwargs.get('function') is not None:
+                metric.function = kwargs['function']  # p. ej. al reiniciar el servidor
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                function: Optional[Callable[[], Any]] = None) -> Counter:
+        return self._register(Counter, name, help_text, labelnames, function=function)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], Any]] = None) -> Gauge:
+        return self._register(Gauge, name, help_text, labelnames, function=function)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Todas las métricas en formato de exposición de texto"""
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda m: m.name)
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Obtiene el registro global de métricas"""
+    return _registry
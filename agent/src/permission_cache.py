@@ -0,0 +1,110 @@
+"""
+Permission Cache - Caché de decisiones de permisos del ejecutor
+
+Memoriza el resultado de las reglas para cada (acción, contexto):
+- La clave es una huella normalizada del contexto (rutas normalizadas,
+  listas como tuplas, claves ordenadas)
+- Expulsión LRU al superar el máximo de entradas
+- Se vacía sola cuando cambia la versión de las reglas (recarga, add_rule)
+  y explícitamente con clear() al recargar la configuración
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Claves del contexto que contienen rutas (se normalizan)
+PATH_KEYS = ('file_path',)
+
+Decision = Tuple[bool, Optional[str]]
+
+
+def _freeze(value: Any) -> Hashable:
+    """Versión hashable y canónica de un valor del contexto (TypeError si no es posible)"""
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    raise TypeError(f"valor no cacheable: {type(value).__name__}")
+
+
+def fingerprint(action: str, context: Dict) -> Optional[Hashable]:
+    """Huella normalizada de una consulta (None si el contexto no es cacheable)"""
+    try:
+        items = []
+        for key, value in context.items():
+            if key in PATH_KEYS and isinstance(value, str) and value:
+                value = os.path.normpath(value)
+            items.append((key, _freeze(value)))
+        items.sort()
+    except TypeError:
+        return None
+    return action, tuple(items)
+
+
+class PermissionCache:
+    """Caché LRU de decisiones de las reglas, ligada a una versión de reglas"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max(1, max_entries)
+        self.entries: 'OrderedDict[Hashable, Decision]' = OrderedDict()
+        self.rules_version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, rules_version: int) -> Optional[Decision]:
+        """Decisión memorizada para una huella (None si no está)"""
+        with self.lock:
+            if rules_version != self.rules_version:
+                self._reset(rules_version)
+            decision = self.entries.get(key)
+            if decision is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return decision
+
+    def put(self, key: Hashable, rules_version: int, decision: Decision) -> None:
+        with self.lock:
+            if rules_version != self.rules_version:
+                self._reset(rules_version)
+            self.entries[key] = decision
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _reset(self, rules_version: Optional[int]) -> None:
+        if self.entries:
+            self.invalidations += 1
+            logger.debug(f"Caché de permisos invalidada ({len(self.entries)} decisiones)")
+        self.entries.clear()
+        self.rules_version = rules_version
+
+    def clear(self) -> None:
+        """Olvida todas las decisiones (p. ej. al recargar la configuración)"""
+        with self.lock:
+            self._reset(None)
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
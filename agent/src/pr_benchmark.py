@@ -0,0 +1,335 @@
+"""
+PR Benchmark - Benchmark de la ruta de evaluación de PRs
+
+Mide cada etapa de GovernanceCore.evaluate_pr con PRs sintéticos, sin GitHub ni
+throttling (offline, sin token):
+- Escenarios: diff pequeño, diff grande, muchos archivos, núcleo sagrado y
+  términos prohibidos densos (generados con semilla fija: siempre los mismos PRs)
+- Etapas: analyze_pr, get_similar_decisions, synthesize, _make_decision, record_decision
+  (el ContextManager escribe en un directorio temporal con historial sembrado)
+- Tiempos: p50/p95/p99 por etapa y del total, en microsegundos
+- Asignaciones: pasada aparte con tracemalloc (pico y memoria retenida por etapa),
+  porque tracemalloc ralentiza la ejecución
+- Línea base en JSON: compare() marca las etapas cuyo p95 empeora más que la tolerancia
+"""
+
+import io
+import json
+import platform
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+import logging
+
+from .code_analyzer import CodeAnalyzer
+from .context_manager import ContextManager
+from .decision_policy import make_decision
+from .development_phase import DevelopmentCycle
+from .synthesis_engine import SynthesisEngine
+from .tracing import percentile
+
+logger = logging.getLogger(__name__)
+
+
+BENCHMARK_VERSION = 1
+
+STAGES = ('analyze_pr', 'get_similar_decisions', 'synthesize', '_make_decision', 'record_decision')
+
+# Las diferencias de p95 por debajo de este umbral se consideran ruido (microsegundos)
+NOISE_FLOOR_US = 5.0
+
+NEUTRAL_WORDS = ('fn', 'let', 'mut', 'self', 'return', 'match', 'impl', 'pub', 'use',
+                 'scheduler', 'buffer', 'page', 'frame', 'index', 'value', 'state')
+
+
+# ---------- Generadores de PRs sintéticos ----------
+
+def _diff_lines(rng: random.Random, count: int, vocabulary: Sequence[str],
+                forbidden: Sequence[str] = (), forbidden_rate: float = 0.0) -> List[str]:
+    lines = []
+    for _ in range(count):
+        words = [rng.choice(NEUTRAL_WORDS) for _ in range(rng.randint(3, 10))]
+        if vocabulary and rng.random() < 0.2:
+            words.insert(rng.randrange(len(words)), rng.choice(vocabulary))
+        if forbidden and rng.random() < forbidden_rate:
+            words.insert(rng.randrange(len(words)), rng.choice(forbidden))
+        lines.append('+    ' + ' '.join(words))
+    return lines
+
+
+def _make_pr(number: int, files: List[str], lines: List[str]) -> Dict:
+    per_file = max(1, len(lines) // max(1, len(files)))
+    diff = []
+    for index, filename in enumerate(files):
+        diff.append(f"--- a/{filename}")
+        diff.append(f"+++ b/{filename}")
+        diff.extend(lines[index * per_file:(index + 1) * per_file])
+    diff.extend(lines[len(files) * per_file:])
+    return {
+        'number': number,
+        'title': f"PR sintético #{number}",
+        'user': 'benchmark',
+        'files': [{'filename': f, 'status': 'modified', 'additions': per_file, 'deletions': 0,
+                   'changes': per_file} for f in files],
+        'diff': '\n'.join(diff),
+    }
+
+
+def _source_files(rng: random.Random, count: int) -> List[str]:
+    return [f"kernel/src/{rng.choice(('mm', 'sched', 'drivers', 'fs'))}/mod_{i}.rs" for i in range(count)]
+
+
+def small_diff(rng: random.Random, config: Dict, number: int) -> Dict:
+    vocabulary = config.get('f3_model', {}).get('vocabulary', [])
+    return _make_pr(number, _source_files(rng, rng.randint(1, 2)), _diff_lines(rng, rng.randint(5, 40), vocabulary))
+
+
+def large_diff(rng: random.Random, config: Dict, number: int) -> Dict:
+    vocabulary = config.get('f3_model', {}).get('vocabulary', [])
+    return _make_pr(number, _source_files(rng, rng.randint(3, 6)), _diff_lines(rng, rng.randint(400, 1500), vocabulary))
+
+
+def many_files(rng: random.Random, config: Dict, number: int) -> Dict:
+    vocabulary = config.get('f3_model', {}).get('vocabulary', [])
+    return _make_pr(number, _source_files(rng, rng.randint(60, 200)), _diff_lines(rng, rng.randint(100, 300), vocabulary))
+
+
+def sacred_core(rng: random.Random, config: Dict, number: int) -> Dict:
+    model = config.get('f3_model', {})
+    sacred = list(model.get('sacred_core', [])) or ['kernel/src/f3/core.rs']
+    files = rng.sample(sacred, min(len(sacred), rng.randint(1, 3))) + _source_files(rng, rng.randint(0, 3))
+    return _make_pr(number, files, _diff_lines(rng, rng.randint(20, 200), model.get('vocabulary', [])))
+
+
+def forbidden_dense(rng: random.Random, config: Dict, number: int) -> Dict:
+    model = config.get('f3_model', {})
+    forbidden = list(model.get('forbidden_terms', [])) or ['threads']
+    lines = _diff_lines(rng, rng.randint(50, 300), model.get('vocabulary', []), forbidden, forbidden_rate=0.6)
+    return _make_pr(number, _source_files(rng, rng.randint(1, 8)), lines)
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, Dict, int], Dict]] = {
+    'small_diff': small_diff,
+    'large_diff': large_diff,
+    'many_files': many_files,
+    'sacred_core': sacred_core,
+    'forbidden_dense': forbidden_dense,
+}
+
+
+# ---------- Estadísticas ----------
+
+def _summarize(samples_ns: List[int]) -> Dict:
+    values = sorted(ns / 1000 for ns in samples_ns)
+    return {
+        'p50_us': round(percentile(values, 0.50), 2),
+        'p95_us': round(percentile(values, 0.95), 2),
+        'p99_us': round(percentile(values, 0.99), 2),
+        'mean_us': round(sum(values) / len(values), 2) if values else 0.0,
+        'max_us': round(values[-1], 2) if values else 0.0,
+    }
+
+
+# ---------- Pipeline ----------
+
+class _Pipeline:
+    """Mismas etapas que GovernanceCore.evaluate_pr, sin throttling ni GitHub"""
+
+    def __init__(self, config: Dict, data_dir: Path, history: int, rng: random.Random):
+        self.config = config
+        self.code_analyzer = CodeAnalyzer(config)
+        self.context_manager = ContextManager(config, data_dir)
+        self.synthesis_engine = SynthesisEngine(config)
+        self.development_cycle = DevelopmentCycle(config)
+
+        # Historial sembrado: get_similar_decisions y record_decision trabajan sobre datos reales
+        for number in range(history):
+            metrics = self.code_analyzer.analyze_pr([], '\n'.join(_diff_lines(rng, rng.randint(1, 300), ())))
+            self.context_manager.decisions.append({
+                'pr_number': -number - 1,
+                'decision': rng.choice(('approve', 'request_changes', 'reject')),
+                'reason': '',
+                'timestamp': datetime.now().isoformat(),
+                'metrics': metrics,
+            })
+
+    def evaluate(self, pr_data: Dict, timings: Dict[str, List[int]], measure: Callable) -> None:
+        code_metrics = measure('analyze_pr', timings, lambda: self.code_analyzer.analyze_pr(
+            pr_data.get('files', []), pr_data.get('diff', '')))
+        similar_decisions = measure('get_similar_decisions', timings,
+                                    lambda: self.context_manager.get_similar_decisions(code_metrics))
+        context_info = {
+            'similar_decisions': similar_decisions,
+            'project_context': self.context_manager.context,
+        }
+        phase_state = self.development_cycle.get_state()
+        phase_info = {
+            'current_phase': phase_state.phase.value,
+            'should_allow_experimentation': self.development_cycle.should_allow_experimentation(),
+            'should_enforce_strictness': self.development_cycle.should_enforce_strictness(),
+            'entropy': phase_state.entropy,
+            'perfection_score': phase_state.perfection_score,
+        }
+        synthesis = measure('synthesize', timings,
+                            lambda: self.synthesis_engine.synthesize(code_metrics, context_info, phase_info))
+        decision = measure('_make_decision', timings,
+                           lambda: make_decision(self.config, synthesis, code_metrics, pr_data))
+        measure('record_decision', timings, lambda: self.context_manager.record_decision(
+            pr_data.get('number', 0), decision['action'], decision['reason'], code_metrics))
+        self.development_cycle.process_pr({
+            'approved': decision['action'] == 'approve',
+            'experimental': phase_info['should_allow_experimentation'],
+        })
+
+
+def _timed(stage: str, timings: Dict[str, List[int]], func: Callable):
+    start = time.perf_counter_ns()
+    result = func()
+    timings.setdefault(stage, []).append(time.perf_counter_ns() - start)
+    return result
+
+
+def _traced(stage: str, allocations: Dict[str, List[int]], func: Callable):
+    """Ejecuta la etapa con tracemalloc activo: guarda (pico, retenido) en bytes"""
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    allocations.setdefault(stage, []).append((peak - before, current - before))
+    return result
+
+
+def _run_scenario(name: str, config: Dict, iterations: int, warmup: int, alloc_iterations: int,
+                  history: int, seed: int) -> Dict:
+    generator = SCENARIOS[name]
+    rng = random.Random(f"{seed}:{name}")
+    prs = [generator(rng, config, number) for number in range(1, iterations + warmup + 1)]
+
+    data_dir = Path(tempfile.mkdtemp(prefix=f"pr_benchmark_{name}_"))
+    try:
+        # Pasada de tiempos (sin tracemalloc)
+        pipeline = _Pipeline(config, data_dir / 'timing', history, random.Random(seed))
+        timings: Dict[str, List[int]] = {}
+        for pr_data in prs[:warmup]:
+            pipeline.evaluate(pr_data, {}, _timed)
+        for pr_data in prs[warmup:]:
+            pipeline.evaluate(pr_data, timings, _timed)
+
+        # Pasada de asignaciones (con tracemalloc, sobre un pipeline nuevo)
+        pipeline = _Pipeline(config, data_dir / 'alloc', history, random.Random(seed))
+        allocations: Dict[str, List] = {}
+        tracemalloc.start()
+        try:
+            for pr_data in prs[warmup:warmup + alloc_iterations]:
+                pipeline.evaluate(pr_data, allocations, _traced)
+        finally:
+            tracemalloc.stop()
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    totals = [sum(timings[stage][i] for stage in STAGES) for i in range(iterations)]
+    stages = {}
+    for stage in STAGES:
+        stats = _summarize(timings[stage])
+        samples = allocations.get(stage, [])
+        if samples:
+            stats['alloc_peak_kb'] = round(sum(peak for peak, _ in samples) / len(samples) / 1024, 2)
+            stats['alloc_retained_kb'] = round(sum(kept for _, kept in samples) / len(samples) / 1024, 2)
+        stages[stage] = stats
+    return {
+        'iterations': iterations,
+        'mean_diff_lines': round(sum(pr['diff'].count('\n') + 1 for pr in prs) / len(prs), 1),
+        'mean_files': round(sum(len(pr['files']) for pr in prs) / len(prs), 1),
+        'stages': stages,
+        'total': _summarize(totals),
+    }
+
+
+def run_benchmark(config: Dict, scenarios: Optional[Sequence[str]] = None, iterations: int = 200,
+                  warmup: int = 20, alloc_iterations: int = 30, history: int = 200,
+                  seed: int = 42) -> Dict:
+    """Ejecuta los escenarios y devuelve los resultados (serializables a JSON)"""
+    names = list(scenarios or SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Escenarios desconocidos: {', '.join(unknown)}")
+
+    results = {
+        'version': BENCHMARK_VERSION,
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'iterations': iterations, 'warmup': warmup, 'alloc_iterations': alloc_iterations,
+                     'history': history, 'seed': seed},
+        'scenarios': {},
+    }
+    # DevelopmentCycle anuncia sus transiciones con print
+    with redirect_stdout(io.StringIO()):
+        for name in names:
+            results['scenarios'][name] = _run_scenario(
+                name, config, iterations, warmup, min(alloc_iterations, iterations), history, seed)
+    return results
+
+
+# ---------- Línea base ----------
+
+def save_results(results: Dict, path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    tmp_path.replace(path)
+
+
+def load_results(path: Path) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get('version') == BENCHMARK_VERSION else None
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = 0.2) -> List[Dict]:
+    """Etapas cuyo p95 empeora más que `tolerance` (fracción) respecto de la línea base"""
+    regressions = []
+    for name, scenario in results.get('scenarios', {}).items():
+        base_scenario = baseline.get('scenarios', {}).get(name)
+        if not base_scenario:
+            continue
+        stages = dict(scenario['stages'], total=scenario['total'])
+        base_stages = dict(base_scenario['stages'], total=base_scenario['total'])
+        for stage, stats in stages.items():
+            base = base_stages.get(stage)
+            if not base:
+                continue
+            current, previous = stats['p95_us'], base['p95_us']
+            if current - previous > NOISE_FLOOR_US and current > previous * (1 + tolerance):
+                regressions.append({
+                    'scenario': name,
+                    'stage': stage,
+                    'baseline_p95_us': previous,
+                    'p95_us': current,
+                    'change': round(current / previous - 1, 3) if previous else None,
+                })
+    return regressions
+
+
+def format_results(results: Dict) -> str:
+    """Tabla legible: una fila por etapa y escenario"""
+    lines = [f"{'escenario':<16} {'etapa':<22} {'p50 µs':>10} {'p95 µs':>10} {'p99 µs':>10} "
+             f"{'pico KB':>9} {'retenido KB':>12}"]
+    for name, scenario in results['scenarios'].items():
+        for stage in STAGES + ('total',):
+            stats = scenario['total'] if stage == 'total' else scenario['stages'][stage]
+            lines.append(f"{name:<16} {stage:<22} {stats['p50_us']:>10.1f} {stats['p95_us']:>10.1f} "
+                         f"{stats['p99_us']:>10.1f} {stats.get('alloc_peak_kb', ''):>9} "
+                         f"{stats.get('alloc_retained_kb', ''):>12}")
+    return '\n'.join(lines)
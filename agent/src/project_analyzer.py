@@ -6,10 +6,14 @@ Lee y analiza documentación del proyecto para dar respuestas basadas en el cont
 
 import os
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import List, Optional, Tuple
 from pathlib import Path
 import logging
 
+from .doc_index import get_document_index
+from .document_store import get_document_store
+from .section_index import get_section_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,58 +42,29 @@ class ProjectAnalyzer:
         else:
             self.project_root = Path(project_root)
         
-        # Cache de archivos leídos
-        self._file_cache: Dict[str, str] = {}
-        self._sections_cache: Dict[str, Dict[str, str]] = {}
+        # Almacén compartido de documentos (carga perezosa, revalidado por mtime/tamaño)
+        self.document_store = get_document_store(self.project_root)
+        # Índice persistente de secciones (árbol de encabezados por archivo)
+        self.section_index = get_section_index(self.project_root)
+        
+        # Índice invertido compartido para búsquedas
+        self.document_index = get_document_index(self.project_root)
         
         logger.info(f"Project Analyzer inicializado en: {self.project_root}")
     
     def _read_file(self, filename: str) -> Optional[str]:
-        """Lee un archivo del proyecto (con cache)"""
-        if filename in self._file_cache:
-            return self._file_cache[filename]
-        
-        filepath = self.project_root / filename
-        if not filepath.exists():
-            logger.warning(f"Archivo no encontrado: {filepath}")
-            return None
-        
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self._file_cache[filename] = content
-            return content
-        except Exception as e:
-            logger.error(f"Error leyendo {filename}: {e}")
-            return None
+        """Lee un archivo del proyecto (vía DocumentStore, siempre fresco)"""
+        content = self.document_store.get(filename)
+        if content is None:
+            logger.warning(f"Archivo no encontrado: {self.project_root / filename}")
+        return content
     
-    def _extract_sections(self, content: str) -> Dict[str, str]:
-        """Extrae secciones de un documento Markdown"""
-        sections = {}
-        current_section = "introducción"
-        current_content = []
-        
-        lines = content.split('\n')
-        for line in lines:
-            # Detectar encabezados
-            if line.startswith('#'):
-                # Guardar sección anterior
-                if current_content:
-                    sections[current_section] = '\n'.join(current_content).strip()
-                
-                # Nueva sección
-                level = len(line) - len(line.lstrip('#'))
-                title = line.lstrip('#').strip()
-                current_section = title.lower()
-                current_content = []
-            else:
-                current_content.append(line)
-        
-        # Guardar última sección
-        if current_content:
-            sections[current_section] = '\n'.join(current_content).strip()
-        
-        return sections
+    def _find_section(self, file_key: str, section_title: str) -> Optional[str]:
+        """Obtiene una sección por título exacto (normalizado) desde el índice de secciones"""
+        filename = self.KEY_FILES.get(file_key)
+        if not filename:
+            return None
+        return self.section_index.get_section(filename, section_title, fuzzy=False)
     
     def get_file_content(self, file_key: str) -> Optional[str]:
         """Obtiene contenido de un archivo clave"""
@@ -99,43 +74,21 @@ class ProjectAnalyzer:
         return self._read_file(filename)
     
     def get_section(self, file_key: str, section_title: str) -> Optional[str]:
-        """Obtiene una sección específica de un archivo"""
+        """Obtiene una sección específica de un archivo (búsqueda flexible de título)"""
         filename = self.KEY_FILES.get(file_key)
         if not filename:
             return None
-        
-        # Cache de secciones
-        cache_key = f"{file_key}:{section_title}"
-        if cache_key in self._sections_cache:
-            return self._sections_cache[cache_key]
-        
-        content = self._read_file(filename)
-        if not content:
-            return None
-        
-        sections = self._extract_sections(content)
-        
-        # Buscar sección (búsqueda flexible)
-        section_lower = section_title.lower()
-        for section_name, section_content in sections.items():
-            if section_lower in section_name or section_name in section_lower:
-                self._sections_cache[cache_key] = section_content
-                return section_content
-        
-        return None
+        return self.section_index.get_section(filename, section_title, fuzzy=True)
     
     def get_rules(self) -> str:
         """Obtiene todas las reglas del proyecto"""
         rules_parts = []
         
-        # Reglas del manifiesto
-        manifesto = self.get_file_content('manifesto')
-        if manifesto:
-            # Extraer principios fundamentales
-            manifesto_sections = self._extract_sections(manifesto)
-            if 'principios fundamentales' in manifesto_sections:
-                rules_parts.append("## Principios Fundamentales (del Manifiesto)")
-                rules_parts.append(manifesto_sections['principios fundamentales'])
+        # Reglas del manifiesto: principios fundamentales
+        principles = self._find_section('manifesto', 'principios fundamentales')
+        if principles is not None:
+            rules_parts.append("## Principios Fundamentales (del Manifiesto)")
+            rules_parts.append(principles)
         
         # Reglas de lógica
         reglas = self.get_file_content('reglas')
@@ -146,20 +99,16 @@ class ProjectAnalyzer:
             rules_parts.append('\n'.join(reglas_lines))
         
         # Reglas de contribución
-        contributing = self.get_file_content('contributing')
-        if contributing:
-            contributing_sections = self._extract_sections(contributing)
-            if 'reglas fundamentales' in contributing_sections:
-                rules_parts.append("\n## Reglas de Contribución")
-                rules_parts.append(contributing_sections['reglas fundamentales'])
+        contributing_rules = self._find_section('contributing', 'reglas fundamentales')
+        if contributing_rules is not None:
+            rules_parts.append("\n## Reglas de Contribución")
+            rules_parts.append(contributing_rules)
         
         # Reglas de gobernanza
-        governance = self.get_file_content('governance')
-        if governance:
-            governance_sections = self._extract_sections(governance)
-            if 'núcleo sagrado' in governance_sections:
-                rules_parts.append("\n## Reglas de Gobernanza (Núcleo Sagrado)")
-                rules_parts.append(governance_sections['núcleo sagrado'])
+        sacred_core = self._find_section('governance', 'núcleo sagrado')
+        if sacred_core is not None:
+            rules_parts.append("\n## Reglas de Gobernanza (Núcleo Sagrado)")
+            rules_parts.append(sacred_core)
         
         return '\n\n'.join(rules_parts) if rules_parts else "No se encontraron reglas documentadas."
     
@@ -168,20 +117,16 @@ class ProjectAnalyzer:
         explanation_parts = []
         
         # Del manifiesto
-        manifesto = self.get_file_content('manifesto')
-        if manifesto:
-            manifesto_sections = self._extract_sections(manifesto)
-            if 'el modelo f3' in manifesto_sections:
-                explanation_parts.append("## El Modelo F3 (del Manifiesto)")
-                explanation_parts.append(manifesto_sections['el modelo f3'])
+        f3_model = self._find_section('manifesto', 'el modelo f3')
+        if f3_model is not None:
+            explanation_parts.append("## El Modelo F3 (del Manifiesto)")
+            explanation_parts.append(f3_model)
         
         # De reglas de lógica
-        reglas = self.get_file_content('reglas')
-        if reglas:
-            reglas_sections = self._extract_sections(reglas)
-            if 'el ciclo de 4 fases' in reglas_sections:
-                explanation_parts.append("\n## El Ciclo de 4 Fases")
-                explanation_parts.append(reglas_sections['el ciclo de 4 fases'])
+        cycle = self._find_section('reglas', 'el ciclo de 4 fases')
+        if cycle is not None:
+            explanation_parts.append("\n## El Ciclo de 4 Fases")
+            explanation_parts.append(cycle)
         
         return '\n\n'.join(explanation_parts) if explanation_parts else "No se encontró explicación del modelo F3."
     
@@ -190,16 +135,15 @@ class ProjectAnalyzer:
         parts = []
         
         # 1. ¿Qué es F3-OS?
-        manifesto = self.get_file_content('manifesto')
-        if manifesto:
-            manifesto_sections = self._extract_sections(manifesto)
-            if '¿qué es f3-os?' in manifesto_sections:
-                parts.append("# ¿Qué es F3-OS?")
-                parts.append(manifesto_sections['¿qué es f3-os?'])
-            
-            if '¿qué no es f3-os?' in manifesto_sections:
-                parts.append("\n# ¿Qué NO es F3-OS?")
-                parts.append(manifesto_sections['¿qué no es f3-os?'])
+        what_is = self._find_section('manifesto', '¿qué es f3-os?')
+        if what_is is not None:
+            parts.append("# ¿Qué es F3-OS?")
+            parts.append(what_is)
+        
+        what_is_not = self._find_section('manifesto', '¿qué no es f3-os?')
+        if what_is_not is not None:
+            parts.append("\n# ¿Qué NO es F3-OS?")
+            parts.append(what_is_not)
         
         # 2. El Modelo F3
         f3_explanation = self.get_f3_model_explanation()
@@ -207,11 +151,10 @@ class ProjectAnalyzer:
             parts.append(f"\n{f3_explanation}")
         
         # 3. Principios
-        if manifesto:
-            manifesto_sections = self._extract_sections(manifesto)
-            if 'principios fundamentales' in manifesto_sections:
-                parts.append("\n# Principios Fundamentales")
-                parts.append(manifesto_sections['principios fundamentales'])
+        principles = self._find_section('manifesto', 'principios fundamentales')
+        if principles is not None:
+            parts.append("\n# Principios Fundamentales")
+            parts.append(principles)
         
         return '\n\n'.join(parts) if parts else "No se pudo generar explicación completa."
     
@@ -220,33 +163,20 @@ class ProjectAnalyzer:
         if file_keys is None:
             file_keys = list(self.KEY_FILES.keys())
         
-        results = []
-        query_lower = query.lower()
+        filenames = [self.KEY_FILES[key] for key in file_keys if key in self.KEY_FILES]
+        if not filenames:
+            return []
         
-        for file_key in file_keys:
-            filename = self.KEY_FILES.get(file_key)
-            if not filename:
-                continue
-            
-            content = self._read_file(filename)
-            if not content:
-                continue
-            
-            # Buscar líneas que contengan la query
-            lines = content.split('\n')
-            matching_lines = []
-            for i, line in enumerate(lines):
-                if query_lower in line.lower():
-                    # Contexto: 2 líneas antes y después
-                    start = max(0, i - 2)
-                    end = min(len(lines), i + 3)
-                    context = '\n'.join(lines[start:end])
-                    matching_lines.append(context)
-            
-            if matching_lines:
-                results.append((filename, '\n\n---\n\n'.join(matching_lines[:5])))  # Máximo 5 matches por archivo
+        # Búsqueda rankeada en el índice (máximo 5 fragmentos por archivo)
+        search_results = self.document_index.search(
+            query, limit=len(filenames), paths=filenames, max_snippets=5, context_lines=2
+        )
         
-        return results
+        return [
+            (result.path, '\n\n---\n\n'.join(result.snippets))
+            for result in search_results
+            if result.snippets
+        ]
     
     def get_project_summary(self) -> str:
         """Obtiene un resumen general del proyecto"""
@@ -260,11 +190,9 @@ class ProjectAnalyzer:
             summary_parts.append('\n'.join(readme_lines))
         
         # Del manifiesto
-        manifesto = self.get_file_content('manifesto')
-        if manifesto:
-            manifesto_sections = self._extract_sections(manifesto)
-            if '¿qué es f3-os?' in manifesto_sections:
-                summary_parts.append("\n" + manifesto_sections['¿qué es f3-os?'])
+        what_is = self._find_section('manifesto', '¿qué es f3-os?')
+        if what_is is not None:
+            summary_parts.append("\n" + what_is)
         
         return '\n\n'.join(summary_parts) if summary_parts else "No se pudo generar resumen."
 
@@ -11,12 +11,17 @@ Carga TODA la información del proyecto como regla de configuración primaria:
 
 import os
 import re
+import threading
 from typing import Dict, List, Optional, Set, Tuple
 from pathlib import Path
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from .doc_index import get_document_index
+from .document_store import get_document_store
+from .tracing import traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -99,62 +104,79 @@ class ProjectKnowledgeBase:
         else:
             self.project_root = Path(project_root)
         
-        self.knowledge = ProjectKnowledge(root_path=self.project_root)
+        # Almacén compartido de documentos (carga perezosa, revalidado por mtime/tamaño)
+        self.document_store = get_document_store(self.project_root)
+        
+        # Índice invertido compartido (BM25) sobre toda la documentación
+        self.document_index = get_document_index(self.project_root)
         
-        logger.info(f"Project Knowledge Base inicializando en: {self.project_root}")
+        # El conocimiento se carga en el primer acceso y se recarga si cambian los archivos
+        self._knowledge: Optional[ProjectKnowledge] = None
+        self._knowledge_signature: Optional[Tuple] = None
+        self._load_lock = threading.RLock()
         
-        # Cargar TODO el conocimiento al inicio
-        self._load_complete_knowledge()
+        logger.info(f"Project Knowledge Base inicializada en: {self.project_root} (carga perezosa)")
     
-    def _load_complete_knowledge(self) -> None:
+    @property
+    def knowledge(self) -> ProjectKnowledge:
+        """Conocimiento completo del proyecto (cargado bajo demanda, siempre fresco)"""
+        signature = self.document_store.signature(self.ESSENTIAL_FILES.values())
+        if self._knowledge is None or signature != self._knowledge_signature:
+            with self._load_lock:
+                if self._knowledge is None or signature != self._knowledge_signature:
+                    # Se construye aparte y se publica completo: primero el objeto y luego
+                    # la firma, así el camino sin lock nunca ve un conocimiento a medias
+                    knowledge = ProjectKnowledge(root_path=self.project_root)
+                    self._load_complete_knowledge(knowledge)
+                    self._knowledge = knowledge
+                    self._knowledge_signature = signature
+        return self._knowledge
+    
+    def _load_complete_knowledge(self, knowledge: ProjectKnowledge) -> None:
         """Carga TODO el conocimiento del proyecto como regla primaria"""
         logger.info("Cargando conocimiento completo del proyecto...")
         
         # 1. Cargar toda la documentación
-        self._load_all_documentation()
+        self._load_all_documentation(knowledge)
         
         # 2. Mapear estructura completa
-        self._map_project_structure()
+        self._map_project_structure(knowledge)
         
         # 3. Extraer todas las reglas
-        self._extract_all_rules()
+        self._extract_all_rules(knowledge)
         
         # 4. Mapear funciones humanas
-        self._map_human_functions()
+        self._map_human_functions(knowledge)
         
         # 5. Mapear tecnología civil
-        self._map_civil_technology()
+        self._map_civil_technology(knowledge)
         
         # 6. Establecer relaciones
-        self._establish_relationships()
+        self._establish_relationships(knowledge)
         
-        logger.info(f"✅ Conocimiento completo cargado: {len(self.knowledge.components)} componentes, "
-                   f"{len(self.knowledge.documentation)} documentos, {len(self.knowledge.rules)} reglas")
+        logger.info(f"✅ Conocimiento completo cargado: {len(knowledge.components)} componentes, "
+                   f"{len(knowledge.documentation)} documentos, {len(knowledge.rules)} reglas")
     
-    def _load_all_documentation(self) -> None:
+    def _load_all_documentation(self, knowledge: ProjectKnowledge) -> None:
         """Carga TODA la documentación del proyecto"""
         for key, filename in self.ESSENTIAL_FILES.items():
-            filepath = self.project_root / filename
-            if filepath.exists():
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    self.knowledge.documentation[key] = content
-                    
-                    # Crear componente
-                    component = ProjectComponent(
-                        name=filename,
-                        path=str(filepath.relative_to(self.project_root)),
-                        type='file',
-                        description=self._extract_description(content),
-                        technology="civil"
-                    )
-                    self.knowledge.components[key] = component
-                    logger.debug(f"Cargado: {filename}")
-                except Exception as e:
-                    logger.warning(f"Error cargando {filename}: {e}")
+            content = self.document_store.get(filename)
+            if content is None:
+                continue
+            knowledge.documentation[key] = content
+            
+            # Crear componente
+            component = ProjectComponent(
+                name=filename,
+                path=filename,
+                type='file',
+                description=self._extract_description(content),
+                technology="civil"
+            )
+            knowledge.components[key] = component
+            logger.debug(f"Cargado: {filename}")
     
-    def _map_project_structure(self) -> None:
+    def _map_project_structure(self, knowledge: ProjectKnowledge) -> None:
         """Mapea la estructura completa del proyecto"""
         # Mapear directorios principales
         for key, dirpath in self.KEY_DIRECTORIES.items():
@@ -167,55 +189,55 @@ class ProjectKnowledgeBase:
                     description=self._get_directory_description(key),
                     technology="civil"
                 )
-                self.knowledge.components[key] = component
-                self.knowledge.structure[key] = self._list_directory_contents(full_path)
+                knowledge.components[key] = component
+                knowledge.structure[key] = self._list_directory_contents(full_path)
     
-    def _extract_all_rules(self) -> None:
+    def _extract_all_rules(self, knowledge: ProjectKnowledge) -> None:
         """Extrae TODAS las reglas del proyecto"""
         # PRIORIDAD: Reglas del proyecto (.cursorrules) - Estas son las reglas principales para el agente
-        if 'project_rules' in self.knowledge.documentation:
+        if 'project_rules' in knowledge.documentation:
             rules = self._extract_rules_from_cursorrules(
-                self.knowledge.documentation['project_rules']
+                knowledge.documentation['project_rules']
             )
-            self.knowledge.rules.extend(rules)
+            knowledge.rules.extend(rules)
             logger.info(f"✅ Cargadas {len(rules)} reglas de .cursorrules")
         
         # Reglas del manifiesto
-        if 'manifesto' in self.knowledge.documentation:
+        if 'manifesto' in knowledge.documentation:
             rules = self._extract_rules_from_text(
-                self.knowledge.documentation['manifesto'],
+                knowledge.documentation['manifesto'],
                 'MANIFIESTO'
             )
-            self.knowledge.rules.extend(rules)
+            knowledge.rules.extend(rules)
         
         # Reglas de lógica
-        if 'reglas' in self.knowledge.documentation:
+        if 'reglas' in knowledge.documentation:
             rules = self._extract_rules_from_text(
-                self.knowledge.documentation['reglas'],
+                knowledge.documentation['reglas'],
                 'LOGIC_RULES'
             )
-            self.knowledge.rules.extend(rules)
+            knowledge.rules.extend(rules)
         
         # Reglas de contribución
-        if 'contributing' in self.knowledge.documentation:
+        if 'contributing' in knowledge.documentation:
             rules = self._extract_rules_from_text(
-                self.knowledge.documentation['contributing'],
+                knowledge.documentation['contributing'],
                 'CONTRIBUTING'
             )
-            self.knowledge.rules.extend(rules)
+            knowledge.rules.extend(rules)
         
         # Reglas de gobernanza
-        if 'governance' in self.knowledge.documentation:
+        if 'governance' in knowledge.documentation:
             rules = self._extract_rules_from_text(
-                self.knowledge.documentation['governance'],
+                knowledge.documentation['governance'],
                 'GOVERNANCE'
             )
-            self.knowledge.rules.extend(rules)
+            knowledge.rules.extend(rules)
     
-    def _map_human_functions(self) -> None:
+    def _map_human_functions(self, knowledge: ProjectKnowledge) -> None:
         """Mapea cómo los humanos interactúan con el proyecto"""
         # Funciones del agente
-        self.knowledge.human_interactions['agente'] = [
+        knowledge.human_interactions['agente'] = [
             "Ejecutar: cd agent && ./run.sh status",
             "Iniciar servidor GUI: cd agent && ./run.sh gui-server",
             "Hacer preguntas al asistente en http://localhost:8080",
@@ -225,7 +247,7 @@ class ProjectKnowledgeBase:
         ]
         
         # Funciones del kernel
-        self.knowledge.human_interactions['kernel'] = [
+        knowledge.human_interactions['kernel'] = [
             "Compilar: ./build.sh",
             "Ejecutar en QEMU: ./run_safe.sh",
             "Crear ISO: ./create_grub_iso.sh",
@@ -233,16 +255,16 @@ class ProjectKnowledgeBase:
         ]
         
         # Funciones de documentación
-        self.knowledge.human_interactions['documentacion'] = [
+        knowledge.human_interactions['documentacion'] = [
             "Leer MANIFIESTO.md para entender el proyecto",
             "Leer REGLAS_LOGICA.md para entender el ciclo F3",
             "Leer CONTRIBUTING.md antes de contribuir",
             "Consultar ARQUITECTURA_COMPLETA.md para detalles técnicos"
         ]
     
-    def _map_civil_technology(self) -> None:
+    def _map_civil_technology(self, knowledge: ProjectKnowledge) -> None:
         """Mapea la tecnología civil (accesible) usada"""
-        self.knowledge.technology_stack = {
+        knowledge.technology_stack = {
             'lenguaje': 'Rust (nightly)',
             'build': 'Cargo + scripts bash',
             'emulador': 'QEMU',
@@ -255,23 +277,23 @@ class ProjectKnowledgeBase:
             'sistema': 'Linux/Ubuntu'
         }
     
-    def _establish_relationships(self) -> None:
+    def _establish_relationships(self, knowledge: ProjectKnowledge) -> None:
         """Establece relaciones entre componentes"""
         # Relaciones kernel
-        if 'kernel' in self.knowledge.components:
-            self.knowledge.components['kernel'].relationships = [
+        if 'kernel' in knowledge.components:
+            knowledge.components['kernel'].relationships = [
                 'kernel_f3', 'kernel_gui', 'kernel_drivers', 'build_script'
             ]
         
         # Relaciones agente
-        if 'agent' in self.knowledge.components:
-            self.knowledge.components['agent'].relationships = [
+        if 'agent' in knowledge.components:
+            knowledge.components['agent'].relationships = [
                 'agent_src', 'agent_config', 'gui_arquitectura'
             ]
         
         # Relaciones F3 Core
-        if 'kernel_f3' in self.knowledge.components:
-            self.knowledge.components['kernel_f3'].relationships = [
+        if 'kernel_f3' in knowledge.components:
+            knowledge.components['kernel_f3'].relationships = [
                 'reglas', 'arquitectura', 'manifesto'
             ]
     
@@ -449,6 +471,7 @@ class ProjectKnowledgeBase:
         
         return "\n".join(result)
     
+    @traced('knowledge.resolve_query')
     def resolve_query_immediate(self, query: str) -> str:
         """Resuelve consulta inmediatamente usando tecnología civil"""
         query_lower = query.lower()
@@ -461,30 +484,14 @@ class ProjectKnowledgeBase:
         if any(word in query_lower for word in ['cómo', 'how', 'usar', 'usar', 'función', 'function']):
             return self.get_human_functions()
         
-        # Búsqueda en documentación
-        for key, content in self.knowledge.documentation.items():
-            if query_lower in content.lower():
-                # Extraer sección relevante
-                lines = content.split('\n')
-                relevant = []
-                for i, line in enumerate(lines):
-                    if query_lower in line.lower():
-                        # Contexto: 5 líneas antes y después
-                        start = max(0, i - 5)
-                        end = min(len(lines), i + 6)
-                        relevant.extend(lines[start:end])
-                        break
-                if relevant:
-                    return "\n".join(relevant[:50])
-        
-        # Búsqueda general
-        matches = []
-        for key, content in self.knowledge.documentation.items():
-            if query_lower in content.lower():
-                matches.append(f"**{key}**: {content[:300]}...")
-        
-        if matches:
-            return "\n\n".join(matches[:3])
+        # Búsqueda rankeada (BM25) en toda la documentación indexada
+        results = self.document_index.search(query, limit=3, max_snippets=1, context_lines=5)
+        if results:
+            matches = []
+            for result in results:
+                snippet = result.snippets[0] if result.snippets else ""
+                matches.append(f"**{result.path}** (relevancia: {result.score:.2f})\n{snippet}")
+            return "\n\n".join(matches)
         
         return "Consulta no encontrada en la base de conocimiento. Intenta ser más específico."
     
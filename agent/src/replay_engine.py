@@ -0,0 +1,353 @@
+"""
+Replay Engine - Re-evaluación offline (what-if) del historial de PRs
+
+Reproduce las decisiones de gobierno sobre PRs ya evaluados con otra configuración,
+sin efectos secundarios (sin GitHub, sin record_decision, sin tocar el contexto):
+- Entrada: instantáneas de PRs (agent/data/pr_snapshots/, JSON Lines rotado) que
+  GovernanceCore guarda en cada evaluate_pr; las decisiones de decisions.json sin
+  instantánea se re-deciden con las métricas registradas
+- Análisis (CodeAnalyzer) en un pool de procesos, por bloques; las métricas se
+  cachean por configuración del analizador, así que los experimentos que solo
+  cambian evaluación, pesos de síntesis o ciclo no vuelven a analizar
+- Síntesis (SynthesisEngine) y decisión (decision_policy) en orden; la fase es la
+  registrada o, con simulate_cycle, la de un DevelopmentCycle que avanza con las
+  decisiones re-calculadas
+- Informe: decisiones que cambian, transiciones (antes → después) y throughput
+"""
+
+import copy
+import io
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+from .code_analyzer import CodeAnalyzer
+from .context_manager import ContextManager
+from .decision_policy import make_decision
+from .development_phase import DevelopmentCycle
+from .execution_log import ExecutionLog
+from .synthesis_engine import SynthesisEngine
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_DIR = 'pr_snapshots'
+
+# Campos del PR que se guardan (lo necesario para re-analizarlo y reconocerlo)
+SNAPSHOT_PR_FIELDS = ('number', 'title', 'user', 'labels', 'files', 'diff')
+
+# Secciones de la configuración que usa el CodeAnalyzer
+ANALYZER_SECTIONS = ('f3_model', 'evaluation')
+
+
+def snapshot_record(pr_data: Dict, code_metrics: Dict, phase_info: Dict, similar_decisions: Sequence,
+                    synthesis: Dict, decision: Dict) -> Dict:
+    """Instantánea de una evaluación (una línea del log de instantáneas)"""
+    return {
+        'version': SNAPSHOT_VERSION,
+        'timestamp': datetime.now().isoformat(),
+        'pr_number': pr_data.get('number', 0),
+        'pr': {key: pr_data[key] for key in SNAPSHOT_PR_FIELDS if key in pr_data},
+        'metrics': code_metrics,
+        'phase_info': phase_info,
+        'similar_decisions': len(similar_decisions),
+        'score': synthesis['overall_score'],
+        'recommendation': synthesis['recommendation'],
+        'decision': decision['action'],
+        'auto': decision.get('auto', False),
+    }
+
+
+def apply_overrides(config: Dict, overrides: Optional[Dict]) -> Dict:
+    """Copia de la configuración con los overrides aplicados
+
+    Acepta dicts anidados ({'evaluation': {'max_pr_size': 400}}) o claves con
+    puntos ({'evaluation.max_pr_size': 400}).
+    """
+    result = copy.deepcopy(config)
+    for key, value in (overrides or {}).items():
+        path = key.split('.')
+        target = result
+        for part in path[:-1]:
+            if not isinstance(target.get(part), dict):
+                target[part] = {}
+            target = target[part]
+        if isinstance(value, dict) and isinstance(target.get(path[-1]), dict):
+            target[path[-1]] = apply_overrides(target[path[-1]], value)
+        else:
+            target[path[-1]] = copy.deepcopy(value)
+    return result
+
+
+@dataclass
+class ReplayCase:
+    """PR histórico a re-decidir"""
+    pr_number: int
+    timestamp: Optional[str]
+    decision: str  # Acción registrada: approve, request_changes, reject
+    metrics: Dict  # Métricas registradas
+    pr: Optional[Dict] = None  # Archivos y diff (None = solo métricas)
+    phase_info: Optional[Dict] = None  # Fase registrada (None = desconocida)
+    similar: bool = False
+    score: Optional[int] = None
+
+
+@dataclass
+class ReplayReport:
+    """Resultado de un experimento"""
+    total: int = 0
+    reanalyzed: int = 0  # PRs re-analizados desde su diff
+    metrics_only: int = 0  # PRs sin instantánea (métricas registradas)
+    changed: int = 0
+    transitions: Dict[str, int] = field(default_factory=dict)  # "approve → reject": n
+    before: Dict[str, int] = field(default_factory=dict)
+    after: Dict[str, int] = field(default_factory=dict)
+    diffs: List[Dict] = field(default_factory=list)
+    analysis_cached: bool = False
+    workers: int = 1
+    analysis_seconds: float = 0.0
+    decision_seconds: float = 0.0
+    duration_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """PRs re-decididos por segundo"""
+        return self.total / self.duration_seconds if self.duration_seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'total': self.total,
+            'reanalyzed': self.reanalyzed,
+            'metrics_only': self.metrics_only,
+            'changed': self.changed,
+            'transitions': self.transitions,
+            'before': self.before,
+            'after': self.after,
+            'diffs': self.diffs,
+            'analysis_cached': self.analysis_cached,
+            'workers': self.workers,
+            'analysis_seconds': round(self.analysis_seconds, 4),
+            'decision_seconds': round(self.decision_seconds, 4),
+            'duration_seconds': round(self.duration_seconds, 4),
+            'throughput': round(self.throughput, 1),
+        }
+
+    def summary(self) -> str:
+        lines = [
+            f"🔁 Replay: {self.total} PRs ({self.reanalyzed} re-analizados, {self.metrics_only} solo métricas)",
+            f"⏱️  {self.duration_seconds:.2f}s ({self.throughput:.0f} PRs/s; análisis {self.analysis_seconds:.2f}s"
+            f"{' en caché' if self.analysis_cached else f' con {self.workers} procesos'}, "
+            f"decisión {self.decision_seconds:.2f}s)",
+            f"🔀 Decisiones que cambian: {self.changed}",
+        ]
+        for transition, count in sorted(self.transitions.items(), key=lambda item: -item[1]):
+            lines.append(f"   {transition}: {count}")
+        lines.append(f"📊 Antes: {self.before}")
+        lines.append(f"📊 Después: {self.after}")
+        return '\n'.join(lines)
+
+
+# ---------- Pool de procesos (análisis) ----------
+
+_worker_analyzer: Optional[CodeAnalyzer] = None
+
+
+def _init_worker(analyzer_config: Dict) -> None:
+    global _worker_analyzer
+    _worker_analyzer = CodeAnalyzer(analyzer_config)
+
+
+def _analyze_chunk(items: List[Tuple[List[Dict], str]]) -> List[Dict]:
+    return [_worker_analyzer.analyze_pr(files, diff) for files, diff in items]
+
+
+def _phase_info(cycle: DevelopmentCycle) -> Dict:
+    """Misma información de fase que usa GovernanceCore.evaluate_pr"""
+    state = cycle.get_state()
+    return {
+        'current_phase': state.phase.value,
+        'should_allow_experimentation': cycle.should_allow_experimentation(),
+        'should_enforce_strictness': cycle.should_enforce_strictness(),
+        'entropy': state.entropy,
+        'perfection_score': state.perfection_score,
+    }
+
+
+class ReplayEngine:
+    """Re-decide el historial de PRs con configuraciones alternativas"""
+
+    def __init__(self, config: Dict, data_dir, workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None):
+        replay_config = config.get('replay', {})
+        self.config = config
+        self.data_dir = Path(data_dir)
+        self.workers = max(1, workers or replay_config.get('workers') or os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size or replay_config.get('chunk_size', 64))
+        self.cases: Optional[List[ReplayCase]] = None
+        self._metrics_cache: Dict[str, List[Dict]] = {}  # Configuración del analizador -> métricas
+
+    # ---------- Historial ----------
+
+    def load(self, cases: Optional[Sequence[ReplayCase]] = None) -> List[ReplayCase]:
+        """Carga el historial (instantáneas + decisiones sin instantánea), en orden temporal"""
+        if cases is not None:
+            self.cases = list(cases)
+            self._metrics_cache.clear()
+            return self.cases
+
+        loaded: List[ReplayCase] = []
+        snapshot_dir = self.data_dir / SNAPSHOT_DIR
+        if snapshot_dir.exists():
+            for record in ExecutionLog(snapshot_dir).tail(None):
+                if 'pr' not in record or 'decision' not in record:
+                    continue
+                loaded.append(ReplayCase(
+                    pr_number=record.get('pr_number', 0),
+                    timestamp=record.get('timestamp'),
+                    decision=record['decision'],
+                    metrics=record.get('metrics') or {},
+                    pr=record['pr'],
+                    phase_info=record.get('phase_info'),
+                    similar=bool(record.get('similar_decisions')),
+                    score=record.get('score'),
+                ))
+
+        # Decisiones anteriores a las instantáneas: solo métricas
+        with_snapshot = {case.pr_number for case in loaded}
+        for decision in ContextManager(self.config, self.data_dir).decisions:
+            if decision.get('pr_number') in with_snapshot or 'metrics' not in decision:
+                continue
+            loaded.append(ReplayCase(
+                pr_number=decision.get('pr_number', 0),
+                timestamp=decision.get('timestamp'),
+                decision=decision.get('decision', ''),
+                metrics=decision['metrics'],
+            ))
+
+        loaded.sort(key=lambda case: case.timestamp or '')
+        self.cases = loaded
+        self._metrics_cache.clear()
+        logger.info(f"✅ Historial para replay: {len(loaded)} PRs ({len(with_snapshot)} con instantánea)")
+        return loaded
+
+    # ---------- Experimentos ----------
+
+    def run(self, overrides: Optional[Dict] = None, simulate_cycle: bool = False,
+            limit: Optional[int] = None) -> ReplayReport:
+        """Re-decide el historial con la configuración + overrides y compara con lo registrado
+
+        Args:
+            overrides: Cambios sobre la configuración (anidados o con claves con puntos)
+            simulate_cycle: Recalcular la fase con un DevelopmentCycle nuevo en lugar
+                de usar la registrada en cada instantánea
+            limit: Solo los últimos `limit` PRs
+        """
+        started = time.perf_counter()
+        cases = self.cases if self.cases is not None else self.load()
+        config = apply_overrides(self.config, overrides)
+        report = ReplayReport(workers=self.workers)
+
+        metrics_list = self._analyze(config, report)
+        if limit is not None:
+            cases, metrics_list = cases[-limit:], metrics_list[-limit:]
+        report.total = len(cases)
+
+        decision_started = time.perf_counter()
+        synthesis_engine = SynthesisEngine(config)
+        cycle = DevelopmentCycle(config) if simulate_cycle else None
+        before, after, transitions = Counter(), Counter(), Counter()
+        with redirect_stdout(io.StringIO()):  # El ciclo anuncia sus transiciones con print
+            for case, metrics in zip(cases, metrics_list):
+                phase_info = _phase_info(cycle) if cycle is not None else (case.phase_info or {})
+                context_info = {'similar_decisions': [True] if case.similar else []}
+                synthesis = synthesis_engine.synthesize(metrics, context_info, phase_info)
+                decision = make_decision(config, synthesis, metrics, case.pr or {})
+                if cycle is not None:
+                    cycle.process_pr({
+                        'approved': decision['action'] == 'approve',
+                        'experimental': phase_info['should_allow_experimentation'],
+                    })
+
+                before[case.decision] += 1
+                after[decision['action']] += 1
+                if decision['action'] != case.decision:
+                    transitions[f"{case.decision} → {decision['action']}"] += 1
+                    report.diffs.append({
+                        'pr_number': case.pr_number,
+                        'timestamp': case.timestamp,
+                        'before': case.decision,
+                        'after': decision['action'],
+                        'score_before': case.score,
+                        'score_after': synthesis['overall_score'],
+                        'phase': phase_info.get('current_phase'),
+                    })
+
+        report.changed = len(report.diffs)
+        report.transitions = dict(transitions)
+        report.before = dict(before)
+        report.after = dict(after)
+        report.decision_seconds = time.perf_counter() - decision_started
+        report.duration_seconds = time.perf_counter() - started
+        return report
+
+    def sweep(self, experiments: Dict[str, Dict], simulate_cycle: bool = False) -> Dict[str, ReplayReport]:
+        """Varios experimentos sobre el mismo historial (nombre -> overrides)"""
+        return {name: self.run(overrides, simulate_cycle=simulate_cycle)
+                for name, overrides in experiments.items()}
+
+    # ---------- Análisis ----------
+
+    @staticmethod
+    def _analyzer_key(config: Dict) -> str:
+        model = config.get('f3_model', {})
+        return json.dumps([
+            sorted(model.get('sacred_core', [])),
+            sorted(model.get('vocabulary', [])),
+            sorted(model.get('forbidden_terms', [])),
+            config.get('evaluation', {}).get('max_pr_size', 300),
+        ])
+
+    def _analyze(self, config: Dict, report: ReplayReport) -> List[Dict]:
+        """Métricas de cada caso: re-analizadas (en paralelo) o las registradas"""
+        cases = self.cases or []
+        pending = [index for index, case in enumerate(cases) if case.pr is not None]
+        report.reanalyzed = len(pending)
+        report.metrics_only = len(cases) - len(pending)
+
+        key = self._analyzer_key(config)
+        cached = self._metrics_cache.get(key)
+        if cached is not None:
+            report.analysis_cached = True
+            return cached
+
+        started = time.perf_counter()
+        items = [(cases[i].pr.get('files', []), cases[i].pr.get('diff', '') or '') for i in pending]
+        analyzer_config = {section: config.get(section, {}) for section in ANALYZER_SECTIONS}
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+
+        if self.workers == 1 or len(chunks) <= 1:
+            report.workers = 1
+            analyzer = CodeAnalyzer(analyzer_config)
+            analyzed = [analyzer.analyze_pr(files, diff) for files, diff in items]
+        else:
+            report.workers = min(self.workers, len(chunks))
+            with ProcessPoolExecutor(max_workers=report.workers, initializer=_init_worker,
+                                     initargs=(analyzer_config,)) as pool:
+                analyzed = [metrics for chunk in pool.map(_analyze_chunk, chunks) for metrics in chunk]
+
+        metrics_list = [case.metrics for case in cases]
+        for index, metrics in zip(pending, analyzed):
+            metrics_list[index] = metrics
+        report.analysis_seconds = time.perf_counter() - started
+        self._metrics_cache[key] = metrics_list
+        return metrics_list
@@ -7,10 +7,15 @@ El agente debe consumir solo 15-20% de CPU para no sobrecargar el sistema.
 import time
 import psutil
 import threading
-from typing import Optional
+from typing import Callable, List, Optional
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+from .metrics import get_registry
+
+THROTTLE_SLEEP_SECONDS = get_registry().counter(
+    'f3_agent_throttle_sleep_seconds_total', 'Tiempo dormido por throttling, por motivo', ('reason',))
+
 
 @dataclass
 class ResourceLimits:
@@ -50,6 +55,10 @@ class ResourceManager:
         self.current_ram_usage_gb = 0.0
         self.operation_count = 0
         self.last_check = datetime.now()
+        
+        # Estado de presión según el último muestreo del monitor (sin bloquear)
+        self.within_limits = True
+        self.listeners: List[Callable[[bool], None]] = []
     
     def start_monitoring(self) -> None:
         """Inicia monitoreo de recursos en background"""
@@ -87,11 +96,28 @@ class ResourceManager:
                 if ram_gb > self.limits.max_ram_gb:
                     print(f"⚠️  Uso de RAM alto: {ram_gb:.2f}GB (límite: {self.limits.max_ram_gb}GB)")
                 
+                within_limits = (cpu_percent <= self.limits.max_cpu_percent and
+                                 ram_gb <= self.limits.max_ram_gb)
+                if within_limits != self.within_limits:
+                    self.within_limits = within_limits
+                    self._notify_listeners(within_limits)
+                
                 time.sleep(self.limits.check_interval)
             except Exception as e:
                 print(f"Error en monitoreo de recursos: {e}")
                 time.sleep(self.limits.check_interval)
     
+    def add_listener(self, callback: Callable[[bool], None]) -> None:
+        """Suscribe un callback a los cambios de presión (True = de nuevo dentro de límites)"""
+        self.listeners.append(callback)
+    
+    def _notify_listeners(self, within_limits: bool) -> None:
+        for callback in list(self.listeners):
+            try:
+                callback(within_limits)
+            except Exception as e:
+                print(f"Error notificando cambio de recursos: {e}")
+    
     def check_and_throttle(self) -> None:
         """Verifica uso de recursos y aplica throttling si es necesario"""
         current_cpu = self.process.cpu_percent(interval=0.1)
@@ -103,7 +129,7 @@ class ResourceManager:
             # Calcular tiempo de espera proporcional al exceso
             excess = current_cpu - self.limits.target_cpu_percent
             sleep_time = self.limits.sleep_duration * (1 + excess / 10)
-            time.sleep(sleep_time)
+            self.throttle_sleep(sleep_time, 'cpu')
         
         # Si estamos por encima del objetivo de RAM, intentar liberar memoria
         if current_ram_gb > self.limits.target_ram_gb:
@@ -113,12 +139,19 @@ class ResourceManager:
             
             # Si aún excede, aplicar throttling más agresivo
             if self.process.memory_info().rss / (1024 ** 3) > self.limits.target_ram_gb:
-                time.sleep(self.limits.sleep_duration * 2)
+                self.throttle_sleep(self.limits.sleep_duration * 2, 'ram')
+    
+    def throttle_sleep(self, seconds: float, reason: str) -> None:
+        """Duerme por throttling y lo contabiliza en las métricas"""
+        if seconds <= 0:
+            return
+        time.sleep(seconds)
+        THROTTLE_SLEEP_SECONDS.inc(seconds, reason=reason)
     
     def rate_limit_operation(self) -> None:
         """Aplica rate limiting entre operaciones"""
         # Dormir entre operaciones para mantener uso bajo
-        time.sleep(self.limits.sleep_duration)
+        self.throttle_sleep(self.limits.sleep_duration, 'rate_limit')
         
         # Verificar y aplicar throttling si es necesario
         self.check_and_throttle()
@@ -194,5 +227,6 @@ class ThrottledOperation:
         # Si la operación fue muy rápida, esperar un poco más
         elapsed = time.time() - self.start_time
         if elapsed < self.resource_manager.limits.sleep_duration:
-            time.sleep(self.resource_manager.limits.sleep_duration - elapsed)
+            self.resource_manager.throttle_sleep(self.resource_manager.limits.sleep_duration - elapsed,
+                                                 'min_duration')
 
@@ -0,0 +1,283 @@
+"""
+Rule Loader - Carga de reglas del agente desde archivos YAML
+
+Las reglas viven en agent/config/rules/*.yaml:
+- Cada archivo se valida contra un esquema (claves, tipos, categorías, prioridad 1-10)
+- Las expresiones `when` se compilan una vez en predicados (closures) sobre el contexto
+- Un directorio con cualquier error no se aplica: se conservan las reglas anteriores
+
+Expresiones `when`:
+    {field: modified_files, intersects: [kernel/src/f3/core.rs]}
+    {field: cpu_percent, gte: 25}
+    {all: [...]}, {any: [...]}, {not: {...}}
+Operadores: eq, ne, gt, gte, lt, lte, in, contains, intersects, matches (glob), exists
+"""
+
+import fnmatch
+import operator
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+import logging
+
+import yaml
+
+from .agent_rules import AgentRule, RuleCategory
+
+logger = logging.getLogger(__name__)
+
+
+RULES_FILE_VERSION = 1
+
+Predicate = Callable[[Dict], bool]
+
+# Esquema de una regla: clave -> (tipo, obligatoria)
+RULE_SCHEMA: Dict[str, Tuple[type, bool]] = {
+    'id': (str, True),
+    'category': (str, True),
+    'title': (str, True),
+    'description': (str, False),
+    'priority': (int, True),
+    'applies_to': (list, False),
+    'conditions': (dict, False),
+    'when': (dict, False),
+    'actions': (list, False),
+}
+
+CATEGORIES = {category.value: category for category in RuleCategory}
+
+_COMPARISONS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+
+OPERATORS = set(_COMPARISONS) | {'in', 'contains', 'intersects', 'matches', 'exists'}
+
+
+class RuleFileError(Exception):
+    """Archivo de reglas inválido (lleva la lista de errores encontrados)"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+# ---------- Expresiones ----------
+
+def _as_items(value: Any) -> List:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return list(value)
+    return [value]
+
+
+def _compile_test(field: str, op: str, expected: Any) -> Predicate:
+    """Predicado de una comparación sobre un campo del contexto"""
+    missing = object()
+
+    if op == 'exists':
+        return lambda context: (field in context) == bool(expected)
+
+    if op in _COMPARISONS:
+        compare = _COMPARISONS[op]
+
+        def test(context: Dict) -> bool:
+            value = context.get(field, missing)
+            if value is missing:
+                return False
+            try:
+                return compare(value, expected)
+            except TypeError:
+                return False
+        return test
+
+    if op == 'in':
+        options = frozenset(_as_items(expected))
+        return lambda context: any(item in options for item in _as_items(context.get(field, ())))
+
+    if op == 'contains':
+        def test(context: Dict) -> bool:
+            value = context.get(field)
+            try:
+                return value is not None and expected in value
+            except TypeError:
+                return False
+        return test
+
+    if op == 'intersects':
+        wanted = frozenset(_as_items(expected))
+
+        def test(context: Dict) -> bool:
+            value = context.get(field, ())
+            if isinstance(value, str):
+                # Compatibilidad: rutas sueltas o texto que contiene la ruta
+                return any(item in value for item in wanted)
+            return not wanted.isdisjoint(value)
+        return test
+
+    if op == 'matches':
+        patterns = [str(p) for p in _as_items(expected)]
+
+        def test(context: Dict) -> bool:
+            values = _as_items(context.get(field, ()))
+            return any(fnmatch.fnmatch(str(v), p) for v in values for p in patterns)
+        return test
+
+    raise ValueError(f"operador desconocido: {op}")
+
+
+def validate_expression(expr: Any, where: str) -> List[str]:
+    """Errores de una expresión `when` (lista vacía si es válida)"""
+    if not isinstance(expr, dict) or not expr:
+        return [f"{where}: la expresión debe ser un mapa no vacío"]
+
+    if 'all' in expr or 'any' in expr:
+        key = 'all' if 'all' in expr else 'any'
+        if len(expr) != 1:
+            return [f"{where}: '{key}' no admite otras claves"]
+        items = expr[key]
+        if not isinstance(items, list) or not items:
+            return [f"{where}.{key}: debe ser una lista no vacía"]
+        errors = []
+        for i, item in enumerate(items):
+            errors.extend(validate_expression(item, f"{where}.{key}[{i}]"))
+        return errors
+
+    if 'not' in expr:
+        if len(expr) != 1:
+            return [f"{where}: 'not' no admite otras claves"]
+        return validate_expression(expr['not'], f"{where}.not")
+
+    field = expr.get('field')
+    if not isinstance(field, str) or not field:
+        return [f"{where}: falta 'field' (o all/any/not)"]
+    ops = [key for key in expr if key != 'field']
+    if len(ops) != 1:
+        return [f"{where}: se espera exactamente un operador ({', '.join(sorted(OPERATORS))})"]
+    if ops[0] not in OPERATORS:
+        return [f"{where}: operador desconocido '{ops[0]}'"]
+    return []
+
+
+def compile_expression(expr: Dict) -> Predicate:
+    """Compila una expresión `when` (ya validada) en un predicado"""
+    if 'all' in expr:
+        parts = tuple(compile_expression(item) for item in expr['all'])
+        if len(parts) == 1:
+            return parts[0]
+        return lambda context: all(part(context) for part in parts)
+
+    if 'any' in expr:
+        parts = tuple(compile_expression(item) for item in expr['any'])
+        if len(parts) == 1:
+            return parts[0]
+        return lambda context: any(part(context) for part in parts)
+
+    if 'not' in expr:
+        inner = compile_expression(expr['not'])
+        return lambda context: not inner(context)
+
+    field = expr['field']
+    op = next(key for key in expr if key != 'field')
+    return _compile_test(field, op, expr[op])
+
+
+# ---------- Reglas ----------
+
+def validate_rule(data: Any, where: str) -> List[str]:
+    """Errores de una regla según RULE_SCHEMA (lista vacía si es válida)"""
+    if not isinstance(data, dict):
+        return [f"{where}: la regla debe ser un mapa"]
+
+    where = f"{where} ({data['id']})" if isinstance(data.get('id'), str) else where
+    errors = []
+    for key in data:
+        if key not in RULE_SCHEMA:
+            errors.append(f"{where}: clave desconocida '{key}'")
+    for key, (expected_type, required) in RULE_SCHEMA.items():
+        if key not in data:
+            if required:
+                errors.append(f"{where}: falta '{key}'")
+            continue
+        value = data[key]
+        if not isinstance(value, expected_type) or (expected_type is int and isinstance(value, bool)):
+            errors.append(f"{where}: '{key}' debe ser {expected_type.__name__}")
+
+    if isinstance(data.get('category'), str) and data['category'] not in CATEGORIES:
+        errors.append(f"{where}: categoría desconocida '{data['category']}' "
+                      f"(válidas: {', '.join(CATEGORIES)})")
+    priority = data.get('priority')
+    if isinstance(priority, int) and not 1 <= priority <= 10:
+        errors.append(f"{where}: 'priority' debe estar entre 1 y 10")
+    for key in ('applies_to', 'actions'):
+        if isinstance(data.get(key), list) and not all(isinstance(item, str) for item in data[key]):
+            errors.append(f"{where}: '{key}' debe ser una lista de textos")
+    if isinstance(data.get('when'), dict):
+        errors.extend(validate_expression(data['when'], f"{where}.when"))
+    return errors
+
+
+def _build_rule(data: Dict) -> AgentRule:
+    return AgentRule(
+        id=data['id'],
+        category=CATEGORIES[data['category']],
+        title=data['title'],
+        description=data.get('description', ''),
+        priority=data['priority'],
+        applies_to=list(data.get('applies_to') or ['all']),
+        conditions=dict(data.get('conditions') or {}),
+        actions=list(data.get('actions') or []),
+        when=data.get('when'),
+    )
+
+
+def load_rule_file(path: Path) -> List[AgentRule]:
+    """Carga y valida un archivo de reglas (RuleFileError con todos los errores)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as e:
+        raise RuleFileError([f"{path.name}: {e}"])
+
+    if not isinstance(data, dict):
+        raise RuleFileError([f"{path.name}: se espera un mapa con 'version' y 'rules'"])
+    if data.get('version', RULES_FILE_VERSION) != RULES_FILE_VERSION:
+        raise RuleFileError([f"{path.name}: versión no soportada {data.get('version')}"])
+    entries = data.get('rules') or []
+    if not isinstance(entries, list):
+        raise RuleFileError([f"{path.name}: 'rules' debe ser una lista"])
+
+    errors = []
+    for i, entry in enumerate(entries):
+        errors.extend(validate_rule(entry, f"{path.name}: rules[{i}]"))
+    if errors:
+        raise RuleFileError(errors)
+    return [_build_rule(entry) for entry in entries]
+
+
+def load_rules_dir(rules_dir: Path) -> List[AgentRule]:
+    """Carga todos los archivos *.yaml de un directorio (en orden alfabético)
+
+    Raises:
+        RuleFileError: si algún archivo es inválido o hay ids repetidos
+    """
+    rules: List[AgentRule] = []
+    errors: List[str] = []
+    origins: Dict[str, str] = {}
+    for path in sorted(Path(rules_dir).glob('*.yaml')):
+        try:
+            file_rules = load_rule_file(path)
+        except RuleFileError as e:
+            errors.extend(e.errors)
+            continue
+        for rule in file_rules:
+            if rule.id in origins:
+                errors.append(f"{path.name}: id repetido '{rule.id}' (ya definido en {origins[rule.id]})")
+                continue
+            origins[rule.id] = path.name
+            rules.append(rule)
+    if errors:
+        raise RuleFileError(errors)
+    return rules
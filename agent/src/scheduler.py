@@ -0,0 +1,265 @@
+"""
+Scheduler - Planificador de trabajos por tiempo y por eventos
+
+Un único hilo duerme hasta el próximo trabajo vencido o hasta que llega un evento:
+- Trabajos periódicos: cada `interval` segundos con jitter (±fracción del intervalo)
+- Trabajos por evento: notify(evento, payload) los vence al instante; los
+  eventos que llegan antes de que el trabajo corra se agrupan en una sola ejecución
+- Cola de prioridad (vencimiento, prioridad): a igual vencimiento corre antes
+  el trabajo con menor número de prioridad
+- Errores: reintento con backoff exponencial (acotado); los payloads de eventos
+  se conservan hasta max_retries
+- pause()/resume() retienen los trabajos (p. ej. bajo presión de recursos)
+- stop() despierta el hilo al instante
+
+Sin trabajos vencidos el hilo queda bloqueado en una Condition: CPU casi nula.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScheduledJob:
+    """Trabajo registrado en el planificador"""
+    name: str
+    func: Callable[[List[Any]], None]  # Recibe los payloads de los eventos acumulados
+    interval: Optional[float] = None  # Segundos entre ejecuciones (None = solo por eventos)
+    events: Tuple[str, ...] = ()
+    priority: int = 5  # Menor = antes (a igual vencimiento)
+    jitter: float = 0.1  # Fracción del intervalo
+    backoff_base: float = 5.0
+    backoff_max: float = 300.0
+    max_retries: int = 3  # Reintentos de un lote de eventos fallido
+    next_run: Optional[float] = None  # time.monotonic()
+    payloads: List[Any] = field(default_factory=list)
+    failures: int = 0
+    runs: int = 0
+    last_run: Optional[float] = None  # time.time()
+    last_duration_ms: int = 0
+    last_error: Optional[str] = None
+    token: int = 0  # Invalida entradas viejas del heap
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'interval': self.interval,
+            'events': list(self.events),
+            'priority': self.priority,
+            'pending_events': len(self.payloads),
+            'due_in': (round(max(0.0, self.next_run - time.monotonic()), 3)
+                       if self.next_run is not None else None),
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_run': self.last_run,
+            'last_duration_ms': self.last_duration_ms,
+            'last_error': self.last_error,
+        }
+
+
+class Scheduler:
+    """Planificador con cola de prioridad, eventos, jitter y backoff"""
+
+    def __init__(self, name: str = 'scheduler'):
+        self.name = name
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.listeners: Dict[str, List[str]] = {}  # evento -> trabajos
+        self.heap: List[Tuple[float, int, int, str, int]] = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.running = False
+        self.paused = False
+        self.current_job: Optional[str] = None
+        self.thread: Optional[threading.Thread] = None
+
+    # ---------- Registro ----------
+
+    def add_job(self, name: str, func: Callable[[List[Any]], None], interval: Optional[float] = None,
+                events: Iterable[str] = (), priority: int = 5, jitter: float = 0.1,
+                run_immediately: bool = False, **options) -> ScheduledJob:
+        """Registra un trabajo periódico (interval), por eventos (events) o ambos"""
+        job = ScheduledJob(name=name, func=func, interval=interval, events=tuple(events),
+                           priority=priority, jitter=jitter, **options)
+        with self.condition:
+            if name in self.jobs:
+                raise ValueError(f"Trabajo ya registrado: {name}")
+            self.jobs[name] = job
+            for event in job.events:
+                self.listeners.setdefault(event, []).append(name)
+            if run_immediately:
+                self._schedule(job, time.monotonic())
+            elif interval:
+                self._schedule(job, time.monotonic() + self._jittered(job))
+        return job
+
+    def remove_job(self, name: str) -> None:
+        with self.condition:
+            job = self.jobs.pop(name, None)
+            if job is None:
+                return
+            job.token += 1  # Sus entradas en el heap quedan obsoletas
+            for event in job.events:
+                self.listeners[event].remove(name)
+
+    # ---------- Planificación (con el lock tomado) ----------
+
+    @staticmethod
+    def _jittered(job: ScheduledJob) -> float:
+        if not job.jitter:
+            return job.interval
+        return max(0.0, job.interval * (1 + random.uniform(-job.jitter, job.jitter)))
+
+    def _schedule(self, job: ScheduledJob, when: float) -> None:
+        """Programa el trabajo (nunca retrasa una ejecución ya programada antes)"""
+        if job.next_run is not None and job.next_run <= when:
+            return
+        job.next_run = when
+        job.token += 1
+        heapq.heappush(self.heap, (when, job.priority, next(self.sequence), job.name, job.token))
+        self.condition.notify()
+
+    def _reschedule(self, job: ScheduledJob, error: Optional[str]) -> None:
+        """Siguiente ejecución tras correr: intervalo con jitter, backoff o eventos pendientes"""
+        now = time.monotonic()
+        if error is not None:
+            # El backoff manda sobre lo programado durante la ejecución
+            job.next_run = None
+            job.token += 1
+            job.failures += 1
+            delay = min(job.backoff_max, job.backoff_base * (2 ** (job.failures - 1)))
+            if job.interval or job.payloads:
+                self._schedule(job, now + delay)
+            return
+        job.failures = 0
+        if job.payloads:
+            self._schedule(job, now)  # Llegaron eventos mientras corría
+        if job.interval:
+            self._schedule(job, now + self._jittered(job))
+
+    # ---------- API ----------
+
+    def notify(self, event: str, payload: Any = None) -> int:
+        """Dispara un evento: vence ya los trabajos suscritos (devuelve cuántos)"""
+        with self.condition:
+            names = self.listeners.get(event, ())
+            for name in names:
+                job = self.jobs[name]
+                job.payloads.append(payload)
+                if job.failures == 0 or job.next_run is None:
+                    self._schedule(job, time.monotonic())
+            return len(names)
+
+    def run_now(self, name: str) -> None:
+        """Adelanta un trabajo para que corra en cuanto el hilo quede libre"""
+        with self.condition:
+            self._schedule(self.jobs[name], time.monotonic())
+
+    def run_later(self, name: str, delay: float) -> None:
+        """Adelanta un trabajo para que corra dentro de `delay` segundos (si no corre antes)"""
+        with self.condition:
+            self._schedule(self.jobs[name], time.monotonic() + delay)
+
+    def pause(self) -> None:
+        with self.condition:
+            self.paused = True
+
+    def resume(self) -> None:
+        with self.condition:
+            self.paused = False
+            self.condition.notify()
+
+    def start(self) -> None:
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene el planificador (despierta el hilo; espera al trabajo en curso)"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+        self.thread = None
+
+    # ---------- Hilo ----------
+
+    def _next_due(self) -> Tuple[Optional[ScheduledJob], Optional[float]]:
+        """Trabajo vencido (o None) y segundos hasta el próximo vencimiento"""
+        while self.heap:
+            when, _, _, name, token = self.heap[0]
+            job = self.jobs.get(name)
+            if job is None or job.token != token:
+                heapq.heappop(self.heap)  # Entrada obsoleta
+                continue
+            wait = when - time.monotonic()
+            if wait > 0:
+                return None, wait
+            heapq.heappop(self.heap)
+            return job, None
+        return None, None
+
+    def _loop(self) -> None:
+        while True:
+            with self.condition:
+                job = None
+                while self.running:
+                    if self.paused:
+                        self.condition.wait()
+                        continue
+                    job, wait = self._next_due()
+                    if job is not None:
+                        break
+                    self.condition.wait(timeout=wait)
+                if not self.running:
+                    return
+                payloads, job.payloads = job.payloads, []
+                job.next_run = None  # Lo que se programe mientras corre queda en el heap
+                self.current_job = job.name
+
+            error = None
+            start = time.monotonic()
+            try:
+                job.func(payloads)
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                logger.error(f"❌ Error en trabajo {job.name}: {error}")
+
+            with self.condition:
+                self.current_job = None
+                job.runs += 1
+                job.last_run = time.time()
+                job.last_duration_ms = int((time.monotonic() - start) * 1000)
+                job.last_error = error
+                dropped = False
+                if error is not None and payloads:
+                    if job.failures < job.max_retries:
+                        job.payloads[:0] = payloads  # Reintentar el mismo lote
+                    else:
+                        dropped = True
+                        logger.warning(f"⚠️  {job.name}: {len(payloads)} eventos descartados tras "
+                                       f"{job.failures + 1} intentos")
+                if job.name in self.jobs:
+                    self._reschedule(job, error)
+                if dropped and not job.interval:
+                    job.failures = 0  # El próximo evento empieza de cero
+
+    def get_stats(self) -> Dict:
+        with self.condition:
+            return {
+                'running': self.running,
+                'paused': self.paused,
+                'current_job': self.current_job,
+                'jobs': [job.to_dict() for job in self.jobs.values()],
+            }
@@ -0,0 +1,294 @@
+"""
+Section Index - Índice persistente de encabezados de la documentación de F3-OS
+
+Precalcula el árbol de encabezados de cada archivo Markdown:
+- Nivel, título original y título normalizado de cada sección
+- Offsets del encabezado, del cuerpo y del final de la sección
+- Búsqueda de títulos exacta (O(1)) y difusa
+- Persistido en agent/data/section_index.json y revalidado por mtime/tamaño
+
+Obtener una sección es un acceso a diccionario más un slice del texto compartido
+del DocumentStore.
+"""
+
+import difflib
+import json
+import re
+import threading
+from dataclasses import dataclass, field, astuple
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from .doc_index import fold_accents
+from .document_store import get_document_store
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+# Título de la sección previa al primer encabezado (compatibilidad con _extract_sections)
+INTRO_SECTION = "introducción"
+
+INDEX_VERSION = 1
+
+_NON_WORD_RE = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def normalize_title(title: str) -> str:
+    """Normaliza un título: minúsculas, sin acentos, sin puntuación ni emojis"""
+    return _NON_WORD_RE.sub(' ', fold_accents(title)).strip()
+
+
+@dataclass
+class SectionEntry:
+    """Sección de un documento Markdown"""
+    title: str
+    normalized: str
+    level: int  # 0 = introducción, 1-6 = nivel del encabezado
+    heading_start: int  # Offset del encabezado
+    body_start: int  # Offset del contenido (tras la línea del encabezado)
+    body_end: int  # Fin del contenido propio (siguiente encabezado de cualquier nivel)
+    end: int  # Fin de la sección incluyendo subsecciones
+    parent: int = -1  # Índice de la sección padre (-1 = raíz)
+
+
+@dataclass
+class FileSections:
+    """Árbol de secciones de un archivo"""
+    path: str
+    version: Tuple[float, int]
+    entries: List[SectionEntry] = field(default_factory=list)
+    by_title: Dict[str, int] = field(default_factory=dict)  # título normalizado -> índice
+
+    def rebuild_lookup(self) -> None:
+        """Reconstruye el diccionario de títulos (el último título repetido gana)"""
+        self.by_title = {entry.normalized: i for i, entry in enumerate(self.entries)}
+
+
+def parse_sections(content: str) -> List[SectionEntry]:
+    """Parsea los encabezados de un documento Markdown (ignorando bloques de código)"""
+    entries: List[SectionEntry] = []
+    headings: List[Tuple[int, int, int, str]] = []  # (nivel, inicio, inicio_cuerpo, título)
+
+    in_code_block = False
+    offset = 0
+    for line in content.splitlines(keepends=True):
+        stripped = line.rstrip('\r\n')
+        if stripped.lstrip().startswith('```'):
+            in_code_block = not in_code_block
+        elif not in_code_block and stripped.startswith('#'):
+            level = len(stripped) - len(stripped.lstrip('#'))
+            title = stripped.lstrip('#').strip()
+            headings.append((level, offset, offset + len(line), title))
+        offset += len(line)
+
+    total = len(content)
+
+    # Sección de introducción (texto antes del primer encabezado)
+    first_heading = headings[0][1] if headings else total
+    if content[:first_heading].strip():
+        entries.append(SectionEntry(
+            title=INTRO_SECTION,
+            normalized=normalize_title(INTRO_SECTION),
+            level=0,
+            heading_start=0,
+            body_start=0,
+            body_end=first_heading,
+            end=first_heading,
+        ))
+
+    base = len(entries)
+    stack: List[int] = []  # Índices de secciones abiertas (para padres y fines)
+    for i, (level, start, body_start, title) in enumerate(headings):
+        body_end = headings[i + 1][1] if i + 1 < len(headings) else total
+
+        # Cerrar secciones de nivel igual o superior
+        while stack and entries[stack[-1]].level >= level:
+            entries[stack.pop()].end = start
+
+        entries.append(SectionEntry(
+            title=title,
+            normalized=normalize_title(title),
+            level=level,
+            heading_start=start,
+            body_start=body_start,
+            body_end=body_end,
+            end=total,
+            parent=stack[-1] if stack else -1,
+        ))
+        stack.append(base + i)
+
+    return entries
+
+
+class SectionIndex:
+    """Índice de secciones para todos los archivos Markdown del proyecto"""
+
+    def __init__(self, project_root: Path, index_path: Optional[Path] = None):
+        self.project_root = Path(project_root)
+        self.index_path = index_path or self.project_root / 'agent' / 'data' / 'section_index.json'
+        self.document_store = get_document_store(self.project_root)
+        self.files: Dict[str, FileSections] = {}
+        self.lock = threading.RLock()
+        self._load()
+
+    # ---------- Persistencia ----------
+
+    def _load(self) -> None:
+        """Carga el índice persistido (si existe y es compatible)"""
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return
+            for rel_path, file_data in data.get('files', {}).items():
+                sections = FileSections(
+                    path=rel_path,
+                    version=tuple(file_data['version']),
+                    entries=[SectionEntry(*entry) for entry in file_data['entries']],
+                )
+                sections.rebuild_lookup()
+                self.files[rel_path] = sections
+            logger.debug(f"Índice de secciones cargado: {len(self.files)} archivos")
+        except Exception as e:
+            logger.warning(f"Índice de secciones inválido, se reconstruirá: {e}")
+            self.files.clear()
+
+    def save(self) -> None:
+        """Persiste el índice en disco"""
+        with self.lock:
+            data = {
+                'version': INDEX_VERSION,
+                'files': {
+                    rel_path: {
+                        'version': list(sections.version),
+                        'entries': [list(astuple(entry)) for entry in sections.entries],
+                    }
+                    for rel_path, sections in self.files.items()
+                },
+            }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            tmp_path.replace(self.index_path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el índice de secciones: {e}")
+
+    # ---------- Construcción ----------
+
+    def get_file_sections(self, rel_path: str) -> Optional[FileSections]:
+        """Obtiene el árbol de secciones de un archivo (reparseando si cambió)"""
+        version = self.document_store.get_version(rel_path)
+        if version is None:
+            return None
+
+        with self.lock:
+            sections = self.files.get(rel_path)
+            if sections and sections.version == version:
+                return sections
+
+            content = self.document_store.get(rel_path)
+            if content is None:
+                return None
+            sections = FileSections(path=rel_path, version=version, entries=parse_sections(content))
+            sections.rebuild_lookup()
+            self.files[rel_path] = sections
+
+        self.save()
+        return sections
+
+    def invalidate(self, rel_path: str) -> None:
+        """Descarta las secciones de un archivo (se reparsearán en el próximo acceso)"""
+        with self.lock:
+            self.files.pop(rel_path, None)
+
+    def handle_file_event(self, event) -> None:
+        """Descarta solo las secciones del archivo afectado por un evento del FileWatcher"""
+        self.invalidate(event.path)
+
+    def attach_watcher(self, watcher) -> None:
+        """Recibe invalidaciones de un FileWatcher"""
+        watcher.subscribe(self.handle_file_event, categories=('docs', 'rules'))
+
+    # ---------- Consulta ----------
+
+    @traced('knowledge.section_index.find')
+    def find(self, rel_path: str, title: str, fuzzy: bool = True) -> Optional[SectionEntry]:
+        """Busca una sección por título (exacto por título normalizado, luego difuso)"""
+        sections = self.get_file_sections(rel_path)
+        if sections is None:
+            return None
+
+        normalized = normalize_title(title)
+        index = sections.by_title.get(normalized)
+        if index is not None:
+            return sections.entries[index]
+        if not fuzzy or not normalized:
+            return None
+
+        # Coincidencia parcial (la consulta contiene el título o viceversa)
+        for entry in sections.entries:
+            if entry.normalized and (normalized in entry.normalized or entry.normalized in normalized):
+                return entry
+
+        # Títulos parecidos (errores de tipeo, palabras cambiadas)
+        close = difflib.get_close_matches(normalized, list(sections.by_title), n=1, cutoff=0.75)
+        if close:
+            return sections.entries[sections.by_title[close[0]]]
+        return None
+
+    def get_section(self, rel_path: str, title: str, fuzzy: bool = True,
+                    include_subsections: bool = False) -> Optional[str]:
+        """Obtiene el contenido de una sección
+
+        Args:
+            rel_path: Archivo (relativo a la raíz del proyecto)
+            title: Título de la sección
+            fuzzy: Permitir coincidencias aproximadas
+            include_subsections: Incluir el contenido de las subsecciones
+        """
+        entry = self.find(rel_path, title, fuzzy)
+        if entry is None:
+            return None
+        content = self.document_store.get(rel_path)
+        if content is None:
+            return None
+        end = entry.end if include_subsections else entry.body_end
+        return content[entry.body_start:end].strip()
+
+    def get_sections(self, rel_path: str) -> Dict[str, str]:
+        """Obtiene todas las secciones de un archivo (título en minúsculas -> contenido)"""
+        sections = self.get_file_sections(rel_path)
+        content = self.document_store.get(rel_path)
+        if sections is None or content is None:
+            return {}
+        return {
+            entry.title.lower(): content[entry.body_start:entry.body_end].strip()
+            for entry in sections.entries
+        }
+
+    def get_outline(self, rel_path: str) -> List[Tuple[int, str]]:
+        """Obtiene el esquema de encabezados de un archivo [(nivel, título)]"""
+        sections = self.get_file_sections(rel_path)
+        if sections is None:
+            return []
+        return [(entry.level, entry.title) for entry in sections.entries]
+
+
+# Índices compartidos por raíz de proyecto
+_indexes: Dict[str, SectionIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_section_index(project_root: Path) -> SectionIndex:
+    """Obtiene el índice de secciones compartido para una raíz de proyecto"""
+    key = str(Path(project_root).resolve())
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = SectionIndex(Path(key))
+        return _indexes[key]
@@ -2,9 +2,214 @@
 Synthesis Engine - Equivalente a MEM Thread
 
 Sintetiza propuestas y genera feedback.
+
+El score, la recomendación y la confianza se calculan con una sola definición
+que sirve tanto para un PR (synthesize) como para lotes (score_batch):
+- MetricsTable guarda las métricas de muchos PRs por columnas (arrays NumPy
+  si está instalado; si no, listas recorridas en Python)
+- Los componentes del score son enchufables (register_component) y sus pesos
+  se configuran en synthesis.weights
+- El texto de feedback solo se genera para los resultados que se publican
+  (BatchResult.synthesis)
 """
 
-from typing import Dict, List, Optional
+import math
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él, score_batch recorre las filas en Python
+    np = None
+
+
+# Pesos del score general (configurables en synthesis.weights)
+DEFAULT_WEIGHTS = {
+    'base': 50,
+    'coherence': 0.4,  # Coherencia F3 (peso alto)
+    'complexity': 0.2,  # Complejidad (invertida)
+    'size_ok_bonus': 10,
+    'size_penalty': 20,
+    'sacred_strict_penalty': 30,  # Núcleo sagrado en fase lógica o perfecta
+    'sacred_penalty': 15,
+    'forbidden_term_penalty': 15,  # Por cada término prohibido
+    'experimentation_bonus': 10,  # Fase ilógica
+}
+
+RECOMMENDATIONS = ('approve', 'approve_with_caution', 'request_changes', 'reject')
+
+# Selección elemento a elemento: igual para escalares y para arrays
+Where = Callable[[Any, Any, Any], Any]
+
+
+def _where_scalar(condition, if_true, if_false):
+    return if_true if condition else if_false
+
+
+@dataclass
+class MetricsTable:
+    """Métricas de varios PRs por columnas (o de uno solo, con valores escalares)
+    
+    coherence y complexity valen NaN cuando la métrica falta.
+    """
+    coherence: Any
+    complexity: Any
+    total_lines: Any
+    oversized: Any  # not size_ok
+    touches_sacred: Any
+    forbidden_count: Any
+    vocabulary_issues: Any
+    similar: Any  # Hay decisiones similares en el historial
+    strict: Any  # Fase que exige rigor
+    experimental: Any  # Fase que permite experimentar
+    records: Optional[List[Dict]] = field(default=None, repr=False)  # Métricas originales (para el feedback)
+
+    @classmethod
+    def from_metrics(cls, metrics_list: Sequence[Dict], phase_info: Any = None,
+                     similar: Optional[Sequence[bool]] = None, vectorize: bool = True) -> 'MetricsTable':
+        """Construye la tabla desde dicts del Code Analyzer
+        
+        phase_info puede ser un dict común a todos los PRs o una lista (uno por PR).
+        """
+        count = len(metrics_list)
+        phases = phase_info if isinstance(phase_info, (list, tuple)) else [phase_info or {}] * count
+        similar = similar if similar is not None else [False] * count
+
+        def metric(metrics: Dict, key: str) -> float:
+            return float(metrics[key]) if metrics.get(key) is not None else math.nan
+        
+        columns = {
+            'coherence': [metric(m, 'coherence_score') for m in metrics_list],
+            'complexity': [metric(m, 'complexity_score') for m in metrics_list],
+            'total_lines': [m.get('total_lines', 0) for m in metrics_list],
+            'oversized': [not m.get('size_ok', True) for m in metrics_list],
+            'touches_sacred': [bool(m.get('touches_sacred_core', False)) for m in metrics_list],
+            'forbidden_count': [len(m.get('forbidden_terms_found', [])) for m in metrics_list],
+            'vocabulary_issues': [bool(m.get('vocabulary_issues', [])) for m in metrics_list],
+            'similar': [bool(s) for s in similar],
+            'strict': [bool(p.get('should_enforce_strictness', False)) for p in phases],
+            'experimental': [bool(p.get('should_allow_experimentation', False)) for p in phases],
+        }
+        if vectorize and np is not None:
+            columns = {
+                name: np.asarray(values, dtype=np.float64 if name in ('coherence', 'complexity') else None)
+                for name, values in columns.items()
+            }
+        return cls(records=list(metrics_list), **columns)
+
+    @property
+    def columns(self) -> List[str]:
+        return [f.name for f in fields(self) if f.name != 'records']
+    
+    def __len__(self) -> int:
+        return len(self.coherence)
+    
+    def row(self, index: int) -> 'MetricsTable':
+        """Fila como tabla de escalares"""
+        return MetricsTable(**{name: getattr(self, name)[index] for name in self.columns})
+
+
+# ---------- Componentes del score ----------
+# Cada componente recibe (métricas, pesos, where) y devuelve el ajuste del score;
+# debe funcionar igual con escalares y con arrays.
+
+def _coherence_component(m: MetricsTable, w: Dict, where: Where):
+    coherence = where(m.coherence == m.coherence, m.coherence, 50)  # NaN -> neutral
+    return (coherence - 50) * w['coherence']
+
+
+def _complexity_component(m: MetricsTable, w: Dict, where: Where):
+    # Invertido: menos complejo = mejor
+    complexity = where(m.complexity == m.complexity, m.complexity, 50)
+    return (100 - complexity - 50) * w['complexity']
+
+
+def _size_component(m: MetricsTable, w: Dict, where: Where):
+    return where(m.oversized, -w['size_penalty'], w['size_ok_bonus'])
+
+
+def _sacred_component(m: MetricsTable, w: Dict, where: Where):
+    # Si toca núcleo sagrado sin discusión previa; en fase lógica o perfecta, penalizar más
+    penalty = where(m.strict, w['sacred_strict_penalty'], w['sacred_penalty'])
+    return where(m.touches_sacred, -penalty, 0)
+
+
+def _forbidden_component(m: MetricsTable, w: Dict, where: Where):
+    return -(m.forbidden_count * w['forbidden_term_penalty'])
+
+
+def _experimentation_component(m: MetricsTable, w: Dict, where: Where):
+    # En fase ilógica, ser más permisivo
+    return where(m.experimental, w['experimentation_bonus'], 0)
+
+
+DEFAULT_COMPONENTS: Tuple[Tuple[str, Callable], ...] = (
+    ('coherence', _coherence_component),
+    ('complexity', _complexity_component),
+    ('size', _size_component),
+    ('sacred_core', _sacred_component),
+    ('forbidden_terms', _forbidden_component),
+    ('experimentation', _experimentation_component),
+)
+
+
+def _issue_flags(m: MetricsTable) -> Tuple:
+    """Issues clave como banderas, en el orden de _identify_issues"""
+    return (
+        m.oversized,
+        m.touches_sacred,
+        m.forbidden_count > 0,
+        m.coherence < 70,  # NaN < 70 es falso (métrica ausente = sin issue)
+        m.vocabulary_issues,
+    )
+
+
+def _recommendation_code(score, issues_count, experimental, where: Where):
+    """Índice en RECOMMENDATIONS según score, issues y fase"""
+    return where((score >= 80) & (issues_count == 0), 0,
+                 where((score >= 60) & (issues_count <= 1),
+                       where(experimental, 0, 1),  # En fase ilógica, ser más permisivo
+                       where(score >= 40, 2, 3)))
+
+
+def _confidence_value(m: MetricsTable, score, issues_count, where: Where):
+    """Confianza sin acotar (base 0.5)"""
+    confidence = 0.5
+    confidence = confidence + where(m.total_lines > 0, 0.2, 0.0)  # Más información
+    confidence = confidence + where(m.similar, 0.2, 0.0)  # Decisiones similares en el pasado
+    confidence = confidence - issues_count * 0.1  # Menos issues = más confianza
+    # Score extremo (muy alto o muy bajo) = más confianza
+    return confidence + where((score >= 80) | (score <= 30), 0.1, 0.0)
+
+
+@dataclass
+class BatchResult:
+    """Scores de un lote (columnas alineadas con la MetricsTable)"""
+    table: MetricsTable
+    scores: Any
+    issues_count: Any
+    recommendation_codes: Any
+    confidences: Any
+    engine: 'SynthesisEngine' = field(repr=False)
+    
+    def __len__(self) -> int:
+        return len(self.scores)
+    
+    def recommendation(self, index: int) -> str:
+        return RECOMMENDATIONS[int(self.recommendation_codes[index])]
+
+    @property
+    def recommendations(self) -> List[str]:
+        return [RECOMMENDATIONS[int(code)] for code in self.recommendation_codes]
+    
+    def synthesis(self, index: int, context_info: Optional[Dict] = None) -> Dict:
+        """Síntesis completa (issues, fortalezas y feedback) de una fila"""
+        if self.table.records is None:
+            raise ValueError("La tabla no conserva las métricas originales (usar MetricsTable.from_metrics)")
+        return self.engine._render(
+            self.table.records[index], context_info or {},
+            int(self.scores[index]), self.recommendation(index), float(self.confidences[index]),
+        )
 
 
 class SynthesisEngine:
@@ -14,6 +219,22 @@ class SynthesisEngine:
         self.config = config
         self.use_ai = config.get('ai', {}).get('use_ai_synthesis', False)
         # TODO: Inicializar cliente AI si use_ai_synthesis es True
+        self.weights: Dict = {}
+        self.load_weights(config)
+        self.components: List[Tuple[str, Callable]] = list(DEFAULT_COMPONENTS)
+    
+    def register_component(self, name: str, component: Callable[[MetricsTable, Dict, Where], Any]) -> None:
+        """Agrega (o reemplaza) un componente del score"""
+        self.components = [(n, c) for n, c in self.components if n != name]
+        self.components.append((name, component))
+    
+    def load_weights(self, config: dict) -> None:
+        """Pesos por defecto más los de `synthesis.weights` (también al recargar la configuración)"""
+        self.weights = {**DEFAULT_WEIGHTS, **config.get('synthesis', {}).get('weights', {})}
+    
+    def set_weights(self, weights: Dict) -> None:
+        """Ajusta pesos del score (p. ej. antes de re-puntuar el historial)"""
+        self.weights = {**self.weights, **weights}
     
     def synthesize(self, code_metrics: Dict, context_info: Dict, phase_info: Dict) -> Dict:
         """
@@ -27,99 +248,116 @@ class SynthesisEngine:
         Returns:
             Dict con síntesis y recomendaciones
         """
-        synthesis = {
-            'overall_score': 0,
-            'recommendation': 'pending',
-            'confidence': 0.0,
-            'key_issues': [],
-            'key_strengths': [],
-            'feedback': '',
-        }
+        row = self._row(code_metrics, context_info, phase_info)
         
         # Calcular score general
-        synthesis['overall_score'] = self._calculate_overall_score(
-            code_metrics, context_info, phase_info
-        )
-        
-        # Identificar issues clave
-        synthesis['key_issues'] = self._identify_issues(code_metrics, context_info)
-        
-        # Identificar fortalezas
-        synthesis['key_strengths'] = self._identify_strengths(code_metrics, context_info)
+        score = self._score(row)
         
-        # Generar recomendación
-        synthesis['recommendation'] = self._generate_recommendation(
-            synthesis['overall_score'],
-            synthesis['key_issues'],
-            phase_info
-        )
-        
-        # Calcular confianza
-        synthesis['confidence'] = self._calculate_confidence(
-            code_metrics, context_info, synthesis
-        )
+        # Issues clave, recomendación y confianza
+        issues_count = sum(1 for flag in _issue_flags(row) if flag)
+        recommendation = RECOMMENDATIONS[_recommendation_code(score, issues_count, row.experimental, _where_scalar)]
+        confidence = max(0.0, min(1.0, _confidence_value(row, score, issues_count, _where_scalar)))
         
         # Generar feedback legible
-        synthesis['feedback'] = self._generate_feedback(synthesis, code_metrics)
+        return self._render(code_metrics, context_info, score, recommendation, confidence)
+    
+    # ---------- Lotes ----------
+    
+    def score_batch(self, table: MetricsTable) -> BatchResult:
+        """Calcula scores, recomendaciones y confianzas de muchos PRs a la vez
         
-        return synthesis
+        Con NumPy es una pasada vectorizada por componente; sin NumPy (o con una
+        tabla de listas) recorre las filas con la misma definición.
+        """
+        if np is not None and isinstance(table.coherence, np.ndarray):
+            score = self.weights['base']
+            for _, component in self.components:
+                score = score + component(table, self.weights, np.where)
+            scores = np.clip(np.trunc(score), 0, 100).astype(np.int64)
+            scores = np.broadcast_to(scores, (len(table),))
+            issues_count = sum(np.asarray(flag, dtype=np.int64) for flag in _issue_flags(table))
+            codes = _recommendation_code(scores, issues_count, table.experimental, np.where)
+            confidences = np.clip(_confidence_value(table, scores, issues_count, np.where), 0.0, 1.0)
+            return BatchResult(table, scores, issues_count, np.asarray(codes), confidences, self)
+        
+        scores, issues, codes, confidences = [], [], [], []
+        for index in range(len(table)):
+            row = table.row(index)
+            score = self._score(row)
+            issues_count = sum(1 for flag in _issue_flags(row) if flag)
+            scores.append(score)
+            issues.append(issues_count)
+            codes.append(_recommendation_code(score, issues_count, row.experimental, _where_scalar))
+            confidences.append(max(0.0, min(1.0, _confidence_value(row, score, issues_count, _where_scalar))))
+        return BatchResult(table, scores, issues, codes, confidences, self)
     
-    def _calculate_overall_score(self, code_metrics: Dict, context_info: Dict, phase_info: Dict) -> int:
-        """Calcula score general (0-100)"""
-        score = 50  # Base neutral
-        
-        # Score de coherencia F3 (peso alto)
-        coherence = code_metrics.get('coherence_score', 50)
-        score += (coherence - 50) * 0.4
-        
-        # Score de complejidad (invertido: menos complejo = mejor)
-        complexity = code_metrics.get('complexity_score', 50)
-        score += (100 - complexity - 50) * 0.2
-        
-        # Tamaño del PR
-        if code_metrics.get('size_ok', True):
-            score += 10
-        else:
-            score -= 20
-        
-        # Si toca núcleo sagrado sin discusión previa
-        if code_metrics.get('touches_sacred_core', False):
-            # En fase lógica o perfecta, penalizar más
-            if phase_info.get('should_enforce_strictness', False):
-                score -= 30
-            else:
-                score -= 15
-        
-        # Términos prohibidos
-        forbidden_count = len(code_metrics.get('forbidden_terms_found', []))
-        score -= forbidden_count * 15
-        
-        # Ajustar según fase
-        if phase_info.get('should_allow_experimentation', False):
-            # En fase ilógica, ser más permisivo
-            score += 10
+    def score_many(self, metrics_list: Sequence[Dict], phase_info: Any = None,
+                   similar: Optional[Sequence[bool]] = None) -> BatchResult:
+        """score_batch sobre dicts del Code Analyzer"""
+        return self.score_batch(MetricsTable.from_metrics(metrics_list, phase_info, similar))
+    
+    def rescore_decisions(self, decisions: Sequence[Dict], weights: Optional[Dict] = None) -> BatchResult:
+        """Re-puntúa el historial de decisiones (ContextManager.decisions) con los pesos actuales
         
+        El historial solo guarda las métricas del código: la fase y las decisiones
+        similares de entonces no se conocen y se toman como neutras. Para probar
+        muchos pesos, construir la MetricsTable una vez y llamar a score_batch.
+        """
+        if weights:
+            self.set_weights(weights)
+        return self.score_many([decision.get('metrics', {}) for decision in decisions])
+    
+    # ---------- Un PR ----------
+
+    @staticmethod
+    def _row(code_metrics: Dict, context_info: Dict, phase_info: Dict) -> MetricsTable:
+        similar = bool(context_info.get('similar_decisions', []))
+        return MetricsTable.from_metrics([code_metrics], [phase_info], [similar], vectorize=False).row(0)
+    
+    def _score(self, row: MetricsTable) -> int:
+        score = self.weights['base']
+        for _, component in self.components:
+            score = score + component(row, self.weights, _where_scalar)
         return max(0, min(100, int(score)))
     
+    def _calculate_overall_score(self, code_metrics: Dict, context_info: Dict, phase_info: Dict) -> int:
+        """Calcula score general (0-100)"""
+        return self._score(self._row(code_metrics, context_info, phase_info))
+    
+    def _render(self, code_metrics: Dict, context_info: Dict, score: int,
+                recommendation: str, confidence: float) -> Dict:
+        """Síntesis completa con textos (solo para resultados que se publican)"""
+        synthesis = {
+            'overall_score': score,
+            'recommendation': recommendation,
+            'confidence': confidence,
+            'key_issues': self._identify_issues(code_metrics, context_info),
+            'key_strengths': self._identify_strengths(code_metrics, context_info),
+            'feedback': '',
+        }
+        synthesis['feedback'] = self._generate_feedback(synthesis, code_metrics)
+        return synthesis
+    
     def _identify_issues(self, code_metrics: Dict, context_info: Dict) -> List[str]:
         """Identifica issues clave"""
+        oversized, sacred, forbidden, low_coherence, vocabulary = _issue_flags(
+            MetricsTable.from_metrics([code_metrics], vectorize=False).row(0))
         issues = []
         
-        if not code_metrics.get('size_ok', True):
+        if oversized:
             issues.append("PR demasiado grande (viola regla de PRs pequeños)")
         
-        if code_metrics.get('touches_sacred_core', False):
+        if sacred:
             issues.append("Toca núcleo sagrado (requiere Issue [CONCEPTUAL] previo)")
         
-        forbidden_terms = code_metrics.get('forbidden_terms_found', [])
-        if forbidden_terms:
+        if forbidden:
+            forbidden_terms = code_metrics.get('forbidden_terms_found', [])
             issues.append(f"Usa términos prohibidos: {', '.join(forbidden_terms)}")
         
-        if code_metrics.get('coherence_score', 100) < 70:
+        if low_coherence:
             issues.append("Baja coherencia con modelo F3")
         
-        vocabulary_issues = code_metrics.get('vocabulary_issues', [])
-        if vocabulary_issues:
+        if vocabulary:
             issues.append("Problemas con vocabulario F3")
         
         return issues
@@ -147,40 +385,14 @@ class SynthesisEngine:
     
     def _generate_recommendation(self, score: int, issues: List[str], phase_info: Dict) -> str:
         """Genera recomendación basada en score y issues"""
-        if score >= 80 and not issues:
-            return 'approve'
-        elif score >= 60 and len(issues) <= 1:
-            # En fase ilógica, ser más permisivo
-            if phase_info.get('should_allow_experimentation', False):
-                return 'approve'
-            return 'approve_with_caution'
-        elif score >= 40:
-            return 'request_changes'
-        else:
-            return 'reject'
+        experimental = phase_info.get('should_allow_experimentation', False)
+        return RECOMMENDATIONS[_recommendation_code(score, len(issues), experimental, _where_scalar)]
     
     def _calculate_confidence(self, code_metrics: Dict, context_info: Dict, synthesis: Dict) -> float:
         """Calcula confianza en la síntesis (0.0-1.0)"""
-        confidence = 0.5  # Base
-        
-        # Más información = más confianza
-        if code_metrics.get('total_lines', 0) > 0:
-            confidence += 0.2
-        
-        # Decisiones similares en el pasado = más confianza
-        similar_decisions = context_info.get('similar_decisions', [])
-        if similar_decisions:
-            confidence += 0.2
-        
-        # Menos issues = más confianza
-        issues_count = len(synthesis.get('key_issues', []))
-        confidence -= issues_count * 0.1
-        
-        # Score extremo (muy alto o muy bajo) = más confianza
-        score = synthesis.get('overall_score', 50)
-        if score >= 80 or score <= 30:
-            confidence += 0.1
-        
+        row = self._row(code_metrics, context_info, {})
+        confidence = _confidence_value(row, synthesis.get('overall_score', 50),
+                                       len(synthesis.get('key_issues', [])), _where_scalar)
         return max(0.0, min(1.0, confidence))
     
     def _generate_feedback(self, synthesis: Dict, code_metrics: Dict) -> str:
@@ -224,7 +436,3 @@ class SynthesisEngine:
             feedback.append("❌ Este PR no está alineado con el modelo F3 y debe ser rechazado.")
         
         return '\n'.join(feedback)
-
-
-
-
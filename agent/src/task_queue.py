@@ -0,0 +1,304 @@
+"""
+Task Queue - Cola persistente de tareas autónomas con prioridades
+
+Cola de tareas en SQLite (agent/data/task_queue.db) que sobrevive a reinicios:
+- Prioridad numérica (mayor = antes; a igual prioridad, la más antigua)
+- Leases: una tarea tomada queda asignada a un dueño hasta que vence su lease;
+  si el proceso muere, la tarea vuelve a estar disponible al vencer
+- Reintentos con backoff exponencial hasta max_attempts
+- dedupe_key evita encolar dos veces la misma tarea pendiente
+- Las tareas sin prioridad explícita se repriorizan cuando cambian las reglas
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Estados
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    context TEXT,
+    priority INTEGER NOT NULL,
+    explicit_priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    dedupe_key TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (status, priority DESC, id);
+CREATE UNIQUE INDEX IF NOT EXISTS tasks_dedupe ON tasks (dedupe_key)
+    WHERE dedupe_key IS NOT NULL AND status IN ('pending', 'leased');
+"""
+
+
+@dataclass
+class Task:
+    """Tarea de la cola"""
+    id: int
+    kind: str
+    payload: Any
+    context: Optional[str]
+    priority: int
+    status: str
+    attempts: int
+    max_attempts: int
+    available_at: float
+    lease_owner: Optional[str]
+    lease_expires: Optional[float]
+    dedupe_key: Optional[str]
+    last_error: Optional[str]
+    created_at: float
+    updated_at: float
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> 'Task':
+        data = dict(row)
+        data['payload'] = json.loads(data['payload'])
+        data.pop('explicit_priority', None)
+        return cls(**data)
+
+    def to_dict(self, include_payload: bool = False) -> Dict:
+        data = asdict(self)
+        if not include_payload:
+            data.pop('payload')
+        return data
+
+
+class TaskQueue:
+    """Cola de prioridad persistente con leases y reintentos"""
+
+    def __init__(self, db_path: Path, priority_for: Optional[Callable[[Optional[str]], int]] = None,
+                 retry_delay: float = 30.0, default_priority: int = 5):
+        self.db_path = Path(db_path)
+        self.priority_for = priority_for
+        self.retry_delay = retry_delay
+        self.default_priority = default_priority
+        self.lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: transacciones explícitas (BEGIN IMMEDIATE entre procesos)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def _priority(self, context: Optional[str]) -> int:
+        if self.priority_for is None:
+            return self.default_priority
+        return self.priority_for(context)
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT/ROLLBACK (llamar con el lock tomado)"""
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+
+    # ---------- Productor ----------
+
+    def enqueue(self, kind: str, payload: Any = None, context: Optional[str] = None,
+                priority: Optional[int] = None, max_attempts: int = 3, delay: float = 0.0,
+                dedupe_key: Optional[str] = None) -> int:
+        """Encola una tarea (devuelve su id; si dedupe_key ya está pendiente, el id existente)"""
+        now = time.time()
+        explicit = priority is not None
+        priority = priority if explicit else self._priority(context)
+        with self.lock, self._transaction() as conn:
+            if dedupe_key is not None:
+                row = conn.execute(
+                    "SELECT id FROM tasks WHERE dedupe_key = ? AND status IN (?, ?)",
+                    (dedupe_key, PENDING, LEASED)).fetchone()
+                if row is not None:
+                    return row['id']
+            cursor = conn.execute(
+                "INSERT INTO tasks (kind, payload, context, priority, explicit_priority, status, "
+                "max_attempts, available_at, dedupe_key, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload, ensure_ascii=False, default=str), context, priority,
+                 int(explicit), PENDING, max(1, max_attempts), now + delay, dedupe_key, now, now))
+            return cursor.lastrowid
+
+    # ---------- Consumidor ----------
+
+    def lease(self, owner: str, lease_seconds: float = 120.0,
+              kinds: Optional[Iterable[str]] = None) -> Optional[Task]:
+        """Toma la tarea disponible más prioritaria (incluye leases vencidos)"""
+        now = time.time()
+        query = ("SELECT * FROM tasks WHERE ((status = ? AND available_at <= ?) "
+                 "OR (status = ? AND lease_expires < ?))")
+        params: List[Any] = [PENDING, now, LEASED, now]
+        if kinds is not None:
+            kinds = list(kinds)
+            query += f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params.extend(kinds)
+        query += " ORDER BY priority DESC, id LIMIT 1"
+
+        with self.lock, self._transaction() as conn:
+            while True:
+                row = conn.execute(query, params).fetchone()
+                if row is None:
+                    return None
+                if row['status'] != LEASED:
+                    break
+                # Lease vencido: el dueño murió o se colgó
+                if row['attempts'] < row['max_attempts']:
+                    logger.warning(f"⚠️  Lease vencido de la tarea {row['id']} ({row['lease_owner']}), se reasigna")
+                    break
+                conn.execute(
+                    "UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+                    "last_error = ?, updated_at = ? WHERE id = ?",
+                    (FAILED, 'lease vencido sin más intentos', now, row['id']))
+            conn.execute(
+                "UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (LEASED, owner, now + lease_seconds, now, row['id']))
+            row = conn.execute("SELECT * FROM tasks WHERE id = ?", (row['id'],)).fetchone()
+        return Task.from_row(row)
+
+    def extend(self, task_ids: Iterable[int], owner: str, lease_seconds: float = 120.0) -> int:
+        """Renueva los leases de tareas en curso (devuelve cuántos seguían siendo del dueño)"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return 0
+        now = time.time()
+        with self.lock, self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE status = ? AND lease_owner = ? "
+                f"AND id IN ({', '.join('?' * len(task_ids))})",
+                (now + lease_seconds, now, LEASED, owner, *task_ids))
+            return cursor.rowcount
+
+    def complete(self, task_id: int, owner: str) -> bool:
+        """Marca una tarea como hecha (False si el lease ya no era del dueño)"""
+        now = time.time()
+        with self.lock, self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+                "last_error = NULL, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, now, task_id, LEASED, owner))
+            return cursor.rowcount == 1
+
+    def fail(self, task_id: int, owner: str, error: str, retry: bool = True) -> Optional[str]:
+        """Registra un fallo: reintenta con backoff o marca la tarea como fallida
+
+        Returns:
+            Nuevo estado (pending/failed) o None si el lease ya no era del dueño
+        """
+        now = time.time()
+        with self.lock, self._transaction() as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM tasks WHERE id = ? AND status = ? "
+                               "AND lease_owner = ?", (task_id, LEASED, owner)).fetchone()
+            if row is None:
+                return None
+            if retry and row['attempts'] < row['max_attempts']:
+                status = PENDING
+                available_at = now + self.retry_delay * (2 ** (row['attempts'] - 1))
+            else:
+                status = FAILED
+                available_at = now
+            conn.execute(
+                "UPDATE tasks SET status = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ?",
+                (status, available_at, error[:2000], now, task_id))
+        return status
+
+    def release(self, task_id: int, owner: str) -> None:
+        """Devuelve una tarea sin contar el intento (p. ej. al detener el trabajador)"""
+        now = time.time()
+        with self.lock, self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = ?, attempts = MAX(attempts - 1, 0), lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (PENDING, now, task_id, LEASED, owner))
+
+    # ---------- Mantenimiento ----------
+
+    def reprioritize(self) -> int:
+        """Recalcula la prioridad de las tareas pendientes sin prioridad explícita"""
+        with self.lock:
+            contexts = [row['context'] for row in self.conn.execute(
+                "SELECT DISTINCT context FROM tasks WHERE status = ? AND explicit_priority = 0", (PENDING,))]
+        changed = 0
+        priorities = {context: self._priority(context) for context in contexts}
+        with self.lock, self._transaction() as conn:
+            for context, priority in priorities.items():
+                changed += conn.execute(
+                    "UPDATE tasks SET priority = ? WHERE status = ? AND explicit_priority = 0 "
+                    "AND context IS ? AND priority != ?",
+                    (priority, PENDING, context, priority)).rowcount
+        return changed
+
+    def purge(self, older_than_days: float = 7.0) -> int:
+        """Borra tareas terminadas (hechas o fallidas) más antiguas que N días"""
+        cutoff = time.time() - older_than_days * 86400
+        with self.lock, self._transaction() as conn:
+            return conn.execute("DELETE FROM tasks WHERE status IN (?, ?) AND updated_at < ?",
+                                (DONE, FAILED, cutoff)).rowcount
+
+    def next_available_in(self) -> Optional[float]:
+        """Segundos hasta que haya una tarea disponible (0 = ya; None = ninguna pendiente)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MIN(CASE WHEN status = ? THEN available_at ELSE lease_expires END) AS t "
+                "FROM tasks WHERE status IN (?, ?)", (PENDING, PENDING, LEASED)).fetchone()
+        if row['t'] is None:
+            return None
+        return max(0.0, row['t'] - time.time())
+
+    # ---------- Consulta ----------
+
+    def get(self, task_id: int) -> Optional[Task]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return Task.from_row(row) if row else None
+
+    def list_tasks(self, status: Optional[str] = None, limit: int = 50) -> List[Task]:
+        query = "SELECT * FROM tasks"
+        params: List[Any] = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY priority DESC, id LIMIT ?" if status in (PENDING, LEASED) else " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [Task.from_row(row) for row in rows]
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,341 @@
+"""
+Test Orchestrator - Ejecución paralela de las suites de tests del proyecto
+
+Organiza los tests del proyecto como suites independientes:
+- cargo test del kernel y pytest del agente corren a la vez
+- pytest se reparte en shards por archivo (equilibrados por duración histórica)
+- Todo dentro del presupuesto de núcleos del ResourceManager
+- Resultados estructurados estilo JUnit (duración y estado por test) en JSON
+- Historial en agent/data/test_results/ para analizar tendencias
+
+El tiempo de respuesta es el de la suite más lenta, no la suma de todas.
+"""
+
+import json
+import re
+import shutil
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from .job_engine import JobEngine
+
+logger = logging.getLogger(__name__)
+
+
+# Línea de resultado de `cargo test`: "test modulo::nombre ... ok"
+_CARGO_TEST_RE = re.compile(r'^test (\S+) \.\.\. (ok|FAILED|ignored)', re.MULTILINE)
+
+# Peso de la media móvil de duraciones por archivo
+DURATION_SMOOTHING = 0.5
+
+# Informes completos conservados (el historial resumido no se recorta)
+MAX_STORED_REPORTS = 50
+
+
+@dataclass
+class TestSuite:
+    """Suite de tests ejecutable como un único comando"""
+    name: str
+    command: List[str]
+    kind: str  # cargo, pytest
+    files: List[str] = field(default_factory=list)  # Archivos del shard (pytest)
+    junit_path: Optional[Path] = None
+
+
+def _parse_junit(path: Path) -> List[Dict]:
+    """Casos de un informe JUnit XML de pytest"""
+    cases = []
+    root = ET.parse(path).getroot()
+    for case in root.iter('testcase'):
+        status, message = 'passed', None
+        for child in case:
+            if child.tag in ('failure', 'error'):
+                status = 'failed' if child.tag == 'failure' else 'error'
+                message = (child.get('message') or '')[:500]
+                break
+            if child.tag == 'skipped':
+                status = 'skipped'
+                message = (child.get('message') or '')[:500]
+                break
+        cases.append({
+            'classname': case.get('classname', ''),
+            'name': case.get('name', ''),
+            'file': case.get('file'),
+            'time': float(case.get('time') or 0.0),
+            'status': status,
+            'message': message,
+        })
+    return cases
+
+
+def _parse_cargo(output: str) -> List[Dict]:
+    """Casos de la salida de `cargo test` (sin duración por test)"""
+    statuses = {'ok': 'passed', 'FAILED': 'failed', 'ignored': 'skipped'}
+    cases = []
+    for match in _CARGO_TEST_RE.finditer(output):
+        module, _, name = match.group(1).rpartition('::')
+        cases.append({
+            'classname': module,
+            'name': name,
+            'file': None,
+            'time': None,
+            'status': statuses[match.group(2)],
+            'message': None,
+        })
+    return cases
+
+
+class TestOrchestrator:
+    """Ejecuta las suites de tests en paralelo y guarda los resultados"""
+
+    def __init__(self, executor, results_dir: Optional[Path] = None):
+        self.executor = executor
+        self.project_root = executor.project_root
+        self.results_dir = results_dir or self.project_root / 'agent' / 'data' / 'test_results'
+        self.durations_path = self.results_dir / 'durations.json'
+        self.history_path = self.results_dir / 'history.jsonl'
+        self.engine: Optional[JobEngine] = None
+        self.workers = 0
+
+    # ---------- Presupuesto ----------
+
+    def _worker_budget(self) -> int:
+        """Procesos de test simultáneos permitidos por el ResourceManager"""
+        limits = self.executor.resource_manager.limits
+        return max(1, int(limits.available_cores))
+
+    def _get_engine(self, workers: int) -> JobEngine:
+        """Motor de trabajos propio de los tests (dimensionado al presupuesto actual)"""
+        if self.engine is None or self.workers != workers:
+            base = self.executor.job_engine
+            self.engine = JobEngine(
+                max_concurrent=workers,
+                output_max_bytes=base.output_max_bytes,
+                default_timeout=base.default_timeout,
+                idle_timeout=base.idle_timeout,
+            )
+            self.workers = workers
+        return self.engine
+
+    # ---------- Descubrimiento ----------
+
+    def _load_durations(self) -> Dict[str, float]:
+        try:
+            with open(self.durations_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _shard_files(self, files: List[str], shards: int) -> List[List[str]]:
+        """Reparte archivos en shards equilibrados (mayor duración primero, al shard más libre)"""
+        durations = self._load_durations()
+
+        def cost(rel_path: str) -> float:
+            if rel_path in durations:
+                return durations[rel_path]
+            # Sin historial: el tamaño del archivo aproxima la cantidad de tests
+            try:
+                return (self.project_root / rel_path).stat().st_size / 10000.0
+            except OSError:
+                return 0.1
+
+        buckets: List[List[str]] = [[] for _ in range(shards)]
+        loads = [0.0] * shards
+        for rel_path in sorted(files, key=cost, reverse=True):
+            target = loads.index(min(loads))
+            buckets[target].append(rel_path)
+            loads[target] += cost(rel_path)
+        return [bucket for bucket in buckets if bucket]
+
+    def discover_suites(self, workers: int, junit_dir: Path) -> List[TestSuite]:
+        """Suites a ejecutar: cargo test y los shards de pytest"""
+        suites: List[TestSuite] = []
+
+        if (self.project_root / 'kernel' / 'Cargo.toml').exists():
+            suites.append(TestSuite(
+                name='cargo',
+                command=['cargo', 'test', '--manifest-path', 'kernel/Cargo.toml'],
+                kind='cargo',
+            ))
+
+        tests_dir = self.project_root / 'agent' / 'tests'
+        if tests_dir.exists():
+            files = sorted(
+                str(path.relative_to(self.project_root))
+                for pattern in ('test_*.py', '*_test.py')
+                for path in tests_dir.rglob(pattern)
+            )
+            # cargo ocupa un proceso; pytest se reparte el resto del presupuesto
+            shards = max(1, min(len(files), workers - len(suites)))
+            groups = self._shard_files(files, shards) if files else [['agent/tests/']]
+            for i, group in enumerate(groups):
+                junit_path = junit_dir / f'pytest_{i}.xml'
+                suites.append(TestSuite(
+                    name=f'pytest[{i + 1}/{len(groups)}]' if len(groups) > 1 else 'pytest',
+                    # xunit1 incluye el archivo de cada caso (relativo a --rootdir)
+                    command=['python3', '-m', 'pytest', '-q', '-p', 'no:cacheprovider',
+                             '--rootdir', '.', '-o', 'junit_family=xunit1',
+                             f'--junitxml={junit_path}'] + group,
+                    kind='pytest',
+                    files=group,
+                    junit_path=junit_path,
+                ))
+
+        return suites
+
+    # ---------- Ejecución ----------
+
+    def run(self, context: Dict = None, progress_activity_ids: Optional[List[str]] = None) -> Dict:
+        """Ejecuta todas las suites en paralelo y devuelve el informe"""
+        workers = self._worker_budget()
+        engine = self._get_engine(workers)
+        junit_dir = Path(tempfile.mkdtemp(prefix='f3_tests_'))
+        start_time = time.time()
+
+        try:
+            suites = self.discover_suites(workers, junit_dir)
+
+            # Lanzar todas las suites; el motor limita cuántas corren a la vez
+            launched = []
+            for suite in suites:
+                job, error = self.executor._start_job(
+                    suite.command, context=context,
+                    progress_activity_ids=progress_activity_ids, engine=engine
+                )
+                launched.append((suite, job, error))
+
+            results = []
+            for suite, job, error in launched:
+                if job is None:
+                    results.append({**error, 'suite': suite.name, 'testcases': []})
+                    continue
+                job.wait()
+                result = self.executor._job_result(job)
+                result['suite'] = suite.name
+                result['testcases'] = self._collect_cases(suite, result)
+                results.append(result)
+        finally:
+            shutil.rmtree(junit_dir, ignore_errors=True)
+
+        report = self._build_report(results, workers, int((time.time() - start_time) * 1000))
+        self._store(report)
+        self._update_durations(results)
+        return {
+            'success': report['success'],
+            'results': results,
+            'report': report,
+        }
+
+    def _collect_cases(self, suite: TestSuite, result: Dict) -> List[Dict]:
+        if suite.kind == 'pytest' and suite.junit_path and suite.junit_path.exists():
+            try:
+                return _parse_junit(suite.junit_path)
+            except ET.ParseError as e:
+                logger.warning(f"Informe JUnit ilegible de {suite.name}: {e}")
+                return []
+        if suite.kind == 'cargo':
+            return _parse_cargo(result.get('stdout', ''))
+        return []
+
+    def _build_report(self, results: List[Dict], workers: int, duration_ms: int) -> Dict:
+        """Informe estilo JUnit (sin la salida cruda de los comandos)"""
+        suites = []
+        for result in results:
+            cases = result['testcases']
+            suites.append({
+                'name': result['suite'],
+                'command': result.get('command'),
+                'status': result.get('status', 'error'),
+                'success': result.get('success', False),
+                'return_code': result.get('return_code'),
+                'error': result.get('error'),
+                'duration_ms': result.get('duration_ms'),
+                'tests': len(cases),
+                'failures': sum(1 for c in cases if c['status'] == 'failed'),
+                'errors': sum(1 for c in cases if c['status'] == 'error'),
+                'skipped': sum(1 for c in cases if c['status'] == 'skipped'),
+                'testcases': cases,
+            })
+        serial_ms = sum(s['duration_ms'] or 0 for s in suites)
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'success': all(s['success'] for s in suites),
+            'workers': workers,
+            'duration_ms': duration_ms,
+            'serial_duration_ms': serial_ms,
+            'tests': sum(s['tests'] for s in suites),
+            'failures': sum(s['failures'] for s in suites),
+            'errors': sum(s['errors'] for s in suites),
+            'skipped': sum(s['skipped'] for s in suites),
+            'suites': suites,
+        }
+
+    # ---------- Persistencia ----------
+
+    def _store(self, report: Dict) -> None:
+        """Guarda el informe completo y añade un resumen al historial"""
+        try:
+            self.results_dir.mkdir(parents=True, exist_ok=True)
+            name = datetime.now().strftime('report_%Y%m%d_%H%M%S_%f.json')
+            tmp_path = self.results_dir / (name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False)
+            tmp_path.replace(self.results_dir / name)
+
+            summary = {key: report[key] for key in
+                       ('timestamp', 'success', 'workers', 'duration_ms', 'serial_duration_ms',
+                        'tests', 'failures', 'errors', 'skipped')}
+            summary['report'] = name
+            summary['suites'] = {s['name']: s['duration_ms'] for s in report['suites']}
+            with open(self.history_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + '\n')
+
+            for old in sorted(self.results_dir.glob('report_*.json'))[:-MAX_STORED_REPORTS]:
+                old.unlink()
+        except OSError as e:
+            logger.warning(f"No se pudieron guardar los resultados de tests: {e}")
+
+    def _update_durations(self, results: List[Dict]) -> None:
+        """Actualiza la duración media por archivo (para equilibrar los shards)"""
+        per_file: Dict[str, float] = {}
+        for result in results:
+            for case in result['testcases']:
+                if case.get('file') and case.get('time') is not None:
+                    per_file[case['file']] = per_file.get(case['file'], 0.0) + case['time']
+        if not per_file:
+            return
+
+        durations = self._load_durations()
+        for rel_path, seconds in per_file.items():
+            previous = durations.get(rel_path)
+            durations[rel_path] = seconds if previous is None else (
+                DURATION_SMOOTHING * seconds + (1 - DURATION_SMOOTHING) * previous)
+        try:
+            self.results_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.durations_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(durations, f, ensure_ascii=False)
+            tmp_path.replace(self.durations_path)
+        except OSError as e:
+            logger.warning(f"No se pudieron guardar las duraciones de tests: {e}")
+
+    def get_history(self, limit: int = 20) -> List[Dict]:
+        """Resúmenes de las últimas ejecuciones (para tendencias)"""
+        try:
+            with open(self.history_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()[-limit:]
+        except OSError:
+            return []
+        history = []
+        for line in lines:
+            try:
+                history.append(json.loads(line))
+            except ValueError:
+                continue
+        return history
@@ -0,0 +1,305 @@
+"""
+Tracing - Spans con temporizadores de nanosegundos para el pipeline del agente
+
+Muestra dónde se va la latencia (etapas de evaluate_pr, llamadas a GitHub,
+consultas de conocimiento, handlers HTTP):
+- span(nombre, **atributos) es un context manager; el span activo se guarda en un
+  ContextVar, así que los spans anidados quedan como hijos (trace_id / parent_id)
+- Duración con perf_counter_ns; inicio con time_ns (reloj de pared)
+- Desactivado: span() devuelve un span nulo compartido y @traced llama directo a
+  la función (coste cercano a cero)
+- Cada span terminado actualiza estadísticas por nombre (conteo, errores, total,
+  máximo y un reservorio de duraciones para p50/p95/p99) y se exporta por lotes
+  a agent/data/traces/ (JSON Lines rotado) desde un hilo de volcado
+- get_metrics() resume todo para /api/metrics
+"""
+
+import functools
+import itertools
+import math
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+import logging
+
+from .execution_log import ExecutionLog
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Percentil por rango más cercano sobre valores ordenados"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Span:
+    """Tramo de trabajo medido (context manager)"""
+
+    __slots__ = ('tracer', 'name', 'attributes', 'trace_id', 'span_id', 'parent_id',
+                 'start_wall_ns', 'start_ns', 'duration_ns', 'status', 'error', 'thread', 'token')
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.trace_id: Optional[str] = None
+        self.span_id: Optional[str] = None
+        self.parent_id: Optional[str] = None
+        self.start_wall_ns = 0
+        self.start_ns = 0
+        self.duration_ns = 0
+        self.status = 'ok'
+        self.error: Optional[str] = None
+        self.thread: Optional[str] = None
+        self.token = None
+
+    def set(self, key: str, value: Any) -> None:
+        """Agrega un atributo (p. ej. el resultado de la etapa)"""
+        self.attributes[key] = value
+
+    def __enter__(self) -> 'Span':
+        parent = _current_span.get()
+        self.span_id = f"{next(self.tracer.ids):x}"
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+        else:
+            self.trace_id = f"{random.getrandbits(64):016x}"
+        self.thread = threading.current_thread().name
+        self.token = _current_span.set(self)
+        self.start_wall_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration_ns = time.perf_counter_ns() - self.start_ns
+        _current_span.reset(self.token)
+        self.token = None
+        if exc_type is not None:
+            self.status = 'error'
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self) -> Dict:
+        return {
+            'timestamp': datetime.fromtimestamp(self.start_wall_ns / 1e9).isoformat(),
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_ns': self.start_wall_ns,
+            'duration_ns': self.duration_ns,
+            'status': self.status,
+            'error': self.error,
+            'thread': self.thread,
+            'attributes': self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Span nulo: lo que devuelve span() con el tracing desactivado"""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+class _SpanStats:
+    """Estadísticas acumuladas de un nombre de span"""
+
+    __slots__ = ('count', 'errors', 'total_ns', 'max_ns', 'samples')
+
+    def __init__(self, reservoir_size: int):
+        self.count = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.samples: Deque[int] = deque(maxlen=reservoir_size)  # Duraciones más recientes
+
+    def to_dict(self) -> Dict:
+        values = sorted(self.samples)
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': round(self.total_ns / 1e6, 3),
+            'mean_ms': round(self.total_ns / self.count / 1e6, 3) if self.count else 0.0,
+            'p50_ms': round(percentile(values, 0.50) / 1e6, 3),
+            'p95_ms': round(percentile(values, 0.95) / 1e6, 3),
+            'p99_ms': round(percentile(values, 0.99) / 1e6, 3),
+            'max_ms': round(self.max_ns / 1e6, 3),
+        }
+
+
+class Tracer:
+    """Registra spans, mantiene estadísticas por nombre y exporta a JSON Lines"""
+
+    def __init__(self):
+        self.enabled = False
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.reservoir_size = 1024
+        self.stats: Dict[str, _SpanStats] = {}
+        self.recent: Deque[Span] = deque(maxlen=200)
+        self.pending: List[Span] = []
+        self.max_pending = 10000
+        self.dropped = 0
+        self.exported = 0
+        self.log: Optional[ExecutionLog] = None
+        self.flush_interval = 2.0
+        self.flush_event = threading.Event()
+        self.flusher: Optional[threading.Thread] = None
+
+    def configure(self, enabled: bool, export_dir: Optional[Path] = None, reservoir_size: int = 1024,
+                  recent_size: int = 200, flush_interval: float = 2.0, max_pending: int = 10000,
+                  max_segment_bytes: int = 10 * 1024 * 1024, max_segments: int = 10) -> None:
+        """(Re)configura el tracer; las estadísticas acumuladas se conservan"""
+        with self.lock:
+            self.reservoir_size = reservoir_size
+            self.recent = deque(self.recent, maxlen=recent_size)
+            self.flush_interval = flush_interval
+            self.max_pending = max_pending
+            if export_dir is None:
+                self.log = None
+            elif self.log is None or self.log.log_dir != Path(export_dir):
+                self.log = ExecutionLog(Path(export_dir), max_segment_bytes=max_segment_bytes,
+                                        max_segments=max_segments)
+            self.enabled = enabled
+        if enabled and self.log is not None and self.flusher is None:
+            self.flusher = threading.Thread(target=self._flush_loop, name='tracing-flush', daemon=True)
+            self.flusher.start()
+        if not enabled:
+            self.flush()
+
+    def span(self, name: str, **attributes) -> Any:
+        """Context manager que mide un tramo (span nulo si el tracing está desactivado)"""
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def _finish(self, span: Span) -> None:
+        with self.lock:
+            stats = self.stats.get(span.name)
+            if stats is None:
+                stats = self.stats[span.name] = _SpanStats(self.reservoir_size)
+            stats.count += 1
+            stats.total_ns += span.duration_ns
+            if span.duration_ns > stats.max_ns:
+                stats.max_ns = span.duration_ns
+            if span.status == 'error':
+                stats.errors += 1
+            stats.samples.append(span.duration_ns)
+            self.recent.append(span)
+            if self.log is not None:
+                if len(self.pending) < self.max_pending:
+                    self.pending.append(span)
+                else:
+                    self.dropped += 1
+
+    # ---------- Exportación ----------
+
+    def _flush_loop(self) -> None:
+        while True:
+            self.flush_event.wait(self.flush_interval)
+            self.flush_event.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Vuelca al log los spans pendientes"""
+        with self.lock:
+            batch, self.pending = self.pending, []
+            log = self.log
+        if batch and log is not None:
+            log.extend([span.to_dict() for span in batch])
+            with self.lock:
+                self.exported += len(batch)
+
+    # ---------- Consulta ----------
+
+    def get_metrics(self, recent: int = 20) -> Dict:
+        """Estadísticas por nombre (ordenadas por tiempo total) y últimos spans"""
+        with self.lock:
+            spans = {name: stats.to_dict() for name, stats in self.stats.items()}
+            latest = [span.to_dict() for span in list(self.recent)[-recent:]] if recent > 0 else []
+            info = {
+                'enabled': self.enabled,
+                'export_dir': str(self.log.log_dir) if self.log is not None else None,
+                'pending': len(self.pending),
+                'exported': self.exported,
+                'dropped': self.dropped,
+            }
+        return {
+            'tracing': info,
+            'spans': dict(sorted(spans.items(), key=lambda item: -item[1]['total_ms'])),
+            'recent': latest,
+        }
+
+    def reset(self) -> None:
+        with self.lock:
+            self.stats.clear()
+            self.recent.clear()
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Obtiene el tracer global"""
+    return _tracer
+
+
+def configure_tracing(config: Dict, data_dir) -> Tracer:
+    """Aplica la sección `tracing` de la configuración al tracer global"""
+    tracing_config = config.get('tracing', {})
+    export = tracing_config.get('export', True)
+    _tracer.configure(
+        enabled=tracing_config.get('enabled', False),
+        export_dir=Path(data_dir) / 'traces' if export else None,
+        reservoir_size=tracing_config.get('reservoir_size', 1024),
+        recent_size=tracing_config.get('recent_size', 200),
+        flush_interval=tracing_config.get('flush_interval', 2.0),
+        max_pending=tracing_config.get('max_pending', 10000),
+        max_segment_bytes=int(tracing_config.get('log_max_mb', 10) * 1024 * 1024),
+        max_segments=tracing_config.get('log_max_segments', 10),
+    )
+    return _tracer
+
+
+def span(name: str, **attributes) -> Any:
+    """Span sobre el tracer global"""
+    if not _tracer.enabled:
+        return NOOP_SPAN
+    return Span(_tracer, name, attributes)
+
+
+def traced(name: str) -> Callable:
+    """Decorador: mide cada llamada a la función como un span"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return func(*args, **kwargs)
+            with Span(_tracer, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
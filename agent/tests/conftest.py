@@ -0,0 +1,8 @@
+"""
+Configuración de pytest: permite importar el paquete `src` del agente
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,57 @@
+"""
+Tests del extractor de texto HTML en streaming
+"""
+
+import random
+
+from src.html_extractor import StreamingTextExtractor, extract_text
+
+
+def test_apostrophe_inside_double_quoted_attribute():
+    html = '<p><a title="Don\'t click">important link text</a> and more text.</p>'
+    assert extract_text(html).text == 'important link text and more text.'
+
+
+def test_mixed_quotes_and_gt_inside_attributes():
+    html = ('<p><img alt=\'Rust "kernel" logo\' data-cmp="a > b" title="Rust\'s logo">'
+            'Rust\'s scheduler</p><p>second block</p>')
+    assert extract_text(html).text == "Rust's scheduler second block"
+
+
+def test_quoted_attribute_split_across_chunks():
+    extractor = StreamingTextExtractor()
+    for chunk in ('<p><a title="Don\'t ', 'stop > here">linked', ' text</a></p>'):
+        extractor.feed_chunk(chunk)
+    assert extractor.result().text == 'linked text'
+
+
+def _feed(chunks, query, max_chars):
+    extractor = StreamingTextExtractor(query, max_chars=max_chars)
+    for chunk in chunks:
+        if extractor.feed_chunk(chunk):
+            break
+    return extractor.result().text
+
+
+def test_chunked_feeding_matches_whole_document_with_query():
+    filler = ''.join(f'<p>Lorem ipsum dolor sit amet filler paragraph {i}.</p>' for i in range(20))
+    html = filler + '<p>Kernel scheduling in <b>Rust</b> uses no_std.</p>'
+    cut = html.index('<b>') + 3
+    whole = _feed([html], 'rust', 200)
+    assert whole == 'Kernel scheduling in Rust uses no_std'
+    assert _feed([html[:1000], html[1000:cut], html[cut:]], 'rust', 200) == whole
+
+
+def test_random_chunking_matches_whole_document():
+    rnd = random.Random(7)
+    filler = ''.join(f'<p>Filler paragraph number {i} with words.</p>' for i in range(20))
+    html = (filler + '<div>Intro <i>text</i> about <a href="x">memory</a> and <b>rust</b> kernel. '
+            'More <em>rust</em> here.</div>' + filler + '<script>var rust = 1;</script>'
+            '<p>a <span>b rust c</span> d.</p><!-- rust --><li>Last rust <b>item</b></li>')
+    for query in ('rust', 'rust kernel', 'memory'):
+        for max_chars in (50, 200, 500):
+            whole = _feed([html], query, max_chars)
+            for _ in range(50):
+                cuts = sorted(rnd.sample(range(1, len(html)), rnd.randint(1, 8)))
+                chunks = [html[a:b] for a, b in zip([0] + cuts, cuts + [len(html)])]
+                assert _feed(chunks, query, max_chars) == whole, chunks
@@ -0,0 +1,137 @@
+"""
+Tests de la caché de aprendizaje contra un servidor HTTP local (sin internet)
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src import learning_cache
+from src.internet_learning import InternetLearner, NetworkManager
+from src.learning_cache import LearningCache
+
+LAST_MODIFIED = 'Mon, 05 Oct 2026 10:00:00 GMT'
+
+
+def _page(name: str, words: int = 400) -> bytes:
+    text = ' '.join(f"{name}{i}" for i in range(words))
+    return (f"<html><head><title>{name}</title></head>"
+            f"<body><p>Rust kernel scheduler notes. {text}.</p></body></html>").encode('utf-8')
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """Sirve páginas con ETag/Last-Modified y responde 304 a peticiones condicionales"""
+
+    def do_GET(self):
+        server = self.server
+        body = server.pages.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = f'"{self.path.strip("/")}-v1"'
+        server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+        server.body_bytes += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _PageHandler)
+    httpd.pages = {f'/page{i}': _page(f'page{i}') for i in range(6)}
+    httpd.requests = []
+    httpd.body_bytes = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _learner(tmp_path, cache_max_mb: float = 50.0) -> InternetLearner:
+    config = {
+        'network': {'request_delay': 0.0},
+        'internet_learning': {
+            'allowed_domains': ['127.0.0.1'],
+            'cache_dir': str(tmp_path / 'learning_cache'),
+            'cache_ttl_hours': 1.0,
+            'cache_max_mb': cache_max_mb,
+        },
+    }
+    return InternetLearner(config, NetworkManager(config))
+
+
+def _url(server, path: str) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_hit_within_ttl_uses_no_network(server, tmp_path):
+    learner = _learner(tmp_path)
+    url = _url(server, '/page0')
+    first = learner.learn_from_url(url, query='rust kernel')
+    assert first is not None
+
+    requests_before = len(server.requests)
+    received_before = learner.network_manager.total_bytes_received
+    second = learner.learn_from_url(url, query='rust kernel')
+
+    assert second.content == first.content
+    assert len(server.requests) == requests_before
+    assert learner.network_manager.total_bytes_received == received_before
+    assert learner.cache.get_stats()['hits'] == 1
+
+
+def test_expired_entry_revalidates_with_304(server, tmp_path):
+    learner = _learner(tmp_path)
+    url = _url(server, '/page1')
+    first = learner.learn_from_url(url, query='rust kernel')
+    learner.cache.ttl_seconds = 0  # Forzar la revalidación
+    body_bytes_before = server.body_bytes
+
+    second = learner.learn_from_url(url, query='rust kernel')
+
+    assert second.content == first.content
+    assert server.requests[-1] == ('/page1', '"page1-v1"')
+    assert server.body_bytes == body_bytes_before
+    stats = learner.cache.get_stats()
+    assert stats['revalidations'] == 1 and stats['misses'] == 1
+
+
+def test_lru_eviction_keeps_cache_under_max_size(server, tmp_path):
+    learner = _learner(tmp_path, cache_max_mb=0.008)  # ~8 KB: caben dos páginas
+    for i in range(6):
+        assert learner.learn_from_url(_url(server, f'/page{i}'), query='rust') is not None
+
+    cache = learner.cache
+    on_disk = sum(path.stat().st_size for path in cache.objects_dir.glob('*.txt'))
+    assert cache.get_stats()['bytes'] <= cache.max_size
+    assert on_disk <= cache.max_size
+    # Se conservan las más recientes
+    assert _url(server, '/page5') in cache.entries
+    assert _url(server, '/page0') not in cache.entries
+
+
+def test_plain_hits_persist_access_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(learning_cache, 'HIT_SAVE_INTERVAL', 0.0)
+    cache = LearningCache(tmp_path / 'learning_cache')
+    entry = cache.store('http://127.0.0.1/a', 'texto', 'A', [], 0.5)
+    entry.last_access -= 1000
+    cache.record_hit(entry)
+
+    reloaded = LearningCache(tmp_path / 'learning_cache')
+    assert reloaded.lookup('http://127.0.0.1/a').last_access == entry.last_access
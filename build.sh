@@ -10,11 +10,15 @@ if ! command -v rustc &> /dev/null; then
     exit 1
 fi
 
-# Set up Rust nightly
-echo "Setting up Rust nightly..."
-rustup toolchain install nightly --profile minimal 2>/dev/null || true
-rustup default nightly 2>/dev/null || true
-rustup component add rust-src --toolchain nightly-x86_64-unknown-linux-gnu 2>/dev/null || true
+# Set up Rust nightly (el agente lo omite si ya compiló con éxito: F3_SKIP_TOOLCHAIN_SETUP=1)
+if [ -z "$F3_SKIP_TOOLCHAIN_SETUP" ]; then
+    echo "Setting up Rust nightly..."
+    rustup toolchain install nightly --profile minimal 2>/dev/null || true
+    rustup default nightly 2>/dev/null || true
+    rustup component add rust-src --toolchain nightly-x86_64-unknown-linux-gnu 2>/dev/null || true
+else
+    echo "Rust nightly already set up, skipping toolchain setup"
+fi
 
 # Check for target
 if [ ! -f x86_64-unknown-none.json ]; then